@@ -0,0 +1,78 @@
+"""
+Данные inline-кнопок админ-бота
+"""
+from typing import Optional
+
+from aiogram.filters.callback_data import CallbackData
+
+from src.core.callback_codec import CallbackCodec
+from src.database.models import DEFAULT_QUEUE_ID
+
+admin_callbacks = CallbackCodec()
+
+
+@admin_callbacks.register
+class QueueChoice(CallbackData, prefix="qc"):
+    """Выбор очереди для просмотра"""
+    queue_id: int
+
+
+@admin_callbacks.register
+class QueueFilter(CallbackData, prefix="qf"):
+    """Страница очереди с фильтром (priority=None — вся очередь)"""
+    priority: Optional[int] = None
+    page: int = 0
+    queue_id: int = DEFAULT_QUEUE_ID
+
+
+@admin_callbacks.register
+class MarkServed(CallbackData, prefix="ms"):
+    user_id: int
+
+
+@admin_callbacks.register
+class IncreasePriority(CallbackData, prefix="pi"):
+    user_id: int
+
+
+@admin_callbacks.register
+class DecreasePriority(CallbackData, prefix="pd"):
+    user_id: int
+
+
+@admin_callbacks.register
+class RemoveFromQueue(CallbackData, prefix="rq"):
+    """Удаление из очереди (confirmed — нажато «Да» в подтверждении)"""
+    user_id: int
+    confirmed: bool = False
+
+
+@admin_callbacks.register
+class ShowDocument(CallbackData, prefix="sd"):
+    user_id: int
+
+
+@admin_callbacks.register
+class DocumentsPage(CallbackData, prefix="dp"):
+    offset: int
+
+
+@admin_callbacks.register
+class SearchPage(CallbackData, prefix="sp"):
+    offset: int
+
+
+@admin_callbacks.register
+class Export(CallbackData, prefix="ex"):
+    """Формат выгрузки: xlsx | csv"""
+    fmt: str
+
+
+@admin_callbacks.register
+class Cancel(CallbackData, prefix="cx"):
+    pass
+
+
+@admin_callbacks.register
+class BackToMenu(CallbackData, prefix="bm"):
+    pass
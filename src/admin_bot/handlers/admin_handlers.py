@@ -1,39 +1,83 @@
 """
 Обработчики команд для админ-бота
 """
-from aiogram import Router, F
-from aiogram.filters import CommandStart
-from aiogram.types import Message, CallbackQuery, FSInputFile
+import asyncio
+import os
+import re
+
+from aiogram import Bot, Router, F
+from aiogram.filters import CommandStart, Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message, CallbackQuery, FSInputFile, InputMediaPhoto
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime
-import openpyxl
-import csv
-
+from datetime import datetime, timedelta, timezone
+
+from src.admin_bot.callbacks import (
+    admin_callbacks,
+    QueueChoice,
+    QueueFilter,
+    MarkServed,
+    IncreasePriority,
+    DecreasePriority,
+    RemoveFromQueue,
+    ShowDocument,
+    DocumentsPage,
+    SearchPage,
+    Export,
+    Cancel,
+    BackToMenu
+)
+from src.admin_bot.queue_pages import queue_pages
 from src.admin_bot.keyboards.admin_keyboards import (
     get_admin_main_menu,
+    get_queue_choice,
     get_queue_filters,
     get_user_actions,
     get_export_format,
     get_confirm_keyboard,
-    get_back_to_menu
+    get_back_to_menu,
+    get_documents_page,
+    get_search_page
 )
 from src.services.user_service import UserService
 from src.services.queue_service import QueueService
-from src.database.models import AdminLog
-from src.config import REASONS
+from src.services.queue_registry import queue_registry, create_queue
+from src.services.audit_service import AuditLogger, AuditService
+from src.services.notification_service import NotificationService
+from src.services.slot_service import slot_estimator
+from src.core.callback_codec import IsCallback
+from src.database.database import async_session_maker
+from src.database.models import AdminAction, AdminRole, DEFAULT_QUEUE_ID
+from src.services.admin_roster import admin_roster, Permission, set_admin_role
+from src.services.priority_registry import priority_registry, update_reason
+from src.services.document_service import DocumentPipeline, StoredDocument
+from src.services.import_service import ImportService, ImportReport, read_table, validate_rows
+from src.services.report_service import ReportService, floor_hour, average_wait_minutes
 
 router = Router()
+# Данные кнопок разбираются один раз до фильтров обработчиков
+router.callback_query.outer_middleware(admin_callbacks.middleware)
 
+# Максимальный размер медиагруппы Telegram
+DOCUMENTS_PAGE_SIZE = 10
 
-async def log_admin_action(session: AsyncSession, admin_id: int, action: str, details: str = None):
-    """Логирование действия администратора"""
-    log_entry = AdminLog(
-        admin_id=admin_id,
-        action=action,
-        details=details
-    )
-    session.add(log_entry)
-    await session.commit()
+SEARCH_PAGE_SIZE = 10
+
+
+async def notify_promoted(session: AsyncSession, queue_service: QueueService, user_bot: Bot):
+    """Уведомление пользователей, переведенных из листа ожидания в очередь"""
+    if not queue_service.promoted_user_ids:
+        return
+
+    user_service = UserService(session)
+    notification_service = NotificationService(user_bot)
+
+    for user_id in queue_service.promoted_user_ids:
+        user = await user_service.get_user_by_id(user_id)
+        position = await queue_service.get_user_position(user_id)
+        if user and position:
+            await notification_service.send_promoted_from_waitlist(user.telegram_id, position)
 
 
 @router.message(CommandStart())
@@ -48,56 +92,51 @@ async def admin_start(message: Message):
 @router.message(F.text == "📊 Просмотр очереди")
 async def view_queue(message: Message, session: AsyncSession):
     """Просмотр очереди"""
+    queues = queue_registry.all()
+    if len(queues) > 1:
+        await message.answer("Выберите очередь:", reply_markup=get_queue_choice(tuple(queues)))
+        return
+
     await message.answer(
         "Выберите фильтр для просмотра очереди:",
-        reply_markup=get_queue_filters()
+        reply_markup=get_queue_filters(queues[0].id if queues else DEFAULT_QUEUE_ID)
     )
 
 
-@router.callback_query(F.data.startswith("queue_filter_"))
-async def filter_queue(callback: CallbackQuery, session: AsyncSession):
-    """Фильтрация очереди"""
-    filter_type = callback.data.replace("queue_filter_", "")
-
-    queue_service = QueueService(session)
-
-    if filter_type == "all":
-        queue = await queue_service.get_full_queue(limit=50)
-        title = "📊 Вся очередь (топ 50)"
-    else:
-        # Получаем приоритет из filter_type (например, "priority_1" -> 1)
-        priority = int(filter_type.split("_")[1])
-        queue = await queue_service.get_queue_by_priority(priority)
-        title = f"📊 Очередь с приоритетом {priority}"
-
-    if not queue:
-        await callback.message.edit_text(
-            "Очередь пуста",
-            reply_markup=get_back_to_menu()
-        )
+@router.callback_query(IsCallback(QueueChoice))
+async def choose_queue(callback: CallbackQuery, callback_data: QueueChoice):
+    """Фильтры выбранной очереди"""
+    queue = queue_registry.get(callback_data.queue_id)
+    if queue is None:
+        await callback.answer("Очередь не найдена", show_alert=True)
         return
 
-    # Формируем сообщение
-    message_text = f"{title}\n\n"
-
-    for idx, (queue_entry, user) in enumerate(queue, start=1):
-        reason_name = REASONS.get(user.reason, {}).get("name", user.reason)
-        message_text += (
-            f"{idx}. {user.full_name}\n"
-            f"   ID: {user.telegram_id}\n"
-            f"   Причина: {reason_name}\n"
-            f"   Приоритет: {queue_entry.priority}\n"
-            f"   Дата: {user.join_date.strftime('%d.%m.%Y %H:%M')}\n"
-            f"   /user_{user.id}\n\n"
-        )
-
     await callback.message.edit_text(
-        message_text,
-        reply_markup=get_back_to_menu()
+        f"Очередь «{queue.name}». Выберите фильтр:",
+        reply_markup=get_queue_filters(queue.id)
     )
     await callback.answer()
 
 
+@router.callback_query(IsCallback(QueueFilter))
+async def filter_queue(callback: CallbackQuery, callback_data: QueueFilter, session: AsyncSession):
+    """Фильтрация очереди"""
+    page = await queue_pages.get(session, callback_data.queue_id, callback_data.priority, callback_data.page)
+    chat_id, message_id = callback.message.chat.id, callback.message.message_id
+
+    # Та же страница той же версии уже в сообщении — редактировать нечего
+    if not queue_pages.is_shown(chat_id, message_id, page):
+        try:
+            await callback.message.edit_text(page.text, reply_markup=page.reply_markup)
+        except TelegramBadRequest as e:
+            # Сообщение показано до перезапуска процесса
+            if "message is not modified" not in str(e):
+                raise
+        queue_pages.mark_shown(chat_id, message_id, page)
+
+    await callback.answer()
+
+
 @router.message(F.text.startswith("/user_"))
 async def view_user_details(message: Message, session: AsyncSession):
     """Просмотр деталей пользователя"""
@@ -108,7 +147,7 @@ async def view_user_details(message: Message, session: AsyncSession):
         return
 
     user_service = UserService(session)
-    queue_service = QueueService(session)
+    queue_service = await QueueService.for_user(session, user_id)
 
     user = await user_service.get_user_by_id(user_id)
     if not user:
@@ -116,7 +155,8 @@ async def view_user_details(message: Message, session: AsyncSession):
         return
 
     position = await queue_service.get_user_position(user_id)
-    reason_name = REASONS.get(user.reason, {}).get("name", user.reason)
+    reason_name = priority_registry.name_for(user.reason)
+    queue = queue_registry.get(queue_service.queue_id)
 
     user_info = (
         f"👤 Информация о пользователе\n\n"
@@ -124,42 +164,263 @@ async def view_user_details(message: Message, session: AsyncSession):
         f"Telegram ID: {user.telegram_id}\n"
         f"Причина: {reason_name}\n"
         f"Приоритет: {user.priority}\n"
+        f"Очередь: {queue.name if queue else queue_service.queue_id}\n"
         f"Позиция в очереди: {position or 'нет в очереди'}\n"
         f"Дата регистрации: {user.join_date.strftime('%d.%m.%Y %H:%M')}\n"
-        f"Статус: {'Активен' if user.is_active else 'Неактивен'}"
+        f"Статус: {'Активен' if user.is_active else 'Неактивен'}\n\n"
+        f"История действий: /history_{user.id}"
     )
 
     await message.answer(user_info, reply_markup=get_user_actions(user_id))
 
 
-@router.callback_query(F.data.startswith("mark_served_"))
-async def mark_as_served(callback: CallbackQuery, session: AsyncSession):
+async def render_search_page(session: AsyncSession, query: str, offset: int):
+    """Текст и клавиатура страницы результатов поиска"""
+    user_service = UserService(session)
+    users, has_next = await user_service.search_users(query, offset, SEARCH_PAGE_SIZE)
+
+    if not users:
+        return f"🔍 По запросу «{query}» ничего не найдено", None
+
+    search_text = f"🔍 Результаты поиска «{query}»:\n\n"
+    for idx, user in enumerate(users, start=offset + 1):
+        search_text += (
+            f"{idx}. {user.full_name}\n"
+            f"   ID: {user.telegram_id}\n"
+            f"   /user_{user.id}\n\n"
+        )
+
+    return search_text, get_search_page(offset, SEARCH_PAGE_SIZE, has_next)
+
+
+@router.message(Command("search"))
+async def search_users(message: Message, command: CommandObject, state: FSMContext, session: AsyncSession):
+    """Поиск пользователей по ФИО или Telegram ID"""
+    if not command.args:
+        await message.answer("Формат: /search <ФИО или Telegram ID>")
+        return
+
+    query = command.args.strip()
+    await state.update_data(search_query=query)
+
+    search_text, keyboard = await render_search_page(session, query, 0)
+    await message.answer(search_text, reply_markup=keyboard)
+
+
+@router.callback_query(IsCallback(SearchPage))
+async def search_users_page(
+        callback: CallbackQuery,
+        callback_data: SearchPage,
+        state: FSMContext,
+        session: AsyncSession
+):
+    """Переход по страницам результатов поиска"""
+    offset = callback_data.offset
+    query = (await state.get_data()).get("search_query")
+
+    if not query:
+        await callback.answer("Поиск устарел, выполните /search заново", show_alert=True)
+        return
+
+    search_text, keyboard = await render_search_page(session, query, offset)
+    await callback.message.edit_text(search_text, reply_markup=keyboard)
+    await callback.answer()
+
+
+@router.message(F.text.startswith("/history_"))
+async def view_user_history(message: Message, session: AsyncSession):
+    """Просмотр истории действий администраторов над пользователем"""
+    try:
+        user_id = int(message.text.replace("/history_", ""))
+    except ValueError:
+        await message.answer("Неверный формат команды")
+        return
+
+    audit_service = AuditService(session)
+    entries = await audit_service.get_actions_on_user(user_id, limit=20)
+
+    if not entries:
+        await message.answer("История действий пуста")
+        return
+
+    history_text = f"📜 История действий (пользователь {user_id})\n\n"
+
+    for entry in entries:
+        history_text += (
+            f"{entry.timestamp.strftime('%d.%m.%Y %H:%M')} — {entry.action.value}\n"
+            f"   Админ: {entry.admin_id}\n"
+        )
+        if entry.before or entry.after:
+            history_text += f"   {entry.before} → {entry.after}\n"
+
+    await message.answer(history_text)
+
+
+@router.message(F.text == "/reasons")
+async def show_reasons(message: Message):
+    """Просмотр категорий и их приоритетов"""
+    reasons_text = "📋 Категории\n\n"
+
+    for reason in priority_registry.all():
+        aging = (
+            f", старение: -1 каждые {reason.aging_interval_minutes} мин (до {reason.min_priority})"
+            if reason.aging_interval_minutes else ""
+        )
+        reasons_text += (
+            f"• {reason.name} ({reason.key})\n"
+            f"   Приоритет: {reason.priority}{aging}\n"
+            f"   Документ: {'да' if reason.requires_document else 'нет'}\n\n"
+        )
+
+    reasons_text += "Изменить приоритет: /set_reason_priority <ключ> <приоритет>"
+    await message.answer(reasons_text)
+
+
+@router.message(F.text.startswith("/set_reason_priority"), flags={"permission": Permission.MANAGE_REASONS})
+async def set_reason_priority(message: Message, session: AsyncSession):
+    """Изменение приоритета категории без перезапуска ботов"""
+    try:
+        _, key, priority = message.text.split()
+        priority = int(priority)
+    except ValueError:
+        await message.answer("Формат: /set_reason_priority <ключ> <приоритет>")
+        return
+
+    if not await update_reason(session, key, priority=priority):
+        await message.answer("Категория не найдена")
+        return
+
+    await priority_registry.reload_if_changed(async_session_maker)
+    await message.answer(
+        f"✅ Приоритет категории {key} изменен на {priority}.\n"
+        f"Применяется к новым регистрациям; боты подхватят изменение автоматически."
+    )
+
+
+@router.message(Command("queues"))
+async def show_queues(message: Message, user_bot: Bot):
+    """Очереди и ссылки на регистрацию в каждой"""
+    bot_username = (await user_bot.me()).username
+    queues_text = "🏢 Очереди\n\n"
+
+    for queue in queue_registry.all():
+        queues_text += (
+            f"• {queue.name} ({queue.key})\n"
+            f"   Канал: {queue.channel_username or queue.channel_id}\n"
+            f"   Вместимость: {queue.max_size or 'без ограничения'}\n"
+            f"   Регистрация: https://t.me/{bot_username}?start={queue.key}\n\n"
+        )
+
+    queues_text += "Добавить очередь: /add_queue <ключ> <ID канала> <название>"
+    await message.answer(queues_text)
+
+
+@router.message(Command("add_queue"), flags={"permission": Permission.MANAGE_REASONS})
+async def add_queue(message: Message, command: CommandObject, session: AsyncSession):
+    """Новая очередь без перезапуска ботов"""
+    try:
+        key, channel_id, name = (command.args or "").split(maxsplit=2)
+        channel_id = int(channel_id)
+    except ValueError:
+        await message.answer("Формат: /add_queue <ключ> <ID канала> <название>")
+        return
+
+    # Ключ идет в ссылку t.me/<бот>?start=<ключ>: только латиница, цифры, _ и -
+    if not re.fullmatch(r"[A-Za-z0-9_-]{1,50}", key):
+        await message.answer("Ключ очереди: латинские буквы, цифры, _ и -, до 50 символов")
+        return
+
+    if queue_registry.by_key(key) is not None:
+        await message.answer("Очередь с таким ключом уже есть")
+        return
+
+    await create_queue(session, key, name, channel_id=channel_id)
+    await queue_registry.reload_if_changed(async_session_maker)
+    await message.answer(
+        f"✅ Очередь «{name}» ({key}) создана.\n"
+        f"Боты подхватят ее автоматически; ссылки на регистрацию: /queues"
+    )
+
+
+@router.message(Command("admins"), flags={"permission": Permission.MANAGE_ADMINS})
+async def show_admins(message: Message):
+    """Список администраторов и их ролей"""
+    admins_text = "👮 Администраторы\n\n"
+    for telegram_id, role in sorted(admin_roster.roles().items()):
+        source = " (ADMIN_IDS)" if admin_roster.is_bootstrap(telegram_id) else ""
+        admins_text += f"• {telegram_id}: {role.value}{source}\n"
+
+    roles = ", ".join(role.value for role in AdminRole)
+    admins_text += f"\nНазначить роль: /set_role <telegram_id> <{roles}>\nОтозвать доступ: /revoke_admin <telegram_id>"
+    await message.answer(admins_text)
+
+
+@router.message(Command("set_role", "revoke_admin"), flags={"permission": Permission.MANAGE_ADMINS})
+async def change_admin_role(message: Message, command: CommandObject, session: AsyncSession, audit_logger: AuditLogger):
+    """Назначение и отзыв ролей без перезапуска ботов"""
+    try:
+        args = (command.args or "").split()
+        telegram_id = int(args[0])
+        role = AdminRole(args[1]) if command.command == "set_role" else None
+    except (IndexError, ValueError):
+        roles = "|".join(role.value for role in AdminRole)
+        await message.answer(f"Формат: /set_role <telegram_id> <{roles}> или /revoke_admin <telegram_id>")
+        return
+
+    if admin_roster.is_bootstrap(telegram_id):
+        await message.answer("Роль администратора из ADMIN_IDS меняется только в настройках окружения")
+        return
+
+    before = admin_roster.role_for(telegram_id)
+    await set_admin_role(session, telegram_id, role)
+    await admin_roster.reload_if_changed(async_session_maker)
+
+    audit_logger.log(
+        message.from_user.id,
+        AdminAction.CHANGE_ADMIN_ROLE,
+        details=f"telegram_id={telegram_id}",
+        before={"role": before.value if before else None},
+        after={"role": role.value if role else None}
+    )
+
+    await message.answer(
+        f"✅ {telegram_id}: {role.value if role else 'доступ отозван'}.\n"
+        f"Изменение применится во всех процессах автоматически."
+    )
+
+
+@router.callback_query(IsCallback(MarkServed), flags={"permission": Permission.MANAGE_QUEUE})
+async def mark_as_served(
+        callback: CallbackQuery,
+        callback_data: MarkServed,
+        session: AsyncSession,
+        audit_logger: AuditLogger,
+        user_bot: Bot
+):
     """Отметить пользователя как обслуженного"""
-    user_id = int(callback.data.replace("mark_served_", ""))
+    user_id = callback_data.user_id
 
-    queue_service = QueueService(session)
+    queue_service = await QueueService.for_user(session, user_id)
     success = await queue_service.mark_as_served(user_id)
 
     if success:
         # Уведомляем пользователя
-        from aiogram import Bot
-        from src.config import settings
-        from src.services.notification_service import NotificationService
-
         user_service = UserService(session)
         user = await user_service.get_user_by_id(user_id)
 
         if user:
-            bot = Bot(token=settings.BOT_TOKEN)
-            notification_service = NotificationService(bot)
+            notification_service = NotificationService(user_bot)
             await notification_service.send_service_completed(user.telegram_id)
 
+        await notify_promoted(session, queue_service, user_bot)
+
         # Логируем действие
-        await log_admin_action(
-            session,
+        audit_logger.log(
             callback.from_user.id,
-            "mark_served",
-            f"User ID: {user_id}"
+            AdminAction.MARK_SERVED,
+            target_user_id=user_id,
+            before={"status": "in_queue"},
+            after={"status": "served"}
         )
 
         await callback.answer("✅ Пользователь отмечен как обслуженный", show_alert=True)
@@ -168,120 +429,129 @@ async def mark_as_served(callback: CallbackQuery, session: AsyncSession):
         await callback.answer("❌ Ошибка при обновлении статуса", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("increase_priority_"))
-async def increase_priority(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(IsCallback(IncreasePriority), flags={"permission": Permission.MANAGE_QUEUE})
+async def increase_priority(
+        callback: CallbackQuery,
+        callback_data: IncreasePriority,
+        session: AsyncSession,
+        audit_logger: AuditLogger,
+        user_bot: Bot
+):
     """Повышение приоритета пользователя"""
-    user_id = int(callback.data.replace("increase_priority_", ""))
-
-    queue_service = QueueService(session)
-    queue_entry = await queue_service.get_queue_entry_by_user_id(user_id)
-
-    if not queue_entry:
-        await callback.answer("❌ Пользователь не найден в очереди", show_alert=True)
-        return
+    user_id = callback_data.user_id
 
-    new_priority = max(1, queue_entry.priority - 1)
+    queue_service = await QueueService.for_user(session, user_id)
+    # Новый приоритет считает БД от текущего значения: одновременные нажатия не теряются
+    changed = await queue_service.shift_priority(user_id, -1)
 
-    if new_priority == queue_entry.priority:
-        await callback.answer("⚠️ Уже максимальный приоритет", show_alert=True)
+    if changed is None:
+        if await queue_service.get_queue_entry_by_user_id(user_id) is None:
+            await callback.answer("❌ Пользователь не найден в очереди", show_alert=True)
+        else:
+            await callback.answer("⚠️ Уже максимальный приоритет", show_alert=True)
         return
 
-    await queue_service.change_user_priority(user_id, new_priority)
+    old_priority, new_priority = changed
 
     # Уведомляем пользователя
     new_position = await queue_service.get_user_position(user_id)
 
-    from aiogram import Bot
-    from src.config import settings
-    from src.services.notification_service import NotificationService
-
     user_service = UserService(session)
     user = await user_service.get_user_by_id(user_id)
 
     if user:
-        bot = Bot(token=settings.BOT_TOKEN)
-        notification_service = NotificationService(bot)
-        await notification_service.send_queue_updated(user.telegram_id, new_position)
+        notification_service = NotificationService(user_bot)
+        estimate = await slot_estimator.describe(session, queue_service.queue_id, new_position)
+        await notification_service.send_queue_updated(user.telegram_id, new_position, estimate)
 
     # Логируем
-    await log_admin_action(
-        session,
+    audit_logger.log(
         callback.from_user.id,
-        "increase_priority",
-        f"User ID: {user_id}, new priority: {new_priority}"
+        AdminAction.INCREASE_PRIORITY,
+        target_user_id=user_id,
+        before={"priority": old_priority},
+        after={"priority": new_priority}
     )
 
     await callback.answer(f"✅ Приоритет повышен до {new_priority}", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("decrease_priority_"))
-async def decrease_priority(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(IsCallback(DecreasePriority), flags={"permission": Permission.MANAGE_QUEUE})
+async def decrease_priority(
+        callback: CallbackQuery,
+        callback_data: DecreasePriority,
+        session: AsyncSession,
+        audit_logger: AuditLogger,
+        user_bot: Bot
+):
     """Понижение приоритета пользователя"""
-    user_id = int(callback.data.replace("decrease_priority_", ""))
+    user_id = callback_data.user_id
 
-    queue_service = QueueService(session)
-    queue_entry = await queue_service.get_queue_entry_by_user_id(user_id)
+    queue_service = await QueueService.for_user(session, user_id)
+    changed = await queue_service.shift_priority(user_id, 1)
 
-    if not queue_entry:
+    if changed is None:
         await callback.answer("❌ Пользователь не найден в очереди", show_alert=True)
         return
 
-    new_priority = queue_entry.priority + 1
-    await queue_service.change_user_priority(user_id, new_priority)
+    old_priority, new_priority = changed
 
     # Уведомляем пользователя
     new_position = await queue_service.get_user_position(user_id)
 
-    from aiogram import Bot
-    from src.config import settings
-    from src.services.notification_service import NotificationService
-
     user_service = UserService(session)
     user = await user_service.get_user_by_id(user_id)
 
     if user:
-        bot = Bot(token=settings.BOT_TOKEN)
-        notification_service = NotificationService(bot)
-        await notification_service.send_queue_updated(user.telegram_id, new_position)
+        notification_service = NotificationService(user_bot)
+        estimate = await slot_estimator.describe(session, queue_service.queue_id, new_position)
+        await notification_service.send_queue_updated(user.telegram_id, new_position, estimate)
 
     # Логируем
-    await log_admin_action(
-        session,
+    audit_logger.log(
         callback.from_user.id,
-        "decrease_priority",
-        f"User ID: {user_id}, new priority: {new_priority}"
+        AdminAction.DECREASE_PRIORITY,
+        target_user_id=user_id,
+        before={"priority": old_priority},
+        after={"priority": new_priority}
     )
 
     await callback.answer(f"✅ Приоритет понижен до {new_priority}", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("remove_queue_"))
-async def remove_from_queue_confirm(callback: CallbackQuery):
+@router.callback_query(IsCallback(RemoveFromQueue, ~F.confirmed), flags={"permission": Permission.MANAGE_QUEUE})
+async def remove_from_queue_confirm(callback: CallbackQuery, callback_data: RemoveFromQueue):
     """Подтверждение удаления из очереди"""
-    user_id = callback.data.replace("remove_queue_", "")
-
     await callback.message.edit_text(
         "⚠️ Вы уверены, что хотите удалить пользователя из очереди?",
-        reply_markup=get_confirm_keyboard("remove_queue", int(user_id))
+        reply_markup=get_confirm_keyboard(RemoveFromQueue(user_id=callback_data.user_id, confirmed=True))
     )
 
 
-@router.callback_query(F.data.startswith("confirm_remove_queue_"))
-async def confirm_remove_from_queue(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(IsCallback(RemoveFromQueue, F.confirmed), flags={"permission": Permission.MANAGE_QUEUE})
+async def confirm_remove_from_queue(
+        callback: CallbackQuery,
+        callback_data: RemoveFromQueue,
+        session: AsyncSession,
+        audit_logger: AuditLogger,
+        user_bot: Bot
+):
     """Удаление пользователя из очереди"""
-    user_id = int(callback.data.replace("confirm_remove_queue_", ""))
+    user_id = callback_data.user_id
 
-    queue_service = QueueService(session)
+    queue_service = await QueueService.for_user(session, user_id)
     success = await queue_service.remove_from_queue(user_id)
 
     if success:
-        await log_admin_action(
-            session,
+        audit_logger.log(
             callback.from_user.id,
-            "remove_from_queue",
-            f"User ID: {user_id}"
+            AdminAction.REMOVE_FROM_QUEUE,
+            target_user_id=user_id,
+            before={"status": "in_queue"},
+            after={"status": "removed"}
         )
 
+        await notify_promoted(session, queue_service, user_bot)
         await callback.message.edit_text("✅ Пользователь удален из очереди")
     else:
         await callback.message.edit_text("❌ Ошибка при удалении")
@@ -292,25 +562,56 @@ async def confirm_remove_from_queue(callback: CallbackQuery, session: AsyncSessi
 @router.message(F.text == "📈 Статистика")
 async def show_statistics(message: Message, session: AsyncSession):
     """Отображение статистики"""
-    queue_service = QueueService(session)
     user_service = UserService(session)
 
-    stats = await queue_service.get_queue_stats()
-    all_users = await user_service.get_all_users()
-    active_users = await user_service.get_active_users()
+    # Итоги по всем очередям и строка на каждую очередь
+    stats = {"total_in_queue": 0, "total_waitlisted": 0, "total_served": 0, "by_priority": {}}
+    per_queue = []
+    for queue in queue_registry.all():
+        queue_stats = await QueueService(session, queue.id).get_queue_stats()
+        per_queue.append((queue, queue_stats))
+        for key in ("total_in_queue", "total_waitlisted", "total_served"):
+            stats[key] += queue_stats[key]
+        for priority, count in queue_stats["by_priority"].items():
+            stats["by_priority"][priority] = stats["by_priority"].get(priority, 0) + count
+
+    total_users = await user_service.count_users()
+    active_users = await user_service.count_active_users()
+    capacity = per_queue[0][0].max_size if len(per_queue) == 1 else None
 
     stats_text = (
         f"📈 Статистика системы\n\n"
-        f"👥 Всего пользователей: {len(all_users)}\n"
-        f"✅ Активных: {len(active_users)}\n"
-        f"⏳ В очереди: {stats['total_in_queue']}\n"
+        f"👥 Всего пользователей: {total_users}\n"
+        f"✅ Активных: {active_users}\n"
+        f"⏳ В очереди: {stats['total_in_queue']}{f' / {capacity}' if capacity is not None else ''}\n"
+        f"🕒 В листе ожидания: {stats['total_waitlisted']}\n"
         f"✔️ Обслужено: {stats['total_served']}\n\n"
-        f"По приоритетам:\n"
     )
 
+    if len(per_queue) > 1:
+        stats_text += "По очередям:\n"
+        for queue, queue_stats in per_queue:
+            stats_text += (
+                f"  {queue.name}: {queue_stats['total_in_queue']} / {queue.max_size or 'без ограничения'}, "
+                f"ожидают {queue_stats['total_waitlisted']}, обслужено {queue_stats['total_served']}\n"
+            )
+        stats_text += "\n"
+
+    stats_text += "По приоритетам:\n"
     for priority, count in sorted(stats['by_priority'].items()):
         stats_text += f"  Приоритет {priority}: {count}\n"
 
+    # За последние сутки — из готовых часовых снимков
+    end = floor_hour(datetime.now(timezone.utc))
+    last_day = await ReportService(session).get_summary(end - timedelta(hours=24), end)
+    average_wait = average_wait_minutes(last_day)
+    stats_text += (
+        f"\nЗа последние 24 ч:\n"
+        f"  Регистраций: {last_day['registrations']}\n"
+        f"  Обслужено: {last_day['served']}\n"
+        f"  Среднее ожидание: {f'{average_wait:.0f} мин' if average_wait is not None else '—'}\n"
+    )
+
     await message.answer(stats_text, reply_markup=get_back_to_menu())
 
 
@@ -334,12 +635,110 @@ async def show_all_users(message: Message, session: AsyncSession):
         )
 
     if len(users) > 30:
-        users_text += f"\n... и еще {len(users) - 30} пользователей"
+        users_text += f"\n... и еще {len(users) - 30} пользователей\n\nПоиск: /search <ФИО или Telegram ID>"
 
     await message.answer(users_text)
 
 
-@router.message(F.text == "📁 Экспорт данных")
+def _document_media(document: StoredDocument, caption: str) -> InputMediaPhoto:
+    """Фото документа: по file_id админ-бота, если уже загружалось, иначе из локального кэша"""
+    media = document.admin_file_id or FSInputFile(document.thumbnail_path)
+    return InputMediaPhoto(media=media, caption=caption)
+
+
+async def send_documents(message: Message, document_pipeline: DocumentPipeline, items) -> None:
+    """Отправка документов одной медиагруппой с запоминанием file_id загруженных фото"""
+    media = [_document_media(document, caption) for caption, document in items]
+
+    if len(media) == 1:
+        sent = [await message.answer_photo(media[0].media, caption=media[0].caption)]
+    else:
+        sent = await message.answer_media_group(media)
+
+    for (_, document), sent_message in zip(items, sent):
+        if not document.admin_file_id and sent_message.photo:
+            await document_pipeline.remember_admin_file_id(document.file_id, sent_message.photo[-1].file_id)
+
+
+async def send_documents_page(
+        message: Message,
+        session: AsyncSession,
+        document_pipeline: DocumentPipeline,
+        offset: int
+):
+    """Страница документов на проверку"""
+    user_service = UserService(session)
+    users = await user_service.get_users_with_documents(offset, DOCUMENTS_PAGE_SIZE + 1)
+    has_next = len(users) > DOCUMENTS_PAGE_SIZE
+    users = users[:DOCUMENTS_PAGE_SIZE]
+
+    if not users:
+        await message.answer("Документы не найдены", reply_markup=get_back_to_menu())
+        return
+
+    # Недостающие файлы скачиваются параллельно (с ограничением), остальные берутся из кэша
+    documents = await document_pipeline.fetch_many(user.document_photo for user in users)
+    items = [
+        (f"{user.full_name}\n/user_{user.id}", documents[user.document_photo])
+        for user in users
+        if user.document_photo in documents
+    ]
+
+    if items:
+        await send_documents(message, document_pipeline, items)
+
+    page_text = f"🗂 Документы {offset + 1}–{offset + len(users)}"
+    if len(items) < len(users):
+        page_text += f"\nНе удалось загрузить: {len(users) - len(items)}"
+
+    await message.answer(page_text, reply_markup=get_documents_page(offset, has_next))
+
+
+@router.message(F.text == "🗂 Документы")
+async def review_documents(message: Message, session: AsyncSession, document_pipeline: DocumentPipeline):
+    """Проверка документов пользователей"""
+    await send_documents_page(message, session, document_pipeline, 0)
+
+
+@router.callback_query(IsCallback(DocumentsPage))
+async def review_documents_page(
+        callback: CallbackQuery,
+        callback_data: DocumentsPage,
+        session: AsyncSession,
+        document_pipeline: DocumentPipeline
+):
+    """Переход по страницам документов"""
+    await callback.answer()
+    await send_documents_page(callback.message, session, document_pipeline, callback_data.offset)
+
+
+@router.callback_query(IsCallback(ShowDocument))
+async def show_document(
+        callback: CallbackQuery,
+        callback_data: ShowDocument,
+        session: AsyncSession,
+        document_pipeline: DocumentPipeline
+):
+    """Документ конкретного пользователя"""
+    user_id = callback_data.user_id
+
+    user_service = UserService(session)
+    user = await user_service.get_user_by_id(user_id)
+
+    if not user or not user.document_photo:
+        await callback.answer("Документ не загружен", show_alert=True)
+        return
+
+    await callback.answer()
+    document = await document_pipeline.fetch(user.document_photo)
+    if document is None:
+        await callback.message.answer("❌ Не удалось загрузить документ")
+        return
+
+    await send_documents(callback.message, document_pipeline, [(user.full_name, document)])
+
+
+@router.message(F.text == "📁 Экспорт данных", flags={"permission": Permission.EXPORT})
 async def export_data_menu(message: Message):
     """Меню экспорта данных"""
     await message.answer(
@@ -348,56 +747,120 @@ async def export_data_menu(message: Message):
     )
 
 
-@router.callback_query(F.data == "export_xlsx")
-async def export_to_excel(callback: CallbackQuery, session: AsyncSession):
-    """Экспорт данных в Excel"""
-    await callback.message.edit_text("⏳ Формирую Excel файл...")
-
-    queue_service = QueueService(session)
-    queue = await queue_service.get_full_queue()
+def _write_workbook(rows: list, filepath: str):
+    """Сборка и сохранение xlsx (в потоке: для большой очереди это секунды работы процессора)"""
+    # openpyxl нужен только здесь: импорт при первом экспорте, а не при запуске бота
+    import openpyxl
 
-    # Создаем Excel файл
     wb = openpyxl.Workbook()
     ws = wb.active
     ws.title = "Очередь"
 
     # Заголовки
-    headers = ["№", "ФИО", "Telegram ID", "Причина", "Приоритет", "Позиция", "Дата регистрации"]
-    ws.append(headers)
-
-    # Данные
-    for idx, (queue_entry, user) in enumerate(queue, start=1):
-        reason_name = REASONS.get(user.reason, {}).get("name", user.reason)
-        ws.append([
-            idx,
-            user.full_name,
-            user.telegram_id,
-            reason_name,
-            queue_entry.priority,
-            queue_entry.position,
-            user.join_date.strftime('%d.%m.%Y %H:%M')
-        ])
-
-    # Сохраняем файл
+    ws.append(["№", "ФИО", "Telegram ID", "Причина", "Приоритет", "Позиция", "Дата регистрации", "Очередь"])
+    for row in rows:
+        ws.append(row)
+
+    wb.save(filepath)
+
+
+@router.callback_query(IsCallback(Export, F.fmt == "xlsx"), flags={"permission": Permission.EXPORT})
+async def export_to_excel(callback: CallbackQuery, session: AsyncSession, audit_logger: AuditLogger):
+    """Экспорт данных в Excel"""
+    await callback.message.edit_text("⏳ Формирую Excel файл...")
+
+    # Данные: очереди подряд, нумерация внутри каждой
+    rows = []
+    for queue_info in queue_registry.all():
+        queue = await QueueService(session, queue_info.id).get_full_queue()
+        for idx, (queue_entry, user) in enumerate(queue, start=1):
+            rows.append([
+                idx,
+                user.full_name,
+                user.telegram_id,
+                priority_registry.name_for(user.reason),
+                queue_entry.priority,
+                queue_entry.position,
+                user.join_date.strftime('%d.%m.%Y %H:%M'),
+                queue_info.key
+            ])
+
     filename = f"queue_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
     filepath = f"/tmp/{filename}"
-    wb.save(filepath)
+    # Книга собирается и сохраняется в потоке, цикл событий только читает БД
+    await asyncio.to_thread(_write_workbook, rows, filepath)
 
     # Отправляем файл
     file = FSInputFile(filepath)
     await callback.message.answer_document(file, caption="📊 Экспорт очереди")
 
-    await log_admin_action(
-        session,
+    audit_logger.log(
         callback.from_user.id,
-        "export_data",
-        "Format: XLSX"
+        AdminAction.EXPORT_DATA,
+        details="Format: XLSX"
     )
 
     await callback.answer()
 
 
-@router.callback_query(F.data == "back_to_menu")
+@router.message(Command("import"), F.document, flags={"permission": Permission.MANAGE_QUEUE})
+async def import_users(
+        message: Message,
+        command: CommandObject,
+        session: AsyncSession,
+        audit_logger: AuditLogger
+):
+    """Импорт списка ожидания из CSV/XLSX (файл с подписью /import [ключ очереди])"""
+    queue = queue_registry.by_key(command.args.strip()) if command.args else queue_registry.get(DEFAULT_QUEUE_ID)
+    if queue is None:
+        await message.answer("❌ Очередь не найдена, список очередей: /queues")
+        return
+
+    document = message.document
+    file_name = document.file_name or "import.csv"
+    if not file_name.lower().endswith((".csv", ".xlsx")):
+        await message.answer("❌ Поддерживаются файлы .csv и .xlsx")
+        return
+
+    status = await message.answer("⏳ Загружаю файл...")
+    filepath = f"/tmp/import_{message.from_user.id}_{message.message_id}_{os.path.basename(file_name)}"
+    await message.bot.download(document, destination=filepath)
+
+    await status.edit_text("⏳ Загружаю записи...")
+    report = ImportReport()
+    # Файл читается и проверяется пакетами по мере загрузки (в потоке)
+    rows = validate_rows(read_table(filepath), report, queue.id)
+    try:
+        await ImportService(session, queue.id).import_rows(rows, report)
+    except ValueError as e:
+        await status.edit_text(f"❌ {e}")
+        return
+    finally:
+        rows.close()
+        os.remove(filepath)
+
+    audit_logger.log(
+        message.from_user.id,
+        AdminAction.IMPORT_USERS,
+        details=f"File: {file_name}, queue: {queue.key}, imported: {report.imported}, queued: {report.queued}"
+    )
+    await status.edit_text(report.summary())
+
+
+@router.message(Command("import"), flags={"permission": Permission.MANAGE_QUEUE})
+async def import_users_help(message: Message):
+    """Подсказка по импорту"""
+    await message.answer(
+        "📥 Импорт списка ожидания\n\n"
+        "Отправьте файл .csv или .xlsx с подписью /import "
+        "(или /import <ключ очереди>, список: /queues).\n"
+        "Колонки: telegram_id, full_name, reason (ключ или название причины), "
+        "join_date (необязательно, ДД.ММ.ГГГГ ЧЧ:ММ или ISO).\n"
+        "Подходит и файл экспорта в Excel."
+    )
+
+
+@router.callback_query(IsCallback(BackToMenu))
 async def back_to_menu(callback: CallbackQuery):
     """Возврат в главное меню"""
     await callback.message.delete()
@@ -406,3 +869,10 @@ async def back_to_menu(callback: CallbackQuery):
         reply_markup=get_admin_main_menu()
     )
     await callback.answer()
+
+
+@router.callback_query(IsCallback(Cancel))
+async def cancel_action(callback: CallbackQuery):
+    """Отмена действия в клавиатуре подтверждения"""
+    await callback.message.edit_text("Действие отменено")
+    await callback.answer()
@@ -1,10 +1,32 @@
 """
 Клавиатуры для админ-бота
 """
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from aiogram.filters.callback_data import CallbackData
 from aiogram.types import ReplyKeyboardMarkup, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import ReplyKeyboardBuilder, InlineKeyboardBuilder
+from src.admin_bot.callbacks import (
+    QueueChoice,
+    QueueFilter,
+    MarkServed,
+    IncreasePriority,
+    DecreasePriority,
+    RemoveFromQueue,
+    ShowDocument,
+    DocumentsPage,
+    SearchPage,
+    Export,
+    Cancel,
+    BackToMenu
+)
+from src.database.models import DEFAULT_QUEUE_ID
+from src.services.priority_registry import priority_registry
+from src.services.queue_registry import QueueInfo
 
 
+@lru_cache(maxsize=None)
 def get_admin_main_menu() -> ReplyKeyboardMarkup:
     """Главное меню администратора"""
     builder = ReplyKeyboardBuilder()
@@ -13,18 +35,66 @@ def get_admin_main_menu() -> ReplyKeyboardMarkup:
     builder.button(text="👥 Все пользователи")
     builder.button(text="📤 Массовая рассылка")
     builder.button(text="📁 Экспорт данных")
-    builder.adjust(2, 2, 1)
+    builder.button(text="🗂 Документы")
+    builder.adjust(2, 2, 2)
     return builder.as_markup(resize_keyboard=True)
 
 
-def get_queue_filters() -> InlineKeyboardMarkup:
+@lru_cache(maxsize=4)
+def get_queue_choice(queues: Tuple[QueueInfo, ...]) -> InlineKeyboardMarkup:
+    """Выбор очереди (пересобирается после перезагрузки реестра очередей)"""
+    builder = InlineKeyboardBuilder()
+    for queue in queues:
+        builder.button(text=queue.name, callback_data=QueueChoice(queue_id=queue.id).pack())
+    builder.adjust(1)
+    return builder.as_markup()
+
+
+def get_queue_filters(queue_id: int = DEFAULT_QUEUE_ID) -> InlineKeyboardMarkup:
     """Фильтры для очереди"""
+    return _build_queue_filters(queue_id, tuple(priority_registry.priorities(queue_id)))
+
+
+@lru_cache(maxsize=64)
+def _build_queue_filters(queue_id: int, priorities: Tuple[int, ...]) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
-    builder.button(text="Все", callback_data="queue_filter_all")
-    builder.button(text="Приоритет 1", callback_data="queue_filter_priority_1")
-    builder.button(text="Приоритет 2", callback_data="queue_filter_priority_2")
-    builder.button(text="Приоритет 3", callback_data="queue_filter_priority_3")
-    builder.adjust(2, 2)
+    builder.button(text="Все", callback_data=QueueFilter(queue_id=queue_id).pack())
+    for priority in priorities:
+        builder.button(
+            text=f"Приоритет {priority}",
+            callback_data=QueueFilter(priority=priority, queue_id=queue_id).pack()
+        )
+    builder.adjust(2)
+    return builder.as_markup()
+
+
+def get_queue_page_keyboard(
+        queue_id: int,
+        priority: Optional[int],
+        page: int,
+        has_next: bool
+) -> InlineKeyboardMarkup:
+    """Навигация по страницам очереди"""
+    builder = InlineKeyboardBuilder()
+    if page > 0:
+        builder.button(
+            text="⬅️ Назад",
+            callback_data=QueueFilter(priority=priority, page=page - 1, queue_id=queue_id).pack()
+        )
+    if has_next:
+        builder.button(
+            text="Далее ➡️",
+            callback_data=QueueFilter(priority=priority, page=page + 1, queue_id=queue_id).pack()
+        )
+    builder.button(
+        text="🔄 Обновить",
+        callback_data=QueueFilter(priority=priority, page=page, queue_id=queue_id).pack()
+    )
+    builder.button(text="⬅️ Назад в меню", callback_data=BackToMenu().pack())
+    if page > 0 and has_next:
+        builder.adjust(2, 1, 1)
+    else:
+        builder.adjust(1)
     return builder.as_markup()
 
 
@@ -33,41 +103,65 @@ def get_user_actions(user_id: int) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(
         text="✅ Отметить как обслуженного",
-        callback_data=f"mark_served_{user_id}"
+        callback_data=MarkServed(user_id=user_id).pack()
     )
     builder.button(
         text="⬆️ Повысить приоритет",
-        callback_data=f"increase_priority_{user_id}"
+        callback_data=IncreasePriority(user_id=user_id).pack()
     )
     builder.button(
         text="⬇️ Понизить приоритет",
-        callback_data=f"decrease_priority_{user_id}"
+        callback_data=DecreasePriority(user_id=user_id).pack()
     )
     builder.button(
         text="❌ Удалить из очереди",
-        callback_data=f"remove_queue_{user_id}"
+        callback_data=RemoveFromQueue(user_id=user_id).pack()
+    )
+    builder.button(
+        text="📄 Документ",
+        callback_data=ShowDocument(user_id=user_id).pack()
     )
     builder.adjust(1)
     return builder.as_markup()
 
 
+def get_documents_page(offset: int, has_next: bool) -> InlineKeyboardMarkup:
+    """Навигация по документам на проверке"""
+    builder = InlineKeyboardBuilder()
+    if offset > 0:
+        builder.button(text="⬅️ Назад", callback_data=DocumentsPage(offset=max(0, offset - 10)).pack())
+    if has_next:
+        builder.button(text="Далее ➡️", callback_data=DocumentsPage(offset=offset + 10).pack())
+    builder.button(text="⬅️ Назад в меню", callback_data=BackToMenu().pack())
+    builder.adjust(2, 1)
+    return builder.as_markup()
+
+
+def get_search_page(offset: int, limit: int, has_next: bool) -> InlineKeyboardMarkup:
+    """Навигация по результатам поиска"""
+    builder = InlineKeyboardBuilder()
+    if offset > 0:
+        builder.button(text="⬅️ Назад", callback_data=SearchPage(offset=max(0, offset - limit)).pack())
+    if has_next:
+        builder.button(text="Далее ➡️", callback_data=SearchPage(offset=offset + limit).pack())
+    builder.adjust(2)
+    return builder.as_markup()
+
+
 def get_export_format() -> InlineKeyboardMarkup:
     """Выбор формата экспорта"""
     builder = InlineKeyboardBuilder()
-    builder.button(text="Excel (.xlsx)", callback_data="export_xlsx")
-    builder.button(text="CSV", callback_data="export_csv")
+    builder.button(text="Excel (.xlsx)", callback_data=Export(fmt="xlsx").pack())
+    builder.button(text="CSV", callback_data=Export(fmt="csv").pack())
     builder.adjust(1)
     return builder.as_markup()
 
 
-def get_confirm_keyboard(action: str, user_id: int = None) -> InlineKeyboardMarkup:
-    """Клавиатура подтверждения действия"""
+def get_confirm_keyboard(confirm: CallbackData) -> InlineKeyboardMarkup:
+    """Клавиатура подтверждения действия (confirm — данные кнопки «Да»)"""
     builder = InlineKeyboardBuilder()
-
-    callback_data = action if not user_id else f"{action}_{user_id}"
-
-    builder.button(text="✅ Да", callback_data=f"confirm_{callback_data}")
-    builder.button(text="❌ Нет", callback_data=f"cancel_{callback_data}")
+    builder.button(text="✅ Да", callback_data=confirm.pack())
+    builder.button(text="❌ Нет", callback_data=Cancel().pack())
     builder.adjust(2)
     return builder.as_markup()
 
@@ -75,5 +169,5 @@ def get_confirm_keyboard(action: str, user_id: int = None) -> InlineKeyboardMark
 def get_back_to_menu() -> InlineKeyboardMarkup:
     """Кнопка возврата в меню"""
     builder = InlineKeyboardBuilder()
-    builder.button(text="⬅️ Назад в меню", callback_data="back_to_menu")
+    builder.button(text="⬅️ Назад в меню", callback_data=BackToMenu().pack())
     return builder.as_markup()
@@ -3,13 +3,30 @@
 """
 import asyncio
 import logging
-from aiogram import Bot, Dispatcher
+from aiogram import Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 
 from src.config import settings
-from src.database.database import create_tables, async_session_maker
+from src.database.database import async_session_maker
 from src.admin_bot.handlers import admin_handlers
 from src.admin_bot.middleware.admin_middleware import AdminCheckMiddleware
+from src.services.audit_service import AuditLogger
+from src.core.bot_factory import create_bot
+from src.core.lifecycle import Lifecycle
+from src.core.health import HealthServer
+from src.core.loop_monitor import loop_monitor
+from src.core.send_queue import get_send_queue
+from src.core.update_journal import UpdateJournal, keyboard_texts
+from src.services.priority_registry import priority_registry
+from src.services.admin_roster import admin_roster
+from src.services.queue_index import enable_queue_index
+from src.services.queue_service import QueueService
+from src.services.queue_registry import queue_registry
+from src.services.archive_service import QueueArchiver
+from src.services.slot_service import SlotScheduler
+from src.services.document_service import create_document_pipeline
+from src.admin_bot.scheduler import ReportScheduler, parse_digest_times
+from src.admin_bot.keyboards.admin_keyboards import get_admin_main_menu, get_queue_filters
 
 # Настройка логирования
 logging.basicConfig(
@@ -22,16 +39,58 @@ logger = logging.getLogger(__name__)
 async def main():
     """Главная функция запуска админ-бота"""
 
-    # Создаем таблицы в БД (если еще не созданы)
-    logger.info("Checking database tables...")
-    await create_tables()
-    logger.info("Database check completed")
-
     # Инициализация бота и диспетчера
-    bot = Bot(token=settings.ADMIN_BOT_TOKEN)
+    bot = create_bot(settings.ADMIN_BOT_TOKEN)
     storage = MemoryStorage()
     dp = Dispatcher(storage=storage)
 
+    # Остановка: дообработка обновлений, затем сервисы в обратном порядке запуска
+    lifecycle = Lifecycle("admin_bot", shutdown_timeout=settings.SHUTDOWN_TIMEOUT)
+    lifecycle.warm(get_admin_main_menu)
+    lifecycle.warm(get_queue_filters)
+    lifecycle.attach(dp)
+
+    # Журнал входящих обновлений (команды администраторов)
+    if settings.JOURNAL_DIR:
+        journal = UpdateJournal(
+            settings.JOURNAL_DIR,
+            "admin_bot",
+            max_bytes=settings.JOURNAL_MAX_BYTES,
+            max_files=settings.JOURNAL_MAX_FILES,
+            keep_texts=keyboard_texts(get_admin_main_menu())
+        )
+        journal.attach(dp)
+        lifecycle.on_shutdown(journal.close)
+
+    # Проверка схемы и прогрев пула до приема обновлений
+    await lifecycle.prepare(settings.DB_WARMUP_CONNECTIONS)
+
+    # Задержка цикла событий и медленные колбэки с привязкой к обработчику
+    await loop_monitor.start(settings.LOOP_MONITOR_INTERVAL, settings.LOOP_SLOW_CALLBACK_MS / 1000)
+    lifecycle.on_shutdown(loop_monitor.stop)
+
+    # /healthz, /readyz, /metrics
+    health_server = None
+    if settings.HEALTH_PORT:
+        health_server = HealthServer(
+            lifecycle, settings.HEALTH_HOST, settings.HEALTH_PORT, max_loop_lag=settings.HEALTH_MAX_LOOP_LAG
+        )
+        health_server.track_queue_depth(async_session_maker)
+        await health_server.start()
+        lifecycle.on_shutdown(health_server.stop)
+
+    # Очереди и каналы; сверка счетчиков вместимости каждой очереди с таблицей
+    await queue_registry.start(async_session_maker, reload_interval=settings.QUEUE_RELOAD_INTERVAL)
+    lifecycle.on_shutdown(queue_registry.stop)
+    async with async_session_maker() as session:
+        for queue in queue_registry.all():
+            await QueueService(session, queue.id).sync_counters()
+
+    # Роли администраторов: ADMIN_IDS — суперадминистраторы, остальные из БД
+    admin_roster.configure(settings.admin_ids)
+    await admin_roster.start(async_session_maker, reload_interval=settings.ADMIN_ROLES_RELOAD_INTERVAL)
+    lifecycle.on_shutdown(admin_roster.stop)
+
     # Добавляем middleware для проверки администратора
     dp.message.middleware(AdminCheckMiddleware())
     dp.callback_query.middleware(AdminCheckMiddleware())
@@ -43,13 +102,92 @@ async def main():
             data["session"] = session
             return await handler(event, data)
 
+    # Уведомления пользователям отправляются от имени пользовательского бота
+    user_bot = create_bot(settings.BOT_TOKEN)
+    dp["user_bot"] = user_bot
+    lifecycle.on_shutdown(user_bot.session.close)
+    # Уведомления досылаются до закрытия сессии (остановка идет в обратном порядке)
+    send_queue = get_send_queue(user_bot)
+    lifecycle.on_shutdown(send_queue.stop)
+
+    # Буферизированный журнал действий администраторов
+    audit_logger = AuditLogger(
+        async_session_maker,
+        batch_size=settings.AUDIT_BATCH_SIZE,
+        flush_interval=settings.AUDIT_FLUSH_INTERVAL
+    )
+    dp["audit_logger"] = audit_logger
+
+    # Документы скачиваются через пользовательского бота, которому принадлежат file_id
+    document_pipeline = create_document_pipeline(user_bot, async_session_maker)
+    dp["document_pipeline"] = document_pipeline
+
+    # Фоновый расчет отчетов и рассылка сводок
+    report_scheduler = ReportScheduler(
+        bot,
+        async_session_maker,
+        admin_roster.admin_ids,
+        parse_digest_times(settings.DIGEST_TIMES),
+        hourly_digest=settings.DIGEST_HOURLY,
+        tick_interval=settings.REPORT_TICK_INTERVAL
+    )
+
     # Регистрация роутеров
     dp.include_router(admin_handlers.router)
 
+    await audit_logger.start()
+    lifecycle.on_shutdown(audit_logger.stop)
+    await document_pipeline.start()
+    lifecycle.on_shutdown(document_pipeline.stop)
+    await priority_registry.start(
+        async_session_maker,
+        reload_interval=settings.PRIORITY_RELOAD_INTERVAL,
+        aging_interval=settings.AGING_JOB_INTERVAL
+    )
+    lifecycle.on_shutdown(priority_registry.stop)
+    await report_scheduler.start()
+    lifecycle.on_shutdown(report_scheduler.stop)
+    if settings.ARCHIVE_AFTER_DAYS > 0:
+        queue_archiver = QueueArchiver(
+            async_session_maker,
+            archive_after_days=settings.ARCHIVE_AFTER_DAYS,
+            retention_days=settings.ARCHIVE_RETENTION_DAYS,
+            batch_size=settings.ARCHIVE_BATCH_SIZE,
+            interval=settings.ARCHIVE_INTERVAL
+        )
+        await queue_archiver.start()
+        lifecycle.on_shutdown(queue_archiver.stop)
+    if settings.QUEUE_INDEX_ENABLED:
+        enable_queue_index()
+        async with async_session_maker() as session:
+            for queue in queue_registry.all():
+                await QueueService(session, queue.id).load_index()
+
+    # Напоминания о времени обслуживания (после загрузки индексов очередей)
+    slot_scheduler = None
+    if settings.SLOT_REMINDER_MINUTES > 0:
+        slot_scheduler = SlotScheduler(
+            user_bot,
+            async_session_maker,
+            reminder_minutes=settings.SLOT_REMINDER_MINUTES,
+            tick_interval=settings.SLOT_TICK_INTERVAL
+        )
+        await slot_scheduler.start()
+        lifecycle.on_shutdown(slot_scheduler.stop)
+
+    if health_server is not None:
+        health_server.track_backlog("audit", lambda: audit_logger.pending)
+        health_server.track_backlog("documents", lambda: document_pipeline.backlog)
+        health_server.track_backlog("send", lambda: send_queue.backlog)
+        if slot_scheduler is not None:
+            health_server.track_backlog("slot_reminders", lambda: slot_scheduler.backlog)
+
+    lifecycle.warm_up()
+
     logger.info("Admin bot starting...")
-    logger.info(f"Authorized admin IDs: {settings.admin_ids_list}")
+    logger.info(f"Authorized admins: {len(admin_roster.admin_ids())} ({len(settings.admin_ids)} from ADMIN_IDS)")
 
-    # Запуск бота
+    # Запуск бота (aiogram перехватывает SIGTERM/SIGINT и вызывает остановку)
     try:
         await dp.start_polling(bot)
     finally:
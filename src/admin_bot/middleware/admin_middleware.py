@@ -3,12 +3,20 @@ Middleware для проверки администратора
 """
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
 from aiogram.types import Message, CallbackQuery
-from src.config import settings
+from src.services.admin_roster import admin_roster, Permission, ROLE_PERMISSIONS
+
+NO_ACCESS = "❌ У вас нет доступа к этому боту."
+NO_PERMISSION = "⛔️ Недостаточно прав для этого действия."
 
 
 class AdminCheckMiddleware(BaseMiddleware):
-    """Middleware для проверки прав администратора"""
+    """Middleware для проверки прав администратора.
+
+    Роль берется из admin_roster (словарь в памяти), требуемое право — из
+    флага обработчика permission (по умолчанию Permission.VIEW).
+    """
 
     async def __call__(
             self,
@@ -16,17 +24,27 @@ class AdminCheckMiddleware(BaseMiddleware):
             event: Message | CallbackQuery,
             data: Dict[str, Any]
     ) -> Any:
-        """Проверка, является ли пользователь администратором"""
+        """Проверка, является ли пользователь администратором с нужным правом"""
 
-        user_id = event.from_user.id
+        role = admin_roster.role_for(event.from_user.id)
 
         # Проверяем, есть ли пользователь в списке администраторов
-        if user_id not in settings.admin_ids_list:
-            if isinstance(event, Message):
-                await event.answer("❌ У вас нет доступа к этому боту.")
-            elif isinstance(event, CallbackQuery):
-                await event.answer("❌ У вас нет доступа к этому боту.", show_alert=True)
+        if role is None:
+            await self._deny(event, NO_ACCESS)
+            return
+
+        if get_flag(data, "permission", default=Permission.VIEW) not in ROLE_PERMISSIONS[role]:
+            await self._deny(event, NO_PERMISSION)
             return
 
+        data["admin_role"] = role
+
         # Передаем управление дальше
         return await handler(event, data)
+
+    @staticmethod
+    async def _deny(event: Message | CallbackQuery, text: str):
+        if isinstance(event, Message):
+            await event.answer(text)
+        elif isinstance(event, CallbackQuery):
+            await event.answer(text, show_alert=True)
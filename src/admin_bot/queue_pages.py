@@ -0,0 +1,120 @@
+"""
+Кэш отрисованных страниц очереди в админ-боте
+
+Страница (текст и клавиатура) строится один раз на версию очереди:
+queue_state.version увеличивается каждой мутацией активной очереди, поэтому
+ключ (очередь, фильтр, страница, версия) не устаревает, а при смене версии
+очищаются только страницы этой очереди. Перед показом читается только версия (одна строка по
+первичному ключу); если в сообщении уже показана та же страница той же
+версии, редактирование в Telegram не выполняется.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.admin_bot.keyboards.admin_keyboards import get_queue_page_keyboard
+from src.core.metrics import CACHE_REQUESTS
+from src.services.priority_registry import priority_registry
+from src.services.queue_registry import queue_registry
+from src.services.queue_service import QueueService
+
+QUEUE_PAGE_SIZE = 20
+
+# Сколько последних сообщений со страницами очереди помнить
+_SHOWN_LIMIT = 1024
+
+# (queue_id, priority, page)
+PageKey = Tuple[int, Optional[int], int]
+
+
+@dataclass(frozen=True)
+class QueuePage:
+    """Отрисованная страница очереди"""
+    key: PageKey
+    version: int
+    text: str
+    reply_markup: InlineKeyboardMarkup
+
+
+class QueuePageCache:
+    """Страницы очереди текущей версии и страницы, показанные в сообщениях"""
+
+    def __init__(self):
+        # По очередям: версия, из которой отрисованы страницы, и сами страницы
+        self._versions: Dict[int, int] = {}
+        self._pages: Dict[int, Dict[PageKey, QueuePage]] = {}
+        # (chat_id, message_id) -> (ключ, версия) показанной страницы
+        self._shown: "OrderedDict[Tuple[int, int], Tuple[PageKey, int]]" = OrderedDict()
+
+    async def get(self, session: AsyncSession, queue_id: int, priority: Optional[int], page: int) -> QueuePage:
+        """Страница для текущей версии очереди (из кэша или из БД)"""
+        queue_service = QueueService(session, queue_id)
+        version = await queue_service.get_version()
+        if version != self._versions.get(queue_id):
+            self._pages[queue_id] = {}
+            self._versions[queue_id] = version
+        pages = self._pages[queue_id]
+
+        key = (queue_id, priority, page)
+        cached = pages.get(key)
+        if cached is not None:
+            CACHE_REQUESTS.inc(cache="queue_pages", result="hit")
+            return cached
+
+        CACHE_REQUESTS.inc(cache="queue_pages", result="miss")
+        rows, has_next = await queue_service.get_queue_page(priority, page * QUEUE_PAGE_SIZE, QUEUE_PAGE_SIZE)
+        rendered = QueuePage(
+            key=key,
+            version=version,
+            text=_render(queue_id, priority, page, rows),
+            reply_markup=get_queue_page_keyboard(queue_id, priority, page, has_next)
+        )
+        # Версия могла смениться, пока шел запрос: старую страницу не сохраняем
+        if version == self._versions.get(queue_id):
+            pages[key] = rendered
+        return rendered
+
+    def is_shown(self, chat_id: int, message_id: int, page: QueuePage) -> bool:
+        """Показана ли эта страница этой версии в сообщении"""
+        return self._shown.get((chat_id, message_id)) == (page.key, page.version)
+
+    def mark_shown(self, chat_id: int, message_id: int, page: QueuePage):
+        self._shown[(chat_id, message_id)] = (page.key, page.version)
+        self._shown.move_to_end((chat_id, message_id))
+        if len(self._shown) > _SHOWN_LIMIT:
+            self._shown.popitem(last=False)
+
+
+def _render(queue_id: int, priority: Optional[int], page: int, rows) -> str:
+    if not rows:
+        return "Очередь пуста" if page == 0 else "На этой странице записей нет"
+
+    if priority is None:
+        title = "📊 Вся очередь"
+    else:
+        title = f"📊 Очередь с приоритетом {priority}"
+    queue = queue_registry.get(queue_id)
+    if queue is not None and len(queue_registry.all()) > 1:
+        title += f" «{queue.name}»"
+    if page > 0:
+        title += f" (стр. {page + 1})"
+
+    start = page * QUEUE_PAGE_SIZE + 1
+    lines = [title, ""]
+    for idx, (queue_entry, user) in enumerate(rows, start=start):
+        lines.append(
+            f"{idx}. {user.full_name}\n"
+            f"   ID: {user.telegram_id}\n"
+            f"   Причина: {priority_registry.name_for(user.reason)}\n"
+            f"   Приоритет: {queue_entry.priority}\n"
+            f"   Дата: {user.join_date.strftime('%d.%m.%Y %H:%M')}\n"
+            f"   /user_{user.id}\n"
+        )
+    return "\n".join(lines)
+
+
+# Кэш страниц процесса админ-бота
+queue_pages = QueuePageCache()
@@ -0,0 +1,136 @@
+"""
+Планировщик отчетов админ-бота
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, time, timezone
+from typing import List, Optional, Dict, Any, Callable, Iterable
+
+from aiogram import Bot
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.services.report_service import ReportService, DAILY, floor_hour, average_wait_minutes
+from src.services.queue_service import get_queue_depths
+from src.services.priority_registry import priority_registry
+
+logger = logging.getLogger(__name__)
+
+
+def parse_digest_times(value: str) -> List[time]:
+    """Разбор строки вида "09:00,18:30" """
+    times = []
+    for item in value.split(","):
+        item = item.strip()
+        if item:
+            hours, minutes = item.split(":")
+            times.append(time(int(hours), int(minutes)))
+    return times
+
+
+def format_digest(title: str, metrics: Dict[str, Any], queue_stats: Optional[Dict[str, Any]] = None) -> str:
+    """Текст отчета"""
+    average_wait = average_wait_minutes(metrics)
+    digest_text = (
+        f"{title}\n\n"
+        f"📝 Новых регистраций: {metrics['registrations']}\n"
+        f"✔️ Обслужено: {metrics['served']}\n"
+        f"❌ Удалено из очереди: {metrics['removed']}\n"
+        f"⏱ Среднее ожидание: {f'{average_wait:.0f} мин' if average_wait is not None else '—'}\n"
+    )
+
+    if metrics["by_reason"]:
+        digest_text += "\nРегистрации по причинам:\n"
+        for reason, count in sorted(metrics["by_reason"].items(), key=lambda item: -item[1]):
+            digest_text += f"  {priority_registry.name_for(reason)}: {count}\n"
+
+    if queue_stats is not None:
+        digest_text += f"\n⏳ Сейчас в очереди: {queue_stats['total_in_queue']}\n"
+
+    return digest_text
+
+
+class ReportScheduler:
+    """Фоновый расчет часовых снимков и рассылка сводок администраторам.
+
+    Часовые снимки досчитываются от водяного знака (конец последнего
+    снимка), поэтому каждый час обрабатывается ровно один раз, в том числе
+    после перезапуска. Суточная сводка складывается из 24 часовых снимков.
+    Время в настройках — UTC.
+    """
+
+    def __init__(
+            self,
+            bot: Bot,
+            session_maker: async_sessionmaker,
+            recipients: Callable[[], Iterable[int]],
+            digest_times: List[time],
+            hourly_digest: bool = False,
+            tick_interval: float = 60.0
+    ):
+        self.bot = bot
+        self.session_maker = session_maker
+        self.recipients = recipients
+        self.digest_times = digest_times
+        self.hourly_digest = hourly_digest
+        self.tick_interval = tick_interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.tick(datetime.now(timezone.utc))
+            except Exception as e:
+                logger.error(f"Report scheduler tick failed: {e}")
+            await asyncio.sleep(self.tick_interval)
+
+    async def tick(self, now: datetime):
+        """Один шаг планировщика"""
+        async with self.session_maker() as session:
+            report_service = ReportService(session)
+            computed = await report_service.catch_up_hourly(now)
+
+            if computed and self.hourly_digest:
+                end = floor_hour(now)
+                metrics = await report_service.get_summary(end - timedelta(hours=1), end)
+                await self._send(format_digest(f"🕐 Отчет за {end - timedelta(hours=1):%H:%M}–{end:%H:%M} UTC", metrics))
+
+            for slot in self._due_slots(now):
+                if await report_service.was_sent(DAILY, slot):
+                    continue
+
+                end = floor_hour(slot)
+                metrics = await report_service.get_summary(end - timedelta(hours=24), end)
+                await report_service.save_snapshot(DAILY, slot, slot, metrics)
+
+                # По всем очередям: сумма счетчиков queue_state
+                queue_stats = {"total_in_queue": sum((await get_queue_depths(session)).values())}
+                await self._send(format_digest("📊 Сводка за сутки", metrics, queue_stats))
+
+    def _due_slots(self, now: datetime) -> List[datetime]:
+        """Слоты рассылки, наступившие за последний час (пропущенные ранее не догоняются)"""
+        slots = []
+        for digest_time in self.digest_times:
+            slot = datetime.combine(now.date(), digest_time, tzinfo=timezone.utc)
+            if slot <= now < slot + timedelta(hours=1):
+                slots.append(slot)
+        return slots
+
+    async def _send(self, text: str):
+        for admin_id in self.recipients():
+            try:
+                await self.bot.send_message(admin_id, text)
+            except Exception as e:
+                logger.error(f"Failed to send digest to {admin_id}: {e}")
@@ -0,0 +1,24 @@
+"""
+Данные inline-кнопок основного бота
+"""
+from aiogram.filters.callback_data import CallbackData
+
+from src.core.callback_codec import CallbackCodec
+
+user_callbacks = CallbackCodec()
+
+
+@user_callbacks.register
+class CaptchaAnswer(CallbackData, prefix="c"):
+    """Выбранный ответ (правильный хранится в FSM, а не в кнопке)"""
+    answer: int
+
+
+@user_callbacks.register
+class ReasonChoice(CallbackData, prefix="r"):
+    key: str
+
+
+@user_callbacks.register
+class SkipDocument(CallbackData, prefix="sk"):
+    pass
@@ -1,12 +1,14 @@
 from aiogram import Router, F
-from aiogram.filters import CommandStart
+from aiogram.filters import CommandStart, CommandObject
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 import random
 import logging
 
+from src.bot.callbacks import user_callbacks, CaptchaAnswer, ReasonChoice
 from src.bot.states import RegistrationStates
+from src.core.callback_codec import IsCallback
 from src.bot.keyboards.user_keyboards import (
     get_start_keyboard,
     get_captcha_keyboard,
@@ -15,28 +17,60 @@ from src.bot.keyboards.user_keyboards import (
 )
 from src.services.user_service import UserService
 from src.services.queue_service import QueueService
-from src.config import MESSAGES, REASONS
+from src.services.priority_registry import priority_registry
+from src.services.queue_registry import queue_registry
+from src.database.models import QueueStatus, DEFAULT_QUEUE_ID
+from src.services.document_service import DocumentPipeline
+from src.services.notification_service import NotificationService
+from src.services.channel_service import ChannelManager
+from src.services.slot_service import slot_estimator
+from src.config import MESSAGES
 
 router = Router()
+# Данные кнопок разбираются один раз до фильтров обработчиков
+router.callback_query.outer_middleware(user_callbacks.middleware)
 logger = logging.getLogger(__name__)
 
 
+async def reset_registration(state: FSMContext):
+    """Сброс регистрации с сохранением очереди из ссылки /start <ключ>"""
+    queue_id = (await state.get_data()).get("queue_id")
+    await state.clear()
+    if queue_id is not None:
+        await state.update_data(queue_id=queue_id)
+
+
 @router.message(CommandStart())
-async def cmd_start(message: Message, state: FSMContext, session: AsyncSession):
-    """Обработчик команды /start"""
+async def cmd_start(message: Message, command: CommandObject, state: FSMContext, session: AsyncSession):
+    """Обработчик команды /start (/start <ключ очереди> — регистрация в конкретную очередь)"""
     user_service = UserService(session)
 
     # Проверяем, зарегистрирован ли пользователь
-    if await user_service.user_exists(message.from_user.id):
-        queue_service = QueueService(session)
-        position = await queue_service.get_user_position(message.from_user.id)
+    user = await user_service.get_user_by_telegram_id(message.from_user.id)
+    if user:
+        queue_service = await QueueService.for_user(session, user.id)
+        position = await queue_service.get_user_position(user.id)
 
+        if position is None:
+            waitlist_position = await queue_service.get_waitlist_position(user.id)
+            if waitlist_position is not None:
+                await message.answer(
+                    MESSAGES["already_waitlisted"].format(position=waitlist_position),
+                    reply_markup=get_start_keyboard()
+                )
+                return
+
+        estimate = await slot_estimator.describe(session, queue_service.queue_id, position)
         await message.answer(
-            MESSAGES["already_registered"].format(position=position or "неизвестна"),
+            MESSAGES["already_registered"].format(position=position or "неизвестна") + estimate,
             reply_markup=get_start_keyboard()
         )
         return
 
+    # Очередь из ссылки; без ключа или с неизвестным ключом — очередь по умолчанию
+    queue = queue_registry.by_key(command.args) if command.args else None
+    await state.update_data(queue_id=queue.id if queue else DEFAULT_QUEUE_ID)
+
     # Начинаем регистрацию
     await message.answer(
         MESSAGES["welcome"],
@@ -62,13 +96,13 @@ async def start_registration(message: Message, state: FSMContext):
     )
 
 
-@router.callback_query(F.data.startswith("captcha_"), RegistrationStates.captcha)
-async def process_captcha(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(IsCallback(CaptchaAnswer), RegistrationStates.captcha)
+async def process_captcha(callback: CallbackQuery, callback_data: CaptchaAnswer, state: FSMContext):
     """Обработка ответа на CAPTCHA"""
-    # Парсим callback data: captcha_<выбранный_ответ>_<правильный_ответ>
-    _, user_answer, correct_answer = callback.data.split("_")
+    # Правильный ответ хранится в состоянии, в кнопке — только выбранный
+    correct_answer = (await state.get_data()).get("captcha_answer")
 
-    if user_answer == correct_answer:
+    if callback_data.answer == correct_answer:
         await callback.message.edit_text(MESSAGES["captcha_success"])
         await callback.message.answer(
             MESSAGES["ask_full_name"],
@@ -97,41 +131,47 @@ async def process_captcha(callback: CallbackQuery, state: FSMContext):
 async def process_full_name(message: Message, state: FSMContext):
     """Обработка ввода ФИО"""
     if message.text == "❌ Отменить":
-        await state.clear()
+        await reset_registration(state)
         await message.answer("Регистрация отменена.", reply_markup=get_start_keyboard())
         return
 
     # Сохраняем ФИО
-    await state.update_data(full_name=message.text)
+    data = await state.update_data(full_name=message.text)
 
     # Переходим к выбору причины
     await message.answer(
         MESSAGES["ask_reason"],
-        reply_markup=get_reason_keyboard()
+        reply_markup=get_reason_keyboard(data.get("queue_id", DEFAULT_QUEUE_ID))
     )
     await state.set_state(RegistrationStates.waiting_for_reason)
 
 
-@router.callback_query(F.data.startswith("reason_"), RegistrationStates.waiting_for_reason)
-async def process_reason(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
+@router.callback_query(IsCallback(ReasonChoice), RegistrationStates.waiting_for_reason)
+async def process_reason(
+        callback: CallbackQuery,
+        callback_data: ReasonChoice,
+        state: FSMContext,
+        session: AsyncSession
+):
     """Обработка выбора причины вступления"""
-    reason_key = callback.data.replace("reason_", "")
-    reason_data = REASONS.get(reason_key)
+    reason_key = callback_data.key
+    reason_data = priority_registry.get(reason_key)
+    queue_id = (await state.get_data()).get("queue_id", DEFAULT_QUEUE_ID)
 
-    if not reason_data:
+    if not reason_data or not reason_data.available_in(queue_id):
         await callback.answer("Ошибка выбора причины", show_alert=True)
         return
 
     # Сохраняем причину
     await state.update_data(
         reason=reason_key,
-        requires_document=reason_data["requires_document"]
+        requires_document=reason_data.requires_document
     )
 
-    await callback.message.edit_text(f"✅ Выбрано: {reason_data['name']}")
+    await callback.message.edit_text(f"✅ Выбрано: {reason_data.name}")
 
     # Если требуется документ - запрашиваем
-    if reason_data["requires_document"]:
+    if reason_data.requires_document:
         await callback.message.answer(
             MESSAGES["ask_document"],
             reply_markup=get_cancel_keyboard()
@@ -139,11 +179,16 @@ async def process_reason(callback: CallbackQuery, state: FSMContext, session: As
         await state.set_state(RegistrationStates.waiting_for_document)
     else:
         # Если документ не требуется - завершаем регистрацию
-        await finalize_registration(callback.message, state, session)
+        await finalize_registration(callback.message, state, session, callback.from_user.id)
 
 
 @router.message(RegistrationStates.waiting_for_document, F.photo)
-async def process_document(message: Message, state: FSMContext, session: AsyncSession):
+async def process_document(
+        message: Message,
+        state: FSMContext,
+        session: AsyncSession,
+        document_pipeline: DocumentPipeline
+):
     """Обработка загрузки фото документа"""
     # Получаем ID фото (самого большого размера)
     photo_id = message.photo[-1].file_id
@@ -151,57 +196,71 @@ async def process_document(message: Message, state: FSMContext, session: AsyncSe
     # Сохраняем ID фото
     await state.update_data(document_photo=photo_id)
 
-    # Завершаем регистрацию
-    await finalize_registration(message, state, session)
+    # Завершаем регистрацию; документ скачивается в фоне, только если она прошла
+    if await finalize_registration(message, state, session, message.from_user.id):
+        document_pipeline.enqueue(photo_id)
 
 
-async def finalize_registration(message: Message, state: FSMContext, session: AsyncSession):
-    """Финализация регистрации пользователя"""
-    from src.services.notification_service import NotificationService
-    from src.services.channel_service import ChannelManager
-    from src.config import settings
-    from aiogram import Bot
+async def finalize_registration(
+        message: Message,
+        state: FSMContext,
+        session: AsyncSession,
+        telegram_id: int
+) -> bool:
+    """Финализация регистрации пользователя; False — регистрация не удалась.
 
+    telegram_id передается явно: при вызове из callback-обработчика
+    message принадлежит боту, а не пользователю.
+    """
     data = await state.get_data()
 
     try:
         # Создаем пользователя
         user_service = UserService(session)
         user = await user_service.create_user(
-            telegram_id=message.from_user.id,
+            telegram_id=telegram_id,
             full_name=data["full_name"],
             reason=data["reason"],
             document_photo=data.get("document_photo")
         )
 
-        # Добавляем в очередь
-        queue_service = QueueService(session)
-        await queue_service.add_to_queue(user.id, user.priority)
+        # Добавляем в очередь, выбранную ссылкой /start <ключ>
+        queue_id = data.get("queue_id", DEFAULT_QUEUE_ID)
+        queue_service = QueueService(session, queue_id)
+        queue_entry = await queue_service.add_to_queue(user.id, user.priority)
+        waitlisted = queue_entry.status == QueueStatus.WAITLISTED.value
 
-        # Получаем позицию в очереди
-        position = await queue_service.get_user_position(user.id)
+        # Получаем позицию в очереди (или в листе ожидания, если очередь заполнена)
+        if waitlisted:
+            position = await queue_service.get_waitlist_position(user.id)
+        else:
+            position = await queue_service.get_user_position(user.id)
 
         # Добавляем в канал
-        bot = Bot(token=settings.BOT_TOKEN)
-        channel_manager = ChannelManager(bot, settings.CHANNEL_ID)
+        bot = message.bot
+        channel_id, channel_username = queue_registry.channel_for(queue_id)
+        channel_manager = ChannelManager(bot, channel_id)
 
-        invite_success = await channel_manager.add_user(message.from_user.id)
+        invite_success = await channel_manager.add_user(telegram_id)
 
         if not invite_success:
-            logger.warning(f"Failed to create invite link for user {message.from_user.id}")
+            logger.warning(f"Failed to create invite link for user {telegram_id}")
 
         # Получаем информацию о канале
         channel_info = await channel_manager.get_channel_info()
-        channel_name = channel_info[
-            'title'] if channel_info else settings.CHANNEL_USERNAME or f"ID: {settings.CHANNEL_ID}"
+        channel_name = channel_info['title'] if channel_info else channel_username or f"ID: {channel_id}"
 
         # Отправляем уведомление
         notification_service = NotificationService(bot)
-        await notification_service.send_registration_complete(
-            message.from_user.id,
-            channel_name,
-            position
-        )
+        if waitlisted:
+            await notification_service.send_waitlisted(telegram_id, position)
+        else:
+            await notification_service.send_registration_complete(
+                telegram_id,
+                channel_name,
+                position,
+                await slot_estimator.describe(session, queue_id, position)
+            )
 
         # Очищаем состояние
         await state.clear()
@@ -210,6 +269,7 @@ async def finalize_registration(message: Message, state: FSMContext, session: As
             "✅ Регистрация завершена!",
             reply_markup=get_start_keyboard()
         )
+        return True
 
     except Exception as e:
         logger.error(f"Error during registration: {e}")
@@ -217,4 +277,5 @@ async def finalize_registration(message: Message, state: FSMContext, session: As
             MESSAGES["error"],
             reply_markup=get_start_keyboard()
         )
-        await state.clear()
+        await reset_registration(state)
+        return False
@@ -1,12 +1,19 @@
 """
 Клавиатуры для основного бота
 """
+from functools import lru_cache
+from typing import Tuple
+
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import ReplyKeyboardBuilder, InlineKeyboardBuilder
-from src.config import REASONS
+from src.bot.callbacks import CaptchaAnswer, ReasonChoice, SkipDocument
+from src.database.models import DEFAULT_QUEUE_ID
+from src.services.priority_registry import priority_registry, ReasonInfo
 import random
 
 
+# Неизменяемые клавиатуры строятся один раз на процесс
+@lru_cache(maxsize=None)
 def get_start_keyboard() -> ReplyKeyboardMarkup:
     """Клавиатура для начала регистрации"""
     builder = ReplyKeyboardBuilder()
@@ -31,34 +38,42 @@ def get_captcha_keyboard(correct_answer: int) -> InlineKeyboardMarkup:
     for answer in answers:
         builder.button(
             text=str(answer),
-            callback_data=f"captcha_{answer}_{correct_answer}"
+            callback_data=CaptchaAnswer(answer=answer).pack()
         )
 
     builder.adjust(2, 2)  # 2 кнопки в ряд
     return builder.as_markup()
 
 
-def get_reason_keyboard() -> InlineKeyboardMarkup:
-    """Клавиатура для выбора причины вступления"""
+def get_reason_keyboard(queue_id: int = DEFAULT_QUEUE_ID) -> InlineKeyboardMarkup:
+    """Клавиатура для выбора причины вступления (категории, доступные в очереди)"""
+    return _build_reason_keyboard(tuple(priority_registry.all(queue_id)))
+
+
+@lru_cache(maxsize=64)
+def _build_reason_keyboard(reasons: Tuple[ReasonInfo, ...]) -> InlineKeyboardMarkup:
+    """Клавиатура для набора категорий (пересобирается после перезагрузки реестра)"""
     builder = InlineKeyboardBuilder()
 
-    for reason_key, reason_data in REASONS.items():
+    for reason in reasons:
         builder.button(
-            text=reason_data["name"],
-            callback_data=f"reason_{reason_key}"
+            text=reason.name,
+            callback_data=ReasonChoice(key=reason.key).pack()
         )
 
     builder.adjust(1)  # По одной кнопке в ряд
     return builder.as_markup()
 
 
+@lru_cache(maxsize=None)
 def get_skip_document_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для пропуска загрузки документа (если не требуется)"""
     builder = InlineKeyboardBuilder()
-    builder.button(text="Пропустить", callback_data="skip_document")
+    builder.button(text="Пропустить", callback_data=SkipDocument().pack())
     return builder.as_markup()
 
 
+@lru_cache(maxsize=None)
 def get_cancel_keyboard() -> ReplyKeyboardMarkup:
     """Клавиатура отмены"""
     builder = ReplyKeyboardBuilder()
@@ -3,12 +3,30 @@
 """
 import asyncio
 import logging
+import signal
+from contextlib import suppress
+from typing import Tuple
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 
 from src.config import settings
-from src.database.database import create_tables
+from src.database.database import async_session_maker
 from src.bot.handlers import user_handlers
+from src.bot.sharding import ShardPool, poll_into_pool
+from src.core.bot_factory import create_bot
+from src.core.lifecycle import Lifecycle
+from src.core.health import HealthServer
+from src.core.loop_monitor import loop_monitor
+from src.core.send_queue import get_send_queue
+from src.core.update_journal import UpdateJournal, keyboard_texts
+from src.services.priority_registry import priority_registry
+from src.services.queue_index import enable_queue_index
+from src.services.queue_service import QueueService
+from src.services.queue_registry import queue_registry
+from src.services.document_service import create_document_pipeline
+from src.bot.keyboards.user_keyboards import (
+    get_start_keyboard, get_reason_keyboard, get_skip_document_keyboard, get_cancel_keyboard
+)
 
 # Настройка логирования
 logging.basicConfig(
@@ -18,35 +36,152 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def main():
-    """Главная функция запуска бота"""
+async def db_session_middleware(handler, event, data):
+    """Middleware для работы с БД"""
+    async with async_session_maker() as session:
+        data["session"] = session
+        return await handler(event, data)
+
+
+async def start_loop_monitor(lifecycle: Lifecycle):
+    """Запуск монитора цикла событий в процессе (один раз)"""
+    if loop_monitor.running:
+        return
+    await loop_monitor.start(settings.LOOP_MONITOR_INTERVAL, settings.LOOP_SLOW_CALLBACK_MS / 1000)
+    lifecycle.on_shutdown(loop_monitor.stop)
+
+
+async def on_startup(bot: Bot, dispatcher: Dispatcher):
+    """Загрузка реестра категорий и запуск фоновых сервисов (в каждом процессе, включая рабочие)"""
+    lifecycle: Lifecycle = dispatcher["lifecycle"]
+
+    # В рабочих процессах монитор запускается здесь, в основном — уже запущен в main()
+    await start_loop_monitor(lifecycle)
 
-    # Создаем таблицы в БД
-    logger.info("Creating database tables...")
-    await create_tables()
-    logger.info("Database tables created successfully")
+    await queue_registry.start(async_session_maker, reload_interval=settings.QUEUE_RELOAD_INTERVAL)
+    lifecycle.on_shutdown(queue_registry.stop)
+    await priority_registry.start(async_session_maker, reload_interval=settings.PRIORITY_RELOAD_INTERVAL)
+    lifecycle.on_shutdown(priority_registry.stop)
 
-    # Инициализация бота и диспетчера
-    bot = Bot(token=settings.BOT_TOKEN)
+    if settings.QUEUE_INDEX_ENABLED:
+        enable_queue_index()
+        async with async_session_maker() as session:
+            for queue in queue_registry.all():
+                await QueueService(session, queue.id).load_index()
+
+    # Очередь отправки уведомлений; в шардированном режиме лимит делится между рабочими процессами
+    send_queue = get_send_queue(bot, rate=settings.SEND_RATE_LIMIT / max(settings.USER_BOT_WORKERS, 1))
+    lifecycle.on_shutdown(send_queue.stop)
+
+    # Предзагрузка документов для проверки администраторами
+    document_pipeline = create_document_pipeline(bot, async_session_maker)
+    await document_pipeline.start()
+    lifecycle.on_shutdown(document_pipeline.stop)
+    dispatcher["document_pipeline"] = document_pipeline
+    if "health_server" in dispatcher.workflow_data:
+        dispatcher["health_server"].track_backlog("documents", lambda: document_pipeline.backlog)
+        dispatcher["health_server"].track_backlog("send", lambda: send_queue.backlog)
+
+    lifecycle.warm_up()
+
+
+def create_dispatcher() -> Dispatcher:
+    """Создание диспетчера с middleware и роутерами"""
     storage = MemoryStorage()
     dp = Dispatcher(storage=storage)
 
-    # Добавляем middleware для работы с БД
-    from src.database.database import async_session_maker
+    # Остановка: дообработка обновлений, затем сервисы, запущенные в on_startup
+    lifecycle = Lifecycle("user_bot", shutdown_timeout=settings.SHUTDOWN_TIMEOUT)
+    lifecycle.warm(get_start_keyboard)
+    lifecycle.warm(get_reason_keyboard)
+    lifecycle.warm(get_skip_document_keyboard)
+    lifecycle.warm(get_cancel_keyboard)
+    lifecycle.attach(dp)
+    dp.startup.register(on_startup)
 
-    @dp.update.middleware()
-    async def db_session_middleware(handler, event, data):
-        async with async_session_maker() as session:
-            data["session"] = session
-            return await handler(event, data)
+    # Журнал входящих обновлений для воспроизведения (tools/replay_journal.py)
+    if settings.JOURNAL_DIR:
+        journal = UpdateJournal(
+            settings.JOURNAL_DIR,
+            "user_bot",
+            max_bytes=settings.JOURNAL_MAX_BYTES,
+            max_files=settings.JOURNAL_MAX_FILES,
+            keep_texts=keyboard_texts(get_start_keyboard(), get_cancel_keyboard())
+        )
+        journal.attach(dp)
+        lifecycle.on_shutdown(journal.close)
+
+    # Добавляем middleware для работы с БД
+    dp.update.middleware(db_session_middleware)
 
     # Регистрация роутеров
     dp.include_router(user_handlers.router)
+    return dp
+
+
+def create_worker() -> Tuple[Bot, Dispatcher]:
+    """Фабрика бота и диспетчера для рабочего процесса шардированного режима"""
+    return create_bot(settings.BOT_TOKEN), create_dispatcher()
+
+
+async def main():
+    """Главная функция запуска бота"""
+
+    dp = create_dispatcher()
+
+    lifecycle: Lifecycle = dp["lifecycle"]
+
+    # Проверка схемы и прогрев пула до приема обновлений
+    await lifecycle.prepare(settings.DB_WARMUP_CONNECTIONS)
+
+    await start_loop_monitor(lifecycle)
+
+    # /healthz, /readyz, /metrics (в шардированном режиме — только процесс-приемник)
+    if settings.HEALTH_PORT:
+        health_server = HealthServer(
+            lifecycle, settings.HEALTH_HOST, settings.HEALTH_PORT, max_loop_lag=settings.HEALTH_MAX_LOOP_LAG
+        )
+        health_server.track_queue_depth(async_session_maker)
+        await health_server.start()
+        lifecycle.on_shutdown(health_server.stop)
+        dp["health_server"] = health_server
+
+    # Инициализация бота
+    bot = create_bot(settings.BOT_TOKEN)
 
     logger.info("Bot starting...")
     logger.info(f"Channel ID: {settings.CHANNEL_ID}")
 
-    # Запуск бота
+    if settings.USER_BOT_WORKERS > 1:
+        # Один процесс получает обновления, обработка — в рабочих процессах
+        logger.info(f"Sharded mode: {settings.USER_BOT_WORKERS} worker processes")
+        pool = ShardPool(settings.USER_BOT_WORKERS, "src.bot.main:create_worker")
+        pool.start()
+        lifecycle.ready = True
+
+        # Как start_polling: SIGTERM/SIGINT останавливают прием, и finally дообрабатывает очереди шардов
+        loop = asyncio.get_running_loop()
+        poll_task = asyncio.create_task(poll_into_pool(bot, pool))
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            with suppress(NotImplementedError):
+                loop.add_signal_handler(signum, poll_task.cancel)
+        try:
+            await asyncio.wait([poll_task])
+            if not poll_task.cancelled():
+                poll_task.result()
+            logger.info("Polling stopped by signal")
+        finally:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                with suppress(NotImplementedError):
+                    loop.remove_signal_handler(signum)
+            poll_task.cancel()
+            # Рабочие процессы дообрабатывают свои очереди и останавливаются сами
+            await asyncio.to_thread(pool.stop, settings.SHUTDOWN_TIMEOUT)
+            await bot.session.close()
+            await lifecycle.shutdown()
+        return
+
+    # Запуск бота (aiogram перехватывает SIGTERM/SIGINT и вызывает остановку)
     try:
         await dp.start_polling(bot)
     finally:
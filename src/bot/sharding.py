@@ -0,0 +1,233 @@
+"""
+Многопроцессный режим пользовательского бота
+
+Один процесс получает обновления (long polling) и распределяет их по
+рабочим процессам по хешу ``from_user.id``. Все обновления одного
+пользователя попадают в один и тот же процесс и обрабатываются строго
+по очереди, поэтому FSM (MemoryStorage) остается корректным.
+"""
+import asyncio
+import importlib
+import logging
+import multiprocessing as mp
+import queue
+import signal
+from typing import Any, Dict, List, Optional, Tuple, Callable
+
+from aiogram import Bot, Dispatcher
+
+logger = logging.getLogger(__name__)
+
+# Поля обновления, содержащие событие с отправителем
+_EVENT_FIELDS = (
+    "message",
+    "edited_message",
+    "callback_query",
+    "inline_query",
+    "chosen_inline_result",
+    "shipping_query",
+    "pre_checkout_query",
+    "poll_answer",
+    "my_chat_member",
+    "chat_member",
+    "chat_join_request",
+)
+
+# Сигнал остановки рабочего процесса
+_STOP = None
+
+
+def get_shard_key(update: Dict[str, Any]) -> int:
+    """Ключ шардирования: ID отправителя, иначе ID чата"""
+    for field in _EVENT_FIELDS:
+        event = update.get(field)
+        if not event:
+            continue
+        user = event.get("from") or event.get("user")
+        if user:
+            return user["id"]
+        chat = event.get("chat")
+        if chat:
+            return chat["id"]
+    return 0
+
+
+def get_shard(update: Dict[str, Any], workers: int) -> int:
+    """Номер рабочего процесса для обновления"""
+    return get_shard_key(update) % workers
+
+
+def _load_factory(path: str) -> Callable[[], Tuple[Bot, Dispatcher]]:
+    """Загрузка фабрики ``module:function``, возвращающей (bot, dispatcher)"""
+    module_name, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class ShardWorker:
+    """Обработчик обновлений внутри рабочего процесса.
+
+    Обновления разных пользователей обрабатываются конкурентно,
+    обновления одного пользователя — последовательно.
+    """
+
+    def __init__(self, bot: Bot, dp: Dispatcher, max_in_flight: int = 256):
+        self.bot = bot
+        self.dp = dp
+        self.processed = 0
+        self._tails: Dict[int, asyncio.Task] = {}
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    async def submit(self, update: Dict[str, Any]):
+        """Постановка обновления в цепочку его пользователя"""
+        await self._slots.acquire()
+
+        key = get_shard_key(update)
+        task = asyncio.create_task(self._process(self._tails.get(key), update))
+        self._tails[key] = task
+        task.add_done_callback(lambda t: self._release(key, t))
+
+    def _release(self, key: int, task: asyncio.Task):
+        """Освобождение слота и очистка завершенной цепочки"""
+        self._slots.release()
+        if self._tails.get(key) is task:
+            del self._tails[key]
+
+    async def _process(self, previous: Optional[asyncio.Task], update: Dict[str, Any]):
+        """Обработка обновления после завершения предыдущего от того же пользователя"""
+        if previous is not None:
+            await asyncio.wait([previous])
+
+        try:
+            await self.dp.feed_raw_update(self.bot, update)
+        except Exception as e:
+            logger.error(f"Error while processing update {update.get('update_id')}: {e}")
+        finally:
+            self.processed += 1
+
+    async def drain(self):
+        """Ожидание завершения всех обновлений в работе"""
+        while self._tails:
+            await asyncio.gather(*list(self._tails.values()), return_exceptions=True)
+
+
+async def _run_worker(index: int, updates: mp.Queue, results: mp.Queue, factory_path: str):
+    """Главный цикл рабочего процесса"""
+    bot, dp = _load_factory(factory_path)()
+    worker = ShardWorker(bot, dp)
+    loop = asyncio.get_running_loop()
+
+    # Аргументы как у start_polling: обработчики запуска получают dispatcher
+    await dp.emit_startup(bot=bot, dispatcher=dp)
+    logger.info(f"Shard worker {index} started")
+
+    try:
+        while True:
+            update = await loop.run_in_executor(None, updates.get)
+            if update is _STOP:
+                break
+            await worker.submit(update)
+        await worker.drain()
+    finally:
+        await dp.emit_shutdown(bot=bot, dispatcher=dp)
+        await bot.session.close()
+        results.put((index, worker.processed))
+        logger.info(f"Shard worker {index} stopped, processed {worker.processed} updates")
+
+
+def _worker_entrypoint(index: int, updates: mp.Queue, results: mp.Queue, factory_path: str):
+    """Точка входа рабочего процесса"""
+    # Ctrl+C приходит всей группе процессов: остановкой управляет процесс-приемник (ShardPool.stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f'%(asctime)s - shard-{index} - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(_run_worker(index, updates, results, factory_path))
+
+
+class ShardPool:
+    """Пул рабочих процессов с маршрутизацией обновлений по пользователю"""
+
+    def __init__(self, workers: int, factory_path: str, queue_size: int = 10000):
+        self.workers = workers
+        self.factory_path = factory_path
+        self._ctx = mp.get_context("spawn")
+        self._updates: List[mp.Queue] = [self._ctx.Queue(queue_size) for _ in range(workers)]
+        self._results: mp.Queue = self._ctx.Queue()
+        self._processes: List[mp.Process] = []
+
+    def start(self):
+        """Запуск рабочих процессов"""
+        for index, updates in enumerate(self._updates):
+            process = self._ctx.Process(
+                target=_worker_entrypoint,
+                args=(index, updates, self._results, self.factory_path),
+                name=f"user-bot-shard-{index}",
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+
+    def dispatch(self, update: Dict[str, Any]):
+        """Передача обновления в процесс, отвечающий за пользователя (ждет места в очереди)"""
+        self._updates[get_shard(update, self.workers)].put(update)
+
+    def try_dispatch(self, update: Dict[str, Any]) -> bool:
+        """Передача без ожидания; False — очередь процесса заполнена"""
+        try:
+            self._updates[get_shard(update, self.workers)].put_nowait(update)
+        except queue.Full:
+            return False
+        return True
+
+    def stop(self, timeout: float = 30.0) -> Dict[int, int]:
+        """Остановка процессов с дообработкой очередей.
+
+        Возвращает количество обработанных обновлений по процессам.
+        """
+        for updates in self._updates:
+            updates.put(_STOP)
+
+        processed = {}
+        for _ in self._processes:
+            try:
+                index, count = self._results.get(timeout=timeout)
+                processed[index] = count
+            except Exception:
+                break
+
+        for process in self._processes:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                logger.warning(f"Shard process {process.name} did not stop in time, terminating")
+                process.terminate()
+
+        self._processes.clear()
+        return processed
+
+
+async def poll_into_pool(bot: Bot, pool: ShardPool, polling_timeout: int = 30):
+    """Long polling в одном процессе с раздачей обновлений по шардам"""
+    loop = asyncio.get_running_loop()
+    offset = None
+    backoff = 1.0
+
+    while True:
+        try:
+            updates = await bot.get_updates(offset=offset, timeout=polling_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to fetch updates: {e}")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+            continue
+
+        backoff = 1.0
+        for update in updates:
+            offset = update.update_id + 1
+            payload = update.model_dump(mode="json", by_alias=True, exclude_none=True)
+            # Очередь шарда заполнена: места ждет поток, а не цикл событий,
+            # и следующие обновления не запрашиваются, пока шард не разгрузится
+            if not pool.try_dispatch(payload):
+                await loop.run_in_executor(None, pool.dispatch, payload)
@@ -1,8 +1,9 @@
 """
 Конфигурация проекта
 """
+from functools import lru_cache, cached_property
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, FrozenSet
 
 
 class Settings(BaseSettings):
@@ -11,12 +12,18 @@ class Settings(BaseSettings):
     # Telegram
     BOT_TOKEN: str
     ADMIN_BOT_TOKEN: str
-    CHANNEL_ID: int
+    CHANNEL_ID: int  # Канал очереди по умолчанию и очередей без своего канала
     CHANNEL_USERNAME: str = ""
     ADMIN_IDS: str  # Comma-separated list
+    TELEGRAM_API_URL: str = ""  # Пусто — официальный api.telegram.org
 
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_STATEMENT_CACHE_SIZE: int = 500  # Кэш подготовленных запросов asyncpg на соединение
+
+    DB_WARMUP_CONNECTIONS: int = 2  # Соединения, открываемые до начала polling
 
     # Redis (optional)
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -25,20 +32,89 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
 
     # Settings
-    MAX_QUEUE_SIZE: int = 1000
+    MAX_QUEUE_SIZE: int = 1000  # Для очередей без своей вместимости (queues.max_size)
+    QUEUE_INDEX_ENABLED: bool = False  # Ранги и списки очереди из индекса в памяти
     CAPTCHA_TIMEOUT: int = 300
+    PRIORITY_RELOAD_INTERVAL: float = 30.0  # Проверка изменений категорий в БД, с
+    QUEUE_RELOAD_INTERVAL: float = 30.0  # Проверка изменений таблицы queues (очереди и каналы), с
+    AGING_JOB_INTERVAL: float = 300.0  # Пакетное старение приоритетов (выполняет админ-бот), с
+    USER_BOT_WORKERS: int = 1  # >1 включает многопроцессный режим пользовательского бота
+    SHUTDOWN_TIMEOUT: float = 25.0  # Дообработка обновлений и фоновых задач при остановке, с
+
+    # Outgoing messages (очередь отправки на бота, src/core/send_queue.py)
+    # Отправок в секунду с токена пользовательского бота на процесс; лимит Telegram — 30 на токен
+    # суммарно (процесс пользовательского бота или его рабочие процессы поровну + админ-бот)
+    SEND_RATE_LIMIT: float = 14.0
+    SEND_WORKERS: int = 8  # Одновременные запросы отправки
+    SEND_MAX_RETRIES: int = 3  # Повторы после TelegramRetryAfter
+
+    # Update journal (src/core/update_journal.py, воспроизведение — tools/replay_journal.py)
+    JOURNAL_DIR: str = ""  # Каталог журнала входящих обновлений; пусто — выключено
+    JOURNAL_MAX_BYTES: int = 64 * 1024 ** 2  # Размер файла, после которого начинается новый
+    JOURNAL_MAX_FILES: int = 20  # Хранимые файлы на бота
+
+    # Health / metrics endpoint
+    HEALTH_HOST: str = "0.0.0.0"
+    HEALTH_PORT: int = 8080  # 0 — выключено
+    HEALTH_MAX_LOOP_LAG: float = 1.0  # Задержка цикла событий, после которой /healthz отвечает 503, с
+
+    # Event loop monitor
+    LOOP_MONITOR_INTERVAL: float = 0.5  # Период замера задержки цикла, с
+    LOOP_SLOW_CALLBACK_MS: int = 100  # Порог медленного колбэка; 0 — замер колбэков выключен
+
+    # Documents
+    DOCUMENTS_DIR: str = "data/documents"
+    DOCUMENTS_MAX_BYTES: int = 2 * 1024 ** 3  # Лимит локального кэша документов
+    DOCUMENT_DOWNLOAD_CONCURRENCY: int = 4
+    THUMBNAIL_SIZE: int = 1024
+    THUMBNAIL_WORKERS: int = 2
+
+    # Reports (время в UTC)
+    DIGEST_TIMES: str = "09:00"  # Comma-separated HH:MM
+    DIGEST_HOURLY: bool = False
+    REPORT_TICK_INTERVAL: float = 60.0
+
+    # Appointment slots: ориентировочное время по темпу обслуживания и напоминания
+    SLOT_DEFAULT_SERVICE_MINUTES: float = 10.0  # Пока обслуживаний мало для оценки
+    SLOT_RATE_WINDOW_HOURS: float = 8.0  # Период, по которому оценивается темп обслуживания
+    SLOT_IDLE_GAP_MINUTES: float = 60.0  # Более длинные паузы (перерыв, ночь) не учитываются в темпе
+    SLOT_RATE_REFRESH_INTERVAL: float = 300.0  # Пересчет темпа, с
+    SLOT_ROUND_MINUTES: int = 15  # Границы окна округляются до этого шага
+    SLOT_REMINDER_MINUTES: int = 30  # Напоминание за N минут до начала окна (выполняет админ-бот); 0 — выключено
+    SLOT_TICK_INTERVAL: float = 10.0  # Шаг колеса таймеров и проверки версий очередей, с
+    SLOT_TIMEZONE: str = "UTC"  # Часовой пояс времени в сообщениях пользователям
+
+    # Archive of served/removed queue entries
+    ARCHIVE_AFTER_DAYS: int = 7  # Завершенные записи старше этого срока переносятся в queue_archive; 0 — выключено
+    ARCHIVE_RETENTION_DAYS: int = 0  # Срок хранения в queue_archive; 0 — бессрочно
+    ARCHIVE_BATCH_SIZE: int = 1000
+    ARCHIVE_INTERVAL: float = 3600.0  # Период переноса, с
+
+    # Admin roles
+    ADMIN_ROLES_RELOAD_INTERVAL: float = 30.0  # Проверка изменений ролей в БД, с
+
+    # Audit log
+    AUDIT_BATCH_SIZE: int = 100
+    AUDIT_FLUSH_INTERVAL: float = 5.0
 
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
 
+    @cached_property
+    def admin_ids(self) -> FrozenSet[int]:
+        """ID администраторов из ADMIN_IDS (разбирается один раз)"""
+        return frozenset(int(id.strip()) for id in self.ADMIN_IDS.split(",") if id.strip())
+
     @property
     def admin_ids_list(self) -> List[int]:
         """Преобразование строки ADMIN_IDS в список int"""
-        return [int(id.strip()) for id in self.ADMIN_IDS.split(",")]
+        return sorted(self.admin_ids)
 
 
-# Категории причин вступления
+# Категории причин вступления по умолчанию: заполняют таблицу reasons при
+# первом запуске, дальше источником истины служит БД (см. priority_registry).
+# Необязательные ключи: aging_interval_minutes, min_priority.
 REASONS = {
     "category_a": {
         "name": "Получение услуги категории А",
@@ -118,6 +194,38 @@ MESSAGES = {
 ℹ️ Вы уже зарегистрированы!
 
 Ваша позиция в очереди: {position}
+""",
+
+    "waitlisted": """
+⏳ Очередь сейчас заполнена
+
+Вы добавлены в лист ожидания, позиция: {position}
+
+Мы уведомим вас, когда освободится место в очереди.
+""",
+
+    "already_waitlisted": """
+ℹ️ Вы уже зарегистрированы!
+
+Очередь заполнена, ваша позиция в листе ожидания: {position}
+""",
+
+    "promoted_from_waitlist": """
+✅ Освободилось место в очереди!
+
+Вы переведены из листа ожидания.
+Ваша позиция в очереди: {position}
+""",
+
+    "slot_estimate": """
+🕒 Ориентировочное время: {window}
+""",
+
+    "slot_reminder": """
+⏰ Скоро ваша очередь
+
+Ваша позиция в очереди: {position}
+Ориентировочное время: {window}
 """,
 
     "error": """
@@ -139,5 +247,15 @@ MESSAGES = {
 """,
 }
 
-# Настройки создаются при импорте
-settings = Settings()
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Настройки процесса (окружение и .env читаются один раз)"""
+    return Settings()
+
+
+def __getattr__(name: str):
+    # `from src.config import settings` создает настройки при первом обращении,
+    # а не при импорте модуля: MESSAGES и REASONS доступны без окружения
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
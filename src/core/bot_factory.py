@@ -0,0 +1,17 @@
+"""
+Создание экземпляров Bot с учетом настроек Bot API
+"""
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from src.config import get_settings
+
+
+def create_bot(token: str) -> Bot:
+    """Создание бота; при заданном TELEGRAM_API_URL запросы идут на этот сервер"""
+    settings = get_settings()
+    if settings.TELEGRAM_API_URL:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(settings.TELEGRAM_API_URL))
+        return Bot(token=token, session=session)
+    return Bot(token=token)
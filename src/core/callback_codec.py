@@ -0,0 +1,76 @@
+"""
+Компактные данные inline-кнопок и их разбор за один поиск по префиксу
+
+Данные кнопки — "<префикс>:<поле>:<поле>" (aiogram CallbackData) с
+префиксом в 1-2 символа вместо строк вида "increase_priority_123".
+Реестр разбирает callback.data один раз на обновление: префикс до
+первого ":" ищется в словаре, затем значение распаковывается своим
+классом. Обработчики получают готовый объект (параметр callback_data) и
+сравнивают только его тип — без цепочки startswith/split в каждом
+фильтре.
+"""
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Type, TypeVar
+
+from aiogram.filters import Filter
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import CallbackQuery
+from magic_filter import MagicFilter
+
+logger = logging.getLogger(__name__)
+
+CallbackT = TypeVar("CallbackT", bound=Type[CallbackData])
+
+
+class CallbackCodec:
+    """Реестр классов данных кнопок одного бота по префиксу"""
+
+    def __init__(self):
+        self._types: Dict[str, Type[CallbackData]] = {}
+
+    def register(self, cls: CallbackT) -> CallbackT:
+        """Декоратор класса CallbackData: префиксы внутри бота уникальны"""
+        prefix = cls.__prefix__
+        if prefix in self._types:
+            raise ValueError(f"Callback prefix {prefix!r} already used by {self._types[prefix].__name__}")
+        self._types[prefix] = cls
+        return cls
+
+    def decode(self, data: Optional[str]) -> Optional[CallbackData]:
+        """Объект данных кнопки (None — неизвестный префикс или устаревшая кнопка)"""
+        if not data:
+            return None
+
+        prefix, _, _ = data.partition(":")
+        cls = self._types.get(prefix)
+        if cls is None:
+            return None
+
+        try:
+            return cls.unpack(data)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Malformed callback data {data!r}: {e}")
+            return None
+
+    async def middleware(
+            self,
+            handler: Callable[[CallbackQuery, Dict[str, Any]], Awaitable[Any]],
+            event: CallbackQuery,
+            data: Dict[str, Any]
+    ) -> Any:
+        """Middleware (внешний, на callback_query): разбор данных до фильтров"""
+        data["callback_data"] = self.decode(event.data)
+        return await handler(event, data)
+
+
+class IsCallback(Filter):
+    """Фильтр по типу разобранных данных кнопки и, при необходимости, по их полям"""
+
+    def __init__(self, cls: Type[CallbackData], rule: Optional[MagicFilter] = None):
+        self.cls = cls
+        self.rule = rule
+
+    async def __call__(self, callback: CallbackQuery, callback_data: Optional[CallbackData] = None) -> bool:
+        if type(callback_data) is not self.cls:
+            return False
+        return self.rule is None or bool(self.rule.resolve(callback_data))
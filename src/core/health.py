@@ -0,0 +1,135 @@
+"""
+HTTP-эндпоинты состояния процесса бота: /healthz, /readyz, /metrics
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+from aiohttp import web
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.core.lifecycle import Lifecycle
+from src.core.loop_monitor import loop_monitor
+from src.core.metrics import metrics
+from src.database.database import engine
+from src.services.queue_registry import queue_registry
+from src.services.queue_service import get_queue_depths
+
+logger = logging.getLogger(__name__)
+
+LAST_UPDATE_AGE = metrics.gauge("bot_last_update_age_seconds", "Время с последнего обработанного обновления")
+IN_FLIGHT = metrics.gauge("bot_updates_in_flight", "Обновления в обработке")
+QUEUE_DEPTH = metrics.gauge("bot_queue_depth", "Записи в активной очереди (по очередям)")
+BACKLOG = metrics.gauge("bot_backlog", "Невыполненная фоновая работа (kind=audit|documents|...)")
+
+
+class HealthServer:
+    """Небольшой aiohttp-сервер внутри процесса бота.
+
+    /healthz — процесс жив: цикл событий не завис (задержка по
+    loop_monitor ниже max_loop_lag) и БД отвечает через пул; 503 иначе.
+    Время последнего обновления выводится для информации — бот без
+    трафика здоров.
+    /readyz — прогрев завершен и остановка не началась.
+    /metrics — метрики процесса в формате Prometheus.
+    """
+
+    def __init__(
+            self,
+            lifecycle: Lifecycle,
+            host: str,
+            port: int,
+            max_loop_lag: float = 1.0,
+            db_timeout: float = 2.0
+    ):
+        self.lifecycle = lifecycle
+        self.host = host
+        self.port = port
+        self.max_loop_lag = max_loop_lag
+        self.db_timeout = db_timeout
+        self._session_maker: Optional[async_sessionmaker] = None
+        self._backlogs: Dict[str, Callable[[], int]] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application()
+        self.app.router.add_get("/healthz", self.healthz)
+        self.app.router.add_get("/readyz", self.readyz)
+        self.app.router.add_get("/metrics", self.export_metrics)
+
+        metrics.collector(self._collect)
+
+    def track_queue_depth(self, session_maker: async_sessionmaker):
+        """Глубина очереди в /metrics (счетчик queue_state, чтение одной строки)"""
+        self._session_maker = session_maker
+
+    def track_backlog(self, kind: str, size: Callable[[], int]):
+        """Размер буфера или очереди фонового сервиса в /metrics"""
+        self._backlogs[kind] = size
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Health endpoint listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _ping_db(self) -> Optional[str]:
+        async def ping():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        try:
+            await asyncio.wait_for(ping(), timeout=self.db_timeout)
+            return None
+        except Exception as e:
+            return repr(e)
+
+    def _last_update_age(self) -> Optional[float]:
+        if self.lifecycle.last_update_at is None:
+            return None
+        return time.monotonic() - self.lifecycle.last_update_at
+
+    async def _collect(self):
+        IN_FLIGHT.set(self.lifecycle.in_flight)
+        age = self._last_update_age()
+        if age is not None:
+            LAST_UPDATE_AGE.set(age)
+
+        for kind, size in self._backlogs.items():
+            BACKLOG.set(size(), kind=kind)
+
+        if self._session_maker is not None:
+            async with self._session_maker() as session:
+                depths = await get_queue_depths(session)
+            for queue_id, depth in depths.items():
+                queue = queue_registry.get(queue_id)
+                QUEUE_DEPTH.set(depth, queue=queue.key if queue else str(queue_id))
+
+    async def healthz(self, request: web.Request) -> web.Response:
+        db_error = await self._ping_db()
+        healthy = db_error is None and loop_monitor.lag <= self.max_loop_lag
+        age = self._last_update_age()
+        return web.json_response(
+            {
+                "status": "ok" if healthy else "fail",
+                "loop_lag": round(loop_monitor.lag, 4),
+                "last_stall": loop_monitor.last_stall,
+                "db": db_error or "ok",
+                "last_update_age": None if age is None else round(age, 1),
+                "in_flight": self.lifecycle.in_flight,
+            },
+            status=200 if healthy else 503
+        )
+
+    async def readyz(self, request: web.Request) -> web.Response:
+        ready = self.lifecycle.ready
+        return web.json_response({"ready": ready}, status=200 if ready else 503)
+
+    async def export_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=await metrics.render(), content_type="text/plain", charset="utf-8")
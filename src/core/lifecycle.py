@@ -0,0 +1,137 @@
+"""
+Жизненный цикл процесса бота: подготовка перед polling и плавная остановка
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Coroutine, List, Optional, Set
+
+from aiogram import Dispatcher
+
+from src.core.metrics import UPDATES_TOTAL, handler_timing_middleware
+from src.database.database import engine, ensure_schema, warm_pool
+
+logger = logging.getLogger(__name__)
+
+Hook = Callable[[], Awaitable[Any]]
+
+
+class Lifecycle:
+    """Запуск и остановка процесса бота.
+
+    При запуске проверяет схему без лишних DDL, открывает соединения пула
+    и прогревает кэши (клавиатуры и т. п.) до приема обновлений. При
+    остановке (SIGTERM от docker, Ctrl+C) дожидается обработчиков в работе
+    и фоновых задач, затем останавливает сервисы в обратном порядке и
+    закрывает пул — все в пределах shutdown_timeout.
+    """
+
+    def __init__(self, name: str, shutdown_timeout: float = 25.0):
+        self.name = name
+        self.shutdown_timeout = shutdown_timeout
+        self._shutdown_hooks: List[Hook] = []
+        self._warmers: List[Callable[[], Any]] = []
+        self._in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._stopped = False
+        self.ready = False
+        self.last_update_at: Optional[float] = None
+
+    def attach(self, dp: Dispatcher):
+        """Подключение к диспетчеру: учет обработчиков и их времени, остановка, доступ из обработчиков"""
+        dp.update.outer_middleware(self.track)
+        dp.message.middleware(handler_timing_middleware)
+        dp.callback_query.middleware(handler_timing_middleware)
+        dp.shutdown.register(self.shutdown)
+        dp["lifecycle"] = self
+
+    def on_shutdown(self, hook: Hook) -> Hook:
+        """Регистрация остановки сервиса (выполняются в обратном порядке)"""
+        self._shutdown_hooks.append(hook)
+        return hook
+
+    def warm(self, warmer: Callable[[], Any]):
+        """Регистрация прогрева кэша"""
+        self._warmers.append(warmer)
+
+    def spawn(self, coro: Coroutine) -> asyncio.Task:
+        """Фоновая задача, которую остановка дождется"""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def track(self, handler, event, data):
+        """Middleware: учет обновлений в обработке"""
+        self._in_flight += 1
+        self._idle.clear()
+        try:
+            return await handler(event, data)
+        finally:
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._idle.set()
+            self.last_update_at = time.monotonic()
+            UPDATES_TOTAL.inc()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def prepare(self, warmup_connections: int):
+        """Проверка схемы и прогрев пула соединений (до запуска polling)"""
+        started = time.perf_counter()
+        created = await ensure_schema()
+        if created:
+            logger.info(f"Created database tables: {', '.join(created)}")
+        await warm_pool(warmup_connections)
+        logger.info(f"{self.name}: database ready in {time.perf_counter() - started:.2f}s")
+
+    def warm_up(self):
+        """Прогрев кэшей (после загрузки реестров); после него процесс готов к работе"""
+        for warmer in self._warmers:
+            try:
+                warmer()
+            except Exception as e:
+                logger.warning(f"Warm-up {warmer.__name__} failed: {e}")
+        self.ready = True
+
+    async def shutdown(self):
+        """Дообработка и остановка сервисов с общим дедлайном"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self.ready = False
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.shutdown_timeout
+        logger.info(f"{self.name}: shutting down, {self._in_flight} updates in flight, {len(self._tasks)} tasks")
+
+        if not await self._wait(self._idle.wait(), deadline):
+            logger.warning(f"{self.name}: {self._in_flight} updates still in flight at shutdown deadline")
+
+        if self._tasks and not await self._wait(asyncio.gather(*self._tasks, return_exceptions=True), deadline):
+            logger.warning(f"{self.name}: cancelling {len(self._tasks)} background tasks")
+            for task in self._tasks:
+                task.cancel()
+
+        for hook in reversed(self._shutdown_hooks):
+            try:
+                # Каждому сервису остается хотя бы секунда на сброс буферов
+                await asyncio.wait_for(hook(), timeout=max(deadline - loop.time(), 1.0))
+            except Exception as e:
+                logger.error(f"{self.name}: shutdown hook failed: {e!r}")
+
+        await engine.dispose()
+        logger.info(f"{self.name}: stopped")
+
+    @staticmethod
+    async def _wait(awaitable: Awaitable, deadline: float) -> bool:
+        timeout = max(deadline - asyncio.get_running_loop().time(), 0)
+        try:
+            await asyncio.wait_for(awaitable, timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
@@ -0,0 +1,149 @@
+"""
+Монитор цикла событий: задержка цикла и медленные колбэки
+
+Синхронная работа внутри обработчика (сохранение большого файла, обход
+тысяч строк в Python) останавливает цикл событий для всех пользователей
+бота. Монитор измеряет задержку цикла фоновой задачей и замеряет каждый
+колбэк цикла; колбэк дольше порога логируется и попадает в метрики с
+именем обработчика, в контексте которого он выполнялся (contextvar
+current_handler задает handler_timing_middleware).
+
+Замер колбэков — обертка над asyncio.Handle._run (две засечки
+perf_counter на колбэк). Это заметно дешевле отладочного режима asyncio
+(loop.set_debug), который логирует то же самое, но отслеживает еще и
+происхождение каждой корутины. Handle._run, _callback и _context —
+внутренности asyncio, поэтому обертка ставится только на проверенных
+версиях Python (_HANDLE_PATCH_VERSIONS) при наличии этих атрибутов;
+иначе замер колбэков выключается, а задержка цикла измеряется как обычно.
+"""
+import asyncio
+import logging
+import sys
+import time
+from asyncio import events
+from typing import Optional
+
+from src.core.metrics import metrics, current_handler
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = metrics.gauge("bot_event_loop_lag_seconds", "Задержка цикла событий")
+LOOP_LAG_MAX = metrics.gauge("bot_event_loop_lag_max_seconds", "Максимальная задержка цикла с запуска")
+SLOW_CALLBACKS = metrics.counter("bot_slow_callbacks_total", "Колбэки цикла дольше порога, по обработчику")
+SLOW_CALLBACK_SECONDS = metrics.histogram(
+    "bot_slow_callback_duration_seconds",
+    "Длительность медленных колбэков, по обработчику",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+# Версии Python, на которых проверены внутренности asyncio.Handle
+_HANDLE_PATCH_VERSIONS = ((3, 8), (3, 13))
+
+
+def _handle_patch_supported() -> bool:
+    """Можно ли обернуть Handle._run на этой версии Python"""
+    low, high = _HANDLE_PATCH_VERSIONS
+    if not low <= sys.version_info[:2] <= high:
+        return False
+    return callable(getattr(events.Handle, "_run", None)) and \
+        {"_callback", "_context"} <= set(getattr(events.Handle, "__slots__", ()))
+
+
+def _describe(handle: events.Handle) -> str:
+    """Краткое описание колбэка (задача и ее корутина, если есть)"""
+    callback = handle._callback
+    task = getattr(callback, "__self__", None)
+    if isinstance(task, asyncio.Task):
+        coro = task.get_coro()
+        return f"task {task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+    return getattr(callback, "__qualname__", repr(callback))
+
+
+class LoopMonitor:
+    """Измерение задержки цикла событий и поиск медленных колбэков"""
+
+    def __init__(self):
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.last_stall: Optional[str] = None
+        self.slow_callback = 0.0
+        self._original_run = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self, sample_interval: float = 0.5, slow_callback: float = 0.1):
+        """Запуск (повторный вызов в том же процессе ничего не делает).
+
+        slow_callback — порог медленного колбэка, с; 0 — замер колбэков выключен.
+        """
+        if self._task is not None:
+            return
+
+        if slow_callback > 0:
+            if _handle_patch_supported():
+                self.slow_callback = slow_callback
+                self._install()
+            else:
+                logger.warning(
+                    f"Slow callback detection is disabled: asyncio.Handle internals "
+                    f"are not verified on Python {sys.version_info[0]}.{sys.version_info[1]}"
+                )
+
+        self._task = asyncio.create_task(self._sample(sample_interval))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._uninstall()
+
+    async def _sample(self, interval: float):
+        """Задержка цикла: насколько позже запланированного просыпается sleep"""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval)
+            self.lag = max(loop.time() - started - interval, 0.0)
+            self.max_lag = max(self.max_lag, self.lag)
+            LOOP_LAG.set(self.lag)
+            LOOP_LAG_MAX.set(self.max_lag)
+
+    def _install(self):
+        if self._original_run is not None:
+            return
+
+        original_run = events.Handle._run
+        monitor = self
+
+        def _run(handle: events.Handle):
+            started = time.perf_counter()
+            try:
+                return original_run(handle)
+            finally:
+                duration = time.perf_counter() - started
+                if duration >= monitor.slow_callback:
+                    monitor._report(handle, duration)
+
+        self._original_run = original_run
+        events.Handle._run = _run
+
+    def _uninstall(self):
+        if self._original_run is not None:
+            events.Handle._run = self._original_run
+            self._original_run = None
+
+    def _report(self, handle: events.Handle, duration: float):
+        context = handle._context
+        handler = context.get(current_handler, "-") if context is not None else current_handler.get()
+        SLOW_CALLBACKS.inc(handler=handler)
+        SLOW_CALLBACK_SECONDS.observe(duration, handler=handler)
+        self.last_stall = handler
+        logger.warning(f"Event loop blocked for {duration * 1000:.0f} ms in handler {handler}: {_describe(handle)}")
+
+
+# Монитор процесса
+loop_monitor = LoopMonitor()
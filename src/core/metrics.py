@@ -0,0 +1,171 @@
+"""
+Метрики процесса в формате Prometheus
+
+Минимальный реестр без внешних зависимостей: счетчики, показатели и
+гистограммы с метками. Запись — операция над словарем в памяти, поэтому
+инструментирование горячих путей почти ничего не стоит; текст для
+/metrics формируется только при опросе.
+"""
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Границы гистограмм по умолчанию, с
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Монотонно растущий счетчик"""
+    type = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Текущее значение"""
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        self._values[_key(labels)] = value
+
+
+class Histogram:
+    """Распределение значений по корзинам"""
+    type = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        # метки -> [счетчики корзин..., +Inf], сумма
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = _key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(_key(labels), ()))
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {self._sums[key]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Awaitable[None]]] = []
+
+    def _get_or_create(self, cls, name: str, help_text: str, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, help_text, **kwargs)
+        return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def collector(self, collect: Callable[[], Awaitable[None]]):
+        """Функция, обновляющая показатели перед выдачей (например, глубина очереди из БД)"""
+        self._collectors.append(collect)
+        return collect
+
+    async def render(self) -> str:
+        """Текст в формате Prometheus"""
+        for collect in self._collectors:
+            try:
+                await collect()
+            except Exception as e:
+                logger.warning(f"Metrics collector {collect.__name__} failed: {e}")
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Реестр процесса
+metrics = MetricsRegistry()
+
+UPDATES_TOTAL = metrics.counter("bot_updates_total", "Обработанные обновления")
+HANDLER_SECONDS = metrics.histogram("bot_handler_duration_seconds", "Время обработчиков")
+HANDLER_ERRORS = metrics.counter("bot_handler_errors_total", "Исключения в обработчиках")
+CACHE_REQUESTS = metrics.counter("bot_cache_requests_total", "Обращения к кэшам (result=hit|miss)")
+
+# Обработчик, в контексте которого выполняется код (наследуется задачами, созданными в нем)
+current_handler: ContextVar[str] = ContextVar("current_handler", default="-")
+
+
+async def handler_timing_middleware(handler, event, data):
+    """Middleware (внутренний, на message/callback_query): время и ошибки по обработчику"""
+    handler_object = data.get("handler")
+    name = handler_object.callback.__name__ if handler_object is not None else "unknown"
+    token = current_handler.set(name)
+    started = time.perf_counter()
+    try:
+        return await handler(event, data)
+    except Exception:
+        HANDLER_ERRORS.inc(handler=name)
+        raise
+    finally:
+        HANDLER_SECONDS.observe(time.perf_counter() - started, handler=name)
+        current_handler.reset(token)
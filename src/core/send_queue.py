@@ -0,0 +1,262 @@
+"""
+Очередь отправки сообщений бота
+
+Все уведомления пользователям проходят через одну очередь на бота в
+процессе, а не вызывают bot.send_message из обработчиков напрямую:
+
+- полосы: транзакционные уведомления (регистрация, позиция, напоминания)
+  уходят раньше рассылок;
+- порядок в чате: у чата одна отправка в работе, остальные ждут за ней
+  (сообщения одному пользователю не обгоняют друг друга);
+- темп: отправки разнесены не чаще rate в секунду на процесс — лимит
+  Telegram (30 сообщений в секунду на токен) не превышается всплесками
+  от нескольких администраторов;
+- TelegramRetryAfter: отправка повторяется после указанной паузы, и на
+  это время приостанавливается вся очередь бота;
+- повторы: еще не отправленное сообщение с тем же dedup_key в том же
+  чате заменяется новым (например, две смены позиции подряд — одно
+  сообщение с последней позицией).
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+
+from src.config import get_settings
+from src.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SEND_QUEUE_DEPTH = metrics.gauge("bot_send_queue_depth", "Сообщения в очереди отправки (по ботам и полосам)")
+SEND_TOTAL = metrics.counter("bot_send_total", "Отправки через очередь (result=ok|error|deduplicated)")
+SEND_RETRY_AFTER = metrics.counter("bot_send_retry_after_total", "Ответы 429 (TelegramRetryAfter) от Bot API")
+
+
+class Lane(IntEnum):
+    """Полоса очереди отправки (меньше — раньше)"""
+    TRANSACTIONAL = 0
+    BROADCAST = 1
+
+
+SendCall = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class _Job:
+    chat_id: int
+    lane: Lane
+    call: SendCall
+    future: asyncio.Future
+    dedup_key: Optional[str] = None
+    attempts: int = 0
+
+
+class SendQueue:
+    """Очередь отправки одного бота с полосами, порядком в чате и темпом"""
+
+    def __init__(
+            self,
+            bot: Bot,
+            rate: float = 25.0,
+            workers: int = 8,
+            max_retries: int = 3,
+            drain_timeout: float = 10.0
+    ):
+        self.bot = bot
+        self.name = str(bot.id)
+        self.interval = 1.0 / rate
+        self.workers = workers
+        self.max_retries = max_retries
+        self.drain_timeout = drain_timeout
+
+        # Чат -> ожидающие отправки по порядку
+        self._chats: Dict[int, Deque[_Job]] = {}
+        # Чаты с отправкой в работе
+        self._busy: Set[int] = set()
+        # Полоса -> чаты, готовые к отправке (по полосе первой отправки чата)
+        self._ready: List[Deque[int]] = [deque() for _ in Lane]
+        self._depth: List[int] = [0 for _ in Lane]
+        self._has_work = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        # Момент, раньше которого не начинается следующая отправка
+        self._next_send = 0.0
+        self._tasks: List[asyncio.Task] = []
+        self._stopped = False
+
+    @property
+    def backlog(self) -> int:
+        """Отправки в очереди и в работе"""
+        return sum(self._depth) + len(self._busy)
+
+    def depth(self, lane: Lane) -> int:
+        """Ожидающие отправки полосы"""
+        return self._depth[lane]
+
+    async def submit(
+            self,
+            chat_id: int,
+            call: SendCall,
+            lane: Lane = Lane.TRANSACTIONAL,
+            dedup_key: Optional[str] = None
+    ) -> Any:
+        """Постановка отправки в очередь; возвращает результат call() или его исключение"""
+        if self._stopped:
+            raise RuntimeError(f"Send queue {self.name} is stopped")
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+        pending = self._chats.get(chat_id)
+        if dedup_key is not None and pending:
+            for job in pending:
+                if job.dedup_key == dedup_key:
+                    # Ожидающая отправка получает новое содержимое, оба вызова — ее результат
+                    job.call = call
+                    SEND_TOTAL.inc(bot=self.name, result="deduplicated")
+                    return await asyncio.shield(job.future)
+
+        job = _Job(chat_id, lane, call, asyncio.get_running_loop().create_future(), dedup_key)
+        if pending is None:
+            pending = self._chats[chat_id] = deque()
+        pending.append(job)
+        self._add_depth(lane, 1)
+        if len(pending) == 1 and chat_id not in self._busy:
+            self._make_ready(chat_id, lane)
+
+        # Отмена обработчика не отменяет уже поставленную отправку
+        return await asyncio.shield(job.future)
+
+    async def send_message(
+            self,
+            chat_id: int,
+            text: str,
+            lane: Lane = Lane.TRANSACTIONAL,
+            dedup_key: Optional[str] = None,
+            **kwargs
+    ):
+        """bot.send_message через очередь"""
+        return await self.submit(
+            chat_id, lambda: self.bot.send_message(chat_id, text, **kwargs), lane=lane, dedup_key=dedup_key
+        )
+
+    def _add_depth(self, lane: Lane, delta: int):
+        self._depth[lane] += delta
+        SEND_QUEUE_DEPTH.set(self._depth[lane], bot=self.name, lane=lane.name.lower())
+
+    def _make_ready(self, chat_id: int, lane: Lane):
+        self._ready[lane].append(chat_id)
+        self._idle.clear()
+        self._has_work.set()
+
+    def _take(self) -> Optional[_Job]:
+        """Первая отправка чата из самой срочной непустой полосы"""
+        for ready in self._ready:
+            if ready:
+                chat_id = ready.popleft()
+                job = self._chats[chat_id].popleft()
+                self._busy.add(chat_id)
+                self._add_depth(job.lane, -1)
+                return job
+        return None
+
+    def _release(self, job: _Job, retry: bool):
+        """Завершение отправки: следующая отправка чата становится готовой"""
+        chat_id = job.chat_id
+        self._busy.discard(chat_id)
+        pending = self._chats[chat_id]
+        if retry:
+            pending.appendleft(job)
+            self._add_depth(job.lane, 1)
+        if pending:
+            self._make_ready(chat_id, pending[0].lane)
+        else:
+            del self._chats[chat_id]
+            if not self._chats:
+                self._idle.set()
+
+    async def _pace(self):
+        """Ожидание своей очереди по темпу отправок процесса"""
+        now = time.monotonic()
+        start = max(now, self._next_send)
+        self._next_send = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def _worker(self):
+        while True:
+            job = self._take()
+            if job is None:
+                self._has_work.clear()
+                await self._has_work.wait()
+                continue
+
+            retry = False
+            try:
+                await self._pace()
+                result = await job.call()
+            except TelegramRetryAfter as e:
+                job.attempts += 1
+                SEND_RETRY_AFTER.inc(bot=self.name)
+                # Лимит общий для токена: пауза для всех отправок бота
+                self._next_send = max(self._next_send, time.monotonic() + e.retry_after)
+                logger.warning(f"Send queue {self.name}: retry after {e.retry_after} s (chat {job.chat_id})")
+                retry = job.attempts <= self.max_retries
+                if not retry:
+                    SEND_TOTAL.inc(bot=self.name, result="error")
+                    job.future.set_exception(e)
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            except Exception as e:
+                SEND_TOTAL.inc(bot=self.name, result="error")
+                job.future.set_exception(e)
+            else:
+                SEND_TOTAL.inc(bot=self.name, result="ok")
+                job.future.set_result(result)
+            finally:
+                self._release(job, retry)
+
+    async def stop(self):
+        """Дослать очередь (не дольше drain_timeout) и остановить отправку"""
+        self._stopped = True
+        if self._chats:
+            try:
+                await asyncio.wait_for(self._idle.wait(), self.drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Send queue {self.name}: {self.backlog} messages not sent on shutdown")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        for pending in self._chats.values():
+            for job in pending:
+                if not job.future.done():
+                    job.future.set_exception(RuntimeError(f"Send queue {self.name} is stopped"))
+        self._chats.clear()
+
+
+# Очереди процесса по id бота
+_send_queues: Dict[int, SendQueue] = {}
+
+
+def get_send_queue(bot: Bot, rate: Optional[float] = None) -> SendQueue:
+    """Очередь отправки бота (создается при первом обращении; rate учитывается только при создании)"""
+    send_queue = _send_queues.get(bot.id)
+    if send_queue is None:
+        settings = get_settings()
+        send_queue = _send_queues[bot.id] = SendQueue(
+            bot,
+            rate=rate or settings.SEND_RATE_LIMIT,
+            workers=settings.SEND_WORKERS,
+            max_retries=settings.SEND_MAX_RETRIES
+        )
+    return send_queue
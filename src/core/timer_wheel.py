@@ -0,0 +1,68 @@
+"""
+Колесо таймеров для множества отложенных событий
+
+Таймеры раскладываются по ячейкам кольца по номеру тика срабатывания
+(тик = deadline // tick). Постановка, перенос и отмена — O(1) по ключу,
+без кучи и без задачи asyncio на каждый таймер; продвижение колеса
+просматривает только ячейки прошедших тиков. Таймеры дальше одного оборота
+остаются в своей ячейке и пропускаются, пока не наступит их тик.
+Точность — один тик: таймер срабатывает в тике своего срока.
+"""
+import math
+from typing import Any, Dict, Hashable, List, Tuple
+
+
+class TimerWheel:
+    """Хешированное колесо таймеров (время — секунды, например time.time())"""
+
+    def __init__(self, tick: float, size: int = 512):
+        self.tick = tick
+        self.size = size
+        # Ячейка -> ключ -> (тик срабатывания, данные)
+        self._slots: List[Dict[Hashable, Tuple[int, Any]]] = [{} for _ in range(size)]
+        self._where: Dict[Hashable, int] = {}
+        # Первый еще не обработанный тик
+        self._current: int = 0
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def schedule(self, key: Hashable, deadline: float, payload: Any = None):
+        """Постановка или перенос таймера; прошедший срок срабатывает при следующем advance"""
+        self.cancel(key)
+        due = max(math.floor(deadline / self.tick), self._current)
+        slot = due % self.size
+        self._slots[slot][key] = (due, payload)
+        self._where[key] = slot
+
+    def cancel(self, key: Hashable) -> bool:
+        """Отмена таймера"""
+        slot = self._where.pop(key, None)
+        if slot is None:
+            return False
+        del self._slots[slot][key]
+        return True
+
+    def advance(self, now: float) -> List[Tuple[Hashable, Any]]:
+        """Сработавшие к моменту now таймеры (ключ, данные) в порядке тиков"""
+        target = math.floor(now / self.tick)
+        if not self._where:
+            self._current = max(self._current, target + 1)
+            return []
+
+        fired: List[Tuple[int, Hashable, Any]] = []
+        # За один вызов каждая ячейка просматривается не больше одного раза
+        for due_tick in range(self._current, min(target + 1, self._current + self.size)):
+            slot = self._slots[due_tick % self.size]
+            expired = [key for key, (due, _) in slot.items() if due <= target]
+            for key in expired:
+                due, payload = slot.pop(key)
+                del self._where[key]
+                fired.append((due, key, payload))
+
+        self._current = max(self._current, target + 1)
+        fired.sort(key=lambda item: item[0])
+        return [(key, payload) for _, key, payload in fired]
@@ -0,0 +1,182 @@
+"""
+Журнал входящих обновлений для разбора инцидентов и воспроизведения
+
+Необязательный outer-middleware (JOURNAL_DIR) дописывает каждое
+обновление в файл журнала до обработки: запись — 4 байта длины
+(big-endian) и компактный JSON {"t": время, "bot": имя, "update": {...}}.
+Файл заменяется новым при достижении JOURNAL_MAX_BYTES, хранятся
+последние JOURNAL_MAX_FILES файлов бота.
+
+Персональные данные не попадают в журнал: id пользователей и чатов
+заменяются псевдонимами (ключ случайный на процесс, поэтому в пределах
+журнала один пользователь — один псевдоним), имена и телефоны удаляются
+(обязательное first_name — «User»), file_id заменяются, а в текстах, кроме
+команд и надписей кнопок, буквы и цифры заменяются на «x» с сохранением
+длины (смещения entities остаются верными).
+
+Журнал воспроизводится инструментом tools/replay_journal.py.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import secrets
+import struct
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from aiogram import Dispatcher
+
+logger = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct(">I")
+
+# Объекты с id пользователя или чата
+_PERSON_KEYS = {"from", "chat", "user", "sender_chat", "forward_from", "forward_from_chat", "via_bot"}
+# Удаляются целиком (first_name обязателен в User — заменяется)
+_DROPPED_KEYS = {"last_name", "username", "phone_number", "contact", "location", "venue", "bio"}
+_TEXT_KEYS = {"text", "caption"}
+_FILE_KEYS = {"file_id", "file_unique_id"}
+
+_WORD_CHARS = re.compile(r"\w")
+
+
+class UpdateRedactor:
+    """Удаление персональных данных из обновления (dict в формате Bot API)"""
+
+    def __init__(self, keep_texts: Iterable[str] = ()):
+        self.keep_texts: Set[str] = set(keep_texts)
+        self._key = secrets.token_bytes(16)
+
+    def _digest(self, value: str, size: int) -> bytes:
+        return hashlib.blake2b(value.encode(), key=self._key, digest_size=size).digest()
+
+    def pseudonym(self, value: int) -> int:
+        """Псевдоним id с тем же знаком (у групп и каналов id отрицательные)"""
+        alias = int.from_bytes(self._digest(str(value), 5), "big") + 1
+        return -alias if value < 0 else alias
+
+    def text(self, value: str) -> str:
+        if value.startswith("/") or value in self.keep_texts:
+            return value
+        return _WORD_CHARS.sub("x", value)
+
+    def redact(self, value: Any, person: bool = False) -> Any:
+        if isinstance(value, list):
+            return [self.redact(item, person) for item in value]
+        if not isinstance(value, dict):
+            return value
+
+        redacted = {}
+        for key, item in value.items():
+            if key in _DROPPED_KEYS:
+                continue
+            if key == "first_name":
+                redacted[key] = "User"
+            elif person and key == "id" and isinstance(item, int):
+                redacted[key] = self.pseudonym(item)
+            elif key in _TEXT_KEYS and isinstance(item, str):
+                redacted[key] = self.text(item)
+            elif key in _FILE_KEYS and isinstance(item, str):
+                redacted[key] = f"redacted-{self._digest(item, 8).hex()}"
+            else:
+                redacted[key] = self.redact(item, key in _PERSON_KEYS)
+        return redacted
+
+
+class UpdateJournal:
+    """Журнал обновлений бота с заменой файлов по размеру"""
+
+    def __init__(
+            self,
+            directory: str,
+            name: str,
+            max_bytes: int = 64 * 1024 ** 2,
+            max_files: int = 20,
+            keep_texts: Iterable[str] = ()
+    ):
+        self.directory = Path(directory)
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.redactor = UpdateRedactor(keep_texts)
+        # Рабочие процессы шардированного режима пишут в свои файлы
+        self._prefix = f"{name}-{os.getpid()}-"
+        self._file = None
+        self._size = 0
+
+    def attach(self, dp: Dispatcher):
+        """Подключение к диспетчеру (outer-middleware: записываются и необработанные обновления)"""
+        dp.update.outer_middleware(self.middleware)
+
+    async def middleware(self, handler, event, data):
+        try:
+            self.write(event.model_dump(mode="json", by_alias=True, exclude_none=True))
+        except Exception as e:
+            logger.warning(f"Failed to journal update {event.update_id}: {e}")
+        return await handler(event, data)
+
+    def write(self, update: Dict[str, Any]):
+        """Запись обновления (файл сбрасывается в ОС после каждой записи)"""
+        record = {"t": round(time.time(), 3), "bot": self.name, "update": self.redactor.redact(update)}
+        payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode()
+
+        if self._file is None or self._size + _LENGTH.size + len(payload) > self.max_bytes:
+            self._rotate()
+        self._file.write(_LENGTH.pack(len(payload)))
+        self._file.write(payload)
+        self._file.flush()
+        self._size += _LENGTH.size + len(payload)
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10 ** 9:09d}"
+        self._file = open(self.directory / f"{self._prefix}{stamp}.ujl", "ab")
+        self._size = 0
+
+        files = _by_time(self.directory.glob(f"{self.name}-*.ujl"))
+        for old in files[:-self.max_files]:
+            old.unlink(missing_ok=True)
+
+    async def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def keyboard_texts(*markups) -> List[str]:
+    """Надписи кнопок reply-клавиатур (такие тексты сообщений не скрываются)"""
+    return [button.text for markup in markups for row in markup.keyboard for button in row]
+
+
+def read_journal(path: Path) -> Iterator[Dict[str, Any]]:
+    """Записи файла журнала по порядку (недописанная последняя запись пропускается)"""
+    with open(path, "rb") as file:
+        while True:
+            header = file.read(_LENGTH.size)
+            if len(header) < _LENGTH.size:
+                return
+            (length,) = _LENGTH.unpack(header)
+            payload = file.read(length)
+            if len(payload) < length:
+                logger.warning(f"{path}: truncated record at the end of the journal")
+                return
+            yield json.loads(payload)
+
+
+def journal_files(path: str, name: Optional[str] = None) -> Iterator[Path]:
+    """Файлы журнала: сам файл или все файлы каталога (бота name) по времени создания"""
+    target = Path(path)
+    if target.is_file():
+        yield target
+        return
+    yield from _by_time(target.glob(f"{name}-*.ujl" if name else "*.ujl"))
+
+
+def _by_time(files: Iterable[Path]) -> List[Path]:
+    # Имя файла: <бот>-<pid>-<дата>-<время>-<нс>.ujl
+    return sorted(files, key=lambda file: file.name.split("-", 2)[-1])
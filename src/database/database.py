@@ -1,18 +1,61 @@
 """
 Подключение к базе данных и управление сессиями
 """
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import NullPool
-from src.database.models import Base
+import asyncio
+import logging
+from typing import List
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncConnection, async_sessionmaker
+from sqlalchemy import select, insert, inspect, text, event
+from src.database.models import Base, QueueState, ServiceQueue, DEFAULT_QUEUE_ID
 from src.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+def _engine_options() -> dict:
+    """Параметры движка: пул соединений и кэш подготовленных запросов asyncpg"""
+    url = make_url(settings.DATABASE_URL)
+    options = {"echo": False}
+
+    # У SQLite (aiosqlite) пул NullPool/StaticPool: параметров QueuePool у него нет
+    if url.get_backend_name() != "sqlite":
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+        )
+
+    # Кэш подготовленных запросов живет в соединении, поэтому имеет смысл
+    # только вместе с пулом (с NullPool он терялся на каждой сессии)
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
+def _serialize_sqlite_writes(sync_engine):
+    """SQLite не поддерживает SELECT ... FOR UPDATE, на котором держатся
+    мутации очереди: каждая транзакция начинается с BEGIN IMMEDIATE и
+    сразу берет блокировку записи (остальные ждут ее в пределах busy timeout)"""
+
+    @event.listens_for(sync_engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        # BEGIN выдает SQLAlchemy, а не драйвер (иначе SELECT шли бы вне транзакции)
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(sync_engine, "begin")
+    def _begin_immediate(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
 
 # Создание асинхронного движка
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=False,
-    poolclass=NullPool,
-)
+engine = create_async_engine(settings.DATABASE_URL, **_engine_options())
+if engine.dialect.name == "sqlite":
+    _serialize_sqlite_writes(engine.sync_engine)
 
 # Фабрика сессий
 async_session_maker = async_sessionmaker(
@@ -22,10 +65,88 @@ async_session_maker = async_sessionmaker(
 )
 
 
+async def _ensure_queue_state(conn: AsyncConnection):
+    """Очередь по умолчанию и ее строка состояния создаются один раз
+    (строки состояния остальных очередей создает queue_registry)"""
+    result = await conn.execute(select(ServiceQueue.id).where(ServiceQueue.id == DEFAULT_QUEUE_ID))
+    if result.first() is None:
+        await conn.execute(insert(ServiceQueue).values(id=DEFAULT_QUEUE_ID, key="default", name="Основная очередь"))
+        if conn.dialect.name == "postgresql":
+            # id задан явно: последовательность сдвигается, чтобы следующие очереди его не заняли
+            await conn.execute(text("SELECT setval(pg_get_serial_sequence('queues', 'id'), (SELECT max(id) FROM queues))"))
+
+    result = await conn.execute(select(QueueState.id).where(QueueState.id == DEFAULT_QUEUE_ID))
+    if result.first() is None:
+        await conn.execute(insert(QueueState).values(id=DEFAULT_QUEUE_ID, version=0, in_queue_count=0))
+
+
+async def _ensure_trigram_index(conn: AsyncConnection):
+    """Триграммный индекс для поиска по ФИО (только PostgreSQL).
+
+    Нужно расширение pg_trgm: оно ставится, если доступно и у роли есть
+    права; иначе поиск работает без индекса (ILIKE по всей таблице), а
+    расширение и индекс можно создать вручную (см. README).
+    """
+    if conn.dialect.name != "postgresql":
+        return
+
+    result = await conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+    if result.first() is None:
+        try:
+            # Точка сохранения: ошибка прав не прерывает транзакцию проверки схемы
+            async with conn.begin_nested():
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except DBAPIError as e:
+            logger.warning(f"pg_trgm is not available, user search runs without the trigram index: {e.orig}")
+            return
+
+    # CREATE INDEX IF NOT EXISTS берет блокировку SHARE на users даже при готовом индексе
+    result = await conn.execute(text("SELECT 1 FROM pg_indexes WHERE indexname = 'ix_users_full_name_trgm'"))
+    if result.first() is None:
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_users_full_name_trgm ON users USING gin (full_name gin_trgm_ops)"
+        ))
+
+
 async def create_tables():
     """Создание всех таблиц в базе данных"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await _ensure_queue_state(conn)
+        await _ensure_trigram_index(conn)
+
+
+def _missing_tables(connection) -> List[str]:
+    existing = set(inspect(connection).get_table_names())
+    return [table.name for table in Base.metadata.sorted_tables if table.name not in existing]
+
+
+async def ensure_schema() -> List[str]:
+    """Проверка схемы при запуске.
+
+    create_all проверяет каждую таблицу отдельным запросом; здесь список
+    таблиц читается одним запросом к каталогу, и DDL выполняется только
+    если каких-то таблиц не хватает. Возвращает созданные таблицы.
+    """
+    async with engine.begin() as conn:
+        missing = await conn.run_sync(_missing_tables)
+        if missing:
+            await conn.run_sync(Base.metadata.create_all)
+        await _ensure_queue_state(conn)
+        await _ensure_trigram_index(conn)
+    return missing
+
+
+async def warm_pool(connections: int):
+    """Открытие соединений пула заранее, чтобы первые обновления не ждали подключения"""
+    connections = min(connections, settings.DB_POOL_SIZE)
+
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    # Одновременные подключения — иначе пул вернет одно и то же соединение
+    await asyncio.gather(*(ping() for _ in range(connections)))
 
 
 async def drop_tables():
@@ -2,27 +2,64 @@
 Модели базы данных
 """
 from datetime import datetime
-from sqlalchemy import BigInteger, Integer, String, Boolean, DateTime, Text, Enum
+from sqlalchemy import BigInteger, Integer, String, Boolean, DateTime, Text, Enum, JSON, Index, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from typing import Optional
+from typing import Optional, Any
 import enum
 
+# Очередь, созданная при первом запуске (id = 1): в нее попадают записи без явной очереди
+DEFAULT_QUEUE_ID = 1
+
 
 class Base(DeclarativeBase):
     """Базовый класс для всех моделей"""
     pass
 
 
+# Время ставит сервер БД (now()) в колонках с часовым поясом: INSERT возвращает
+# его через RETURNING без повторного чтения, а часы всех процессов не важны
+def _created_at(**kwargs):
+    return mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False, **kwargs)
+
+
+def _updated_at():
+    # onupdate срабатывает и при flush ORM, и в update() без явного значения;
+    # массовые UPDATE в сервисах все равно задают updated_at=func.now() явно
+    return mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
 class QueueStatus(enum.Enum):
     """Статусы очереди"""
     IN_QUEUE = "in_queue"  # В очереди
     SERVED = "served"  # Обслужен
+    WAITLISTED = "waitlisted"  # В листе ожидания (очередь заполнена)
     REMOVED = "removed"  # Удален
 
 
+class AdminRole(enum.Enum):
+    """Роли администраторов"""
+    VIEWER = "viewer"  # Просмотр очереди, статистики и пользователей
+    OPERATOR = "operator"  # + управление очередью и экспорт
+    SUPERADMIN = "superadmin"  # + категории и роли администраторов
+
+
+class AdminAction(enum.Enum):
+    """Типы действий администраторов"""
+    MARK_SERVED = "mark_served"  # Отметка об обслуживании
+    INCREASE_PRIORITY = "increase_priority"  # Повышение приоритета
+    DECREASE_PRIORITY = "decrease_priority"  # Понижение приоритета
+    REMOVE_FROM_QUEUE = "remove_from_queue"  # Удаление из очереди
+    EXPORT_DATA = "export_data"  # Экспорт данных
+    CHANGE_ADMIN_ROLE = "change_admin_role"  # Изменение роли администратора
+    IMPORT_USERS = "import_users"  # Массовый импорт пользователей в очередь
+
+
 class User(Base):
     """Модель пользователя"""
     __tablename__ = "users"
+    # Триграммный индекс по full_name для поиска создает ensure_schema, если
+    # в PostgreSQL доступно расширение pg_trgm (в метаданных его нет: без
+    # расширения create_all не прошел бы)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     telegram_id: Mapped[int] = mapped_column(BigInteger, unique=True, nullable=False, index=True)
@@ -30,39 +67,198 @@ class User(Base):
     reason: Mapped[str] = mapped_column(String(50), nullable=False)
     document_photo: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     priority: Mapped[int] = mapped_column(Integer, nullable=False)
-    join_date: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    join_date: Mapped[datetime] = _created_at(index=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
 
+    __mapper_args__ = {"eager_defaults": True}
+
     def __repr__(self) -> str:
         return f"User(id={self.id}, telegram_id={self.telegram_id}, full_name='{self.full_name}')"
 
 
+class ServiceQueue(Base):
+    """Очередь (пункт обслуживания) со своим каналом и вместимостью"""
+    __tablename__ = "queues"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # Ключ для ссылки на бота: t.me/<bot>?start=<key>
+    key: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Пусто — CHANNEL_ID / CHANNEL_USERNAME / MAX_QUEUE_SIZE из окружения
+    channel_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    channel_username: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    max_size: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    updated_at: Mapped[datetime] = _updated_at()
+
+    def __repr__(self) -> str:
+        return f"ServiceQueue(id={self.id}, key='{self.key}')"
+
+
+class Reason(Base):
+    """Категория (причина вступления) с приоритетом и политикой старения"""
+    __tablename__ = "reasons"
+
+    # Ключ уникален во всей базе, а не в очереди: users.reason и реестр категорий
+    # ссылаются на категорию только по ключу. Категории разных очередей с одним
+    # смыслом получают разные ключи (например, consultation_branch2)
+    key: Mapped[str] = mapped_column(String(50), primary_key=True)
+    # Пусто — категория доступна во всех очередях
+    queue_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False)
+    requires_document: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # Старение: приоритет улучшается на 1 за каждые aging_interval_minutes ожидания, но не выше min_priority
+    aging_interval_minutes: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    min_priority: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    updated_at: Mapped[datetime] = _updated_at()
+
+    def __repr__(self) -> str:
+        return f"Reason(key='{self.key}', priority={self.priority})"
+
+
 class Queue(Base):
     """Модель очереди"""
     __tablename__ = "queue"
+    __table_args__ = (
+        # Выборки изменений за период (отчеты) по статусу и времени изменения, по всем очередям
+        Index("ix_queue_status_updated_at", "status", "updated_at"),
+        # Все запросы к живой очереди ограничены одной очередью: индексы начинаются с queue_id,
+        # и очереди не мешают друг другу в общих индексах
+        Index("ix_queue_queue_id_status_priority_position", "queue_id", "status", "priority", "position"),
+        # Старение и аналитика ожидания: активные записи очереди по времени постановки
+        Index("ix_queue_queue_id_status_created_at", "queue_id", "status", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    queue_id: Mapped[int] = mapped_column(
+        Integer, default=DEFAULT_QUEUE_ID, server_default=str(DEFAULT_QUEUE_ID), nullable=False
+    )
     user_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
     priority: Mapped[int] = mapped_column(Integer, nullable=False)
     position: Mapped[int] = mapped_column(Integer, nullable=False)
     status: Mapped[str] = mapped_column(String(20), default=QueueStatus.IN_QUEUE.value, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow,
-                                                 nullable=False)
+    # Версия для сравнения с обменом (CAS): увеличивается при смене приоритета или статуса,
+    # но не при уплотнении позиций — сдвиг соседей не делает решение администратора устаревшим
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1", nullable=False)
+    created_at: Mapped[datetime] = _created_at()
+    updated_at: Mapped[datetime] = _updated_at()
+
+    __mapper_args__ = {"eager_defaults": True}
 
     def __repr__(self) -> str:
         return f"Queue(id={self.id}, user_id={self.user_id}, position={self.position}, status='{self.status}')"
 
 
+class QueueArchive(Base):
+    """Завершенные записи очереди (served/removed), перенесенные из queue"""
+    __tablename__ = "queue_archive"
+    __table_args__ = (
+        # Отчеты по периодам и очистка по сроку хранения
+        Index("ix_queue_archive_status_updated_at", "status", "updated_at"),
+    )
+
+    # id сохраняется из queue
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    queue_id: Mapped[int] = mapped_column(Integer, server_default=str(DEFAULT_QUEUE_ID), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False)
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    archived_at: Mapped[datetime] = _created_at()
+
+    def __repr__(self) -> str:
+        return f"QueueArchive(id={self.id}, user_id={self.user_id}, status='{self.status}')"
+
+
+class QueueState(Base):
+    """Служебное состояние очереди (строка на очередь, id = queues.id)"""
+    __tablename__ = "queue_state"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Увеличивается каждой мутацией очереди в той же транзакции
+    version: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    # Количество записей в статусе in_queue (контроль MAX_QUEUE_SIZE без COUNT(*))
+    in_queue_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Итоги за все время (строки served/removed со временем уходят в queue_archive)
+    served_count: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
+    removed_count: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
+
+    def __repr__(self) -> str:
+        return f"QueueState(id={self.id}, version={self.version})"
+
+
+class Document(Base):
+    """Загруженный документ пользователя (файл хранится по хешу содержимого)"""
+    __tablename__ = "documents"
+
+    # file_id пользовательского бота (как в User.document_photo)
+    file_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    # file_id миниатюры в админ-боте после первой отправки (повторно не загружается)
+    admin_file_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    created_at: Mapped[datetime] = _created_at()
+
+    def __repr__(self) -> str:
+        return f"Document(file_id='{self.file_id}', sha256='{self.sha256}')"
+
+
+class ReportSnapshot(Base):
+    """Снимок отчета за период (часовой или суточный)"""
+    __tablename__ = "report_snapshots"
+    __table_args__ = (
+        Index("ix_report_snapshots_period", "period", "period_start", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    period: Mapped[str] = mapped_column(String(20), nullable=False)
+    period_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    period_end: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    metrics: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = _created_at()
+
+    def __repr__(self) -> str:
+        return f"ReportSnapshot(period='{self.period}', period_start={self.period_start})"
+
+
+class AdminAccount(Base):
+    """Администратор с ролью (дополняет ADMIN_IDS из окружения)"""
+    __tablename__ = "admin_accounts"
+
+    telegram_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    role: Mapped[str] = mapped_column(String(20), nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    updated_at: Mapped[datetime] = _updated_at()
+
+    def __repr__(self) -> str:
+        return f"AdminAccount(telegram_id={self.telegram_id}, role='{self.role}')"
+
+
 class AdminLog(Base):
     """Журнал действий администраторов"""
     __tablename__ = "admin_logs"
+    __table_args__ = (
+        Index("ix_admin_logs_target_user_timestamp", "target_user_id", "timestamp"),
+        Index("ix_admin_logs_admin_timestamp", "admin_id", "timestamp"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    admin_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
-    action: Mapped[str] = mapped_column(String(100), nullable=False)
+    admin_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    action: Mapped[AdminAction] = mapped_column(
+        Enum(AdminAction, native_enum=False, length=50, values_callable=lambda e: [m.value for m in e]),
+        nullable=False
+    )
+    target_user_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    before: Mapped[Optional[dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    after: Mapped[Optional[dict[str, Any]]] = mapped_column(JSON, nullable=True)
     details: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Задается AuditLogger в момент действия (запись в БД отложена); по умолчанию — now()
+    timestamp: Mapped[datetime] = _created_at()
 
     def __repr__(self) -> str:
-        return f"AdminLog(id={self.id}, admin_id={self.admin_id}, action='{self.action}')"
+        return f"AdminLog(id={self.id}, admin_id={self.admin_id}, action='{self.action.value}')"
@@ -0,0 +1,155 @@
+"""
+Состав администраторов, их роли и права
+"""
+import asyncio
+import enum
+import logging
+from datetime import datetime
+from typing import Optional, Dict, FrozenSet, Iterable, Tuple, List
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database.models import AdminAccount, AdminRole
+
+logger = logging.getLogger(__name__)
+
+
+class Permission(enum.Enum):
+    """Права в админ-боте (задаются обработчикам флагом permission)"""
+    VIEW = "view"  # Очередь, статистика, пользователи, документы
+    MANAGE_QUEUE = "manage_queue"  # Обслуживание, приоритет, удаление из очереди
+    EXPORT = "export"  # Выгрузка данных
+    MANAGE_REASONS = "manage_reasons"  # Приоритеты категорий
+    MANAGE_ADMINS = "manage_admins"  # Роли администраторов
+
+
+ROLE_PERMISSIONS: Dict[AdminRole, FrozenSet[Permission]] = {
+    AdminRole.VIEWER: frozenset({Permission.VIEW}),
+    AdminRole.OPERATOR: frozenset({Permission.VIEW, Permission.MANAGE_QUEUE, Permission.EXPORT}),
+    AdminRole.SUPERADMIN: frozenset(Permission),
+}
+
+
+class AdminRoster:
+    """Роли администраторов в памяти с горячей перезагрузкой из БД.
+
+    ID из ADMIN_IDS всегда суперадминистраторы (их нельзя понизить через
+    БД, чтобы не потерять доступ); роли остальных хранятся в таблице
+    admin_accounts. Проверка доступа — поиск в словаре без обращения к БД;
+    изменения в таблице подхватываются фоновой задачей по отпечатку
+    (количество строк, max(updated_at)), как в priority_registry.
+    """
+
+    def __init__(self):
+        self._bootstrap: FrozenSet[int] = frozenset()
+        self._roles: Dict[int, AdminRole] = {}
+        self._fingerprint: Optional[Tuple[int, Optional[datetime]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def configure(self, bootstrap_ids: Iterable[int]):
+        """ID суперадминистраторов из окружения (доступ есть и до загрузки из БД)"""
+        self._bootstrap = frozenset(bootstrap_ids)
+        self._index({})
+
+    def _index(self, db_roles: Dict[int, AdminRole]):
+        """Перестроение словаря ролей (атомарная замена ссылки)"""
+        roles = dict(db_roles)
+        for telegram_id in self._bootstrap:
+            roles[telegram_id] = AdminRole.SUPERADMIN
+        self._roles = roles
+
+    def role_for(self, telegram_id: int) -> Optional[AdminRole]:
+        """Роль администратора (None — не администратор)"""
+        return self._roles.get(telegram_id)
+
+    def has_permission(self, telegram_id: int, permission: Permission) -> bool:
+        role = self._roles.get(telegram_id)
+        return role is not None and permission in ROLE_PERMISSIONS[role]
+
+    def admin_ids(self) -> List[int]:
+        """Все администраторы"""
+        return sorted(self._roles)
+
+    def roles(self) -> Dict[int, AdminRole]:
+        return self._roles
+
+    def is_bootstrap(self, telegram_id: int) -> bool:
+        return telegram_id in self._bootstrap
+
+    async def load(self, session_maker: async_sessionmaker):
+        """Загрузка ролей из БД"""
+        async with session_maker() as session:
+            fingerprint = await self._get_fingerprint(session)
+            result = await session.execute(
+                select(AdminAccount.telegram_id, AdminAccount.role).where(AdminAccount.is_active == True)
+            )
+            db_roles = {}
+            for telegram_id, role in result.all():
+                try:
+                    db_roles[telegram_id] = AdminRole(role)
+                except ValueError:
+                    logger.warning(f"Unknown admin role {role!r} for {telegram_id}, ignored")
+
+        self._index(db_roles)
+        self._fingerprint = fingerprint
+        logger.info(f"Admin roster loaded: {len(self._roles)} admins")
+
+    async def reload_if_changed(self, session_maker: async_sessionmaker) -> bool:
+        """Перезагрузка, если таблица ролей изменилась"""
+        async with session_maker() as session:
+            fingerprint = await self._get_fingerprint(session)
+
+        if fingerprint == self._fingerprint:
+            return False
+
+        await self.load(session_maker)
+        return True
+
+    @staticmethod
+    async def _get_fingerprint(session: AsyncSession) -> Tuple[int, Optional[datetime]]:
+        result = await session.execute(
+            select(func.count(AdminAccount.telegram_id), func.max(AdminAccount.updated_at))
+        )
+        count, last_update = result.one()
+        return count, last_update
+
+    async def start(self, session_maker: async_sessionmaker, reload_interval: float):
+        """Загрузка и запуск фоновой перезагрузки"""
+        await self.load(session_maker)
+        if self._task is None:
+            self._task = asyncio.create_task(self._reload_loop(session_maker, reload_interval))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _reload_loop(self, session_maker: async_sessionmaker, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await self.reload_if_changed(session_maker):
+                    logger.info("Admin roster reloaded")
+            except Exception as e:
+                logger.error(f"Failed to reload admin roster: {e}")
+
+
+async def set_admin_role(session: AsyncSession, telegram_id: int, role: Optional[AdminRole]):
+    """Назначение роли (None — отзыв доступа); остальные процессы подхватят изменение при перезагрузке"""
+    account = await session.get(AdminAccount, telegram_id)
+    if account is None:
+        if role is None:
+            return
+        session.add(AdminAccount(telegram_id=telegram_id, role=role.value, is_active=True))
+    elif role is None:
+        account.is_active = False
+    else:
+        account.role = role.value
+        account.is_active = True
+    await session.commit()
+
+
+# Состав администраторов процесса
+admin_roster = AdminRoster()
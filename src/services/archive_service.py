@@ -0,0 +1,148 @@
+"""
+Архив завершенных записей очереди
+
+Записи served/removed не нужны запросам к живой очереди, но без переноса
+копятся в таблице queue и замедляют каждую выборку по статусу. Фоновая
+задача админ-бота переносит завершенные записи старше ARCHIVE_AFTER_DAYS
+в queue_archive небольшими пакетами (каждый пакет — своя короткая
+транзакция: INSERT ... SELECT и DELETE по одному списку id) и удаляет
+архив старше ARCHIVE_RETENTION_DAYS. Итоги за все время хранятся в
+счетчиках queue_state, отчеты по периодам читают обе таблицы.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import select, insert, delete, and_, bindparam, Integer
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database.models import Queue, QueueArchive, QueueStatus
+
+logger = logging.getLogger(__name__)
+
+_TERMINAL = (QueueStatus.SERVED.value, QueueStatus.REMOVED.value)
+
+_ARCHIVED_COLUMNS = ("id", "queue_id", "user_id", "priority", "position", "status", "version", "created_at", "updated_at")
+
+_SELECT_ARCHIVABLE = (
+    select(Queue.id)
+    .where(
+        and_(
+            Queue.status.in_(_TERMINAL),
+            Queue.updated_at < bindparam("cutoff")
+        )
+    )
+    .order_by(Queue.id)
+    .limit(bindparam("limit", type_=Integer))
+)
+
+# Таблица, а не модель: ORM-вставка с параметрами выполнялась бы как bulk INSERT строк
+_COPY_TO_ARCHIVE = insert(QueueArchive.__table__).from_select(
+    _ARCHIVED_COLUMNS,
+    select(*(getattr(Queue, name) for name in _ARCHIVED_COLUMNS))
+    .where(Queue.id.in_(bindparam("ids", expanding=True)))
+)
+
+_DELETE_ARCHIVED = (
+    delete(Queue)
+    .where(Queue.id.in_(bindparam("ids", expanding=True)))
+    .execution_options(synchronize_session=False)
+)
+
+_SELECT_EXPIRED = (
+    select(QueueArchive.id)
+    .where(QueueArchive.updated_at < bindparam("cutoff"))
+    .order_by(QueueArchive.id)
+    .limit(bindparam("limit", type_=Integer))
+)
+
+_DELETE_EXPIRED = (
+    delete(QueueArchive)
+    .where(QueueArchive.id.in_(bindparam("ids", expanding=True)))
+    .execution_options(synchronize_session=False)
+)
+
+
+class ArchiveService:
+    """Перенос завершенных записей в архив"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def archive_batch(self, cutoff: datetime, batch_size: int) -> int:
+        """Перенос одного пакета записей, завершенных до cutoff"""
+        result = await self.session.execute(_SELECT_ARCHIVABLE, {"cutoff": cutoff, "limit": batch_size})
+        ids = list(result.scalars().all())
+        if ids:
+            await self.session.execute(_COPY_TO_ARCHIVE, {"ids": ids})
+            await self.session.execute(_DELETE_ARCHIVED, {"ids": ids})
+        await self.session.commit()
+        return len(ids)
+
+    async def purge_batch(self, cutoff: datetime, batch_size: int) -> int:
+        """Удаление одного пакета архива старше cutoff"""
+        result = await self.session.execute(_SELECT_EXPIRED, {"cutoff": cutoff, "limit": batch_size})
+        ids = list(result.scalars().all())
+        if ids:
+            await self.session.execute(_DELETE_EXPIRED, {"ids": ids})
+        await self.session.commit()
+        return len(ids)
+
+
+class QueueArchiver:
+    """Периодический перенос в архив и очистка по сроку хранения"""
+
+    def __init__(
+            self,
+            session_maker: async_sessionmaker,
+            archive_after_days: int,
+            retention_days: int = 0,
+            batch_size: int = 1000,
+            interval: float = 3600.0
+    ):
+        self.session_maker = session_maker
+        self.archive_after = timedelta(days=archive_after_days)
+        self.retention = timedelta(days=retention_days) if retention_days > 0 else None
+        self.batch_size = batch_size
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                archived, purged = await self.run_once(datetime.now(timezone.utc))
+                if archived or purged:
+                    logger.info(f"Queue archive: moved {archived} entries, purged {purged}")
+            except Exception as e:
+                logger.error(f"Queue archiving failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self, now: datetime) -> Tuple[int, int]:
+        """Перенос всех подходящих записей пакетами; возвращает (перенесено, удалено)"""
+        archived = await self._drain(ArchiveService.archive_batch, now - self.archive_after)
+        purged = 0
+        if self.retention is not None:
+            purged = await self._drain(ArchiveService.purge_batch, now - self.retention)
+        return archived, purged
+
+    async def _drain(self, batch, cutoff: datetime) -> int:
+        total = 0
+        while True:
+            async with self.session_maker() as session:
+                moved = await batch(ArchiveService(session), cutoff, self.batch_size)
+            total += moved
+            if moved < self.batch_size:
+                return total
+            # Между пакетами цикл событий обслуживает обработчики
+            await asyncio.sleep(0)
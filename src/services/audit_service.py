@@ -0,0 +1,149 @@
+"""
+Сервис журнала действий администраторов
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any
+
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database.models import AdminLog, AdminAction
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogger:
+    """Буферизированная запись журнала действий администраторов.
+
+    Записи накапливаются в памяти и сбрасываются в БД одной пакетной
+    вставкой при достижении ``batch_size`` или по истечении ``flush_interval``.
+    """
+
+    def __init__(
+            self,
+            session_maker: async_sessionmaker,
+            batch_size: int = 100,
+            flush_interval: float = 5.0,
+            max_buffer: int = 10000
+    ):
+        self.session_maker = session_maker
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """Записи, ожидающие сброса в БД"""
+        return len(self._buffer)
+
+    def log(
+            self,
+            admin_id: int,
+            action: AdminAction,
+            target_user_id: Optional[int] = None,
+            before: Optional[Dict[str, Any]] = None,
+            after: Optional[Dict[str, Any]] = None,
+            details: Optional[str] = None
+    ):
+        """Добавление записи в буфер (без обращения к БД)"""
+        if len(self._buffer) >= self.max_buffer:
+            logger.error("Audit buffer overflow, dropping oldest entry")
+            self._buffer.pop(0)
+
+        self._buffer.append({
+            "admin_id": admin_id,
+            "action": action,
+            "target_user_id": target_user_id,
+            "before": before,
+            "after": after,
+            "details": details,
+            "timestamp": datetime.now(timezone.utc),
+        })
+
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self):
+        """Сброс накопленных записей в БД одной пакетной вставкой"""
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+
+            batch, self._buffer = self._buffer, []
+            try:
+                async with self.session_maker() as session:
+                    await session.execute(insert(AdminLog), batch)
+                    await session.commit()
+            except Exception as e:
+                logger.error(f"Failed to flush {len(batch)} audit entries: {e}")
+                # Возвращаем записи в буфер, чтобы повторить при следующем сбросе
+                self._buffer = (batch + self._buffer)[-self.max_buffer:]
+
+    async def start(self):
+        """Запуск фоновой задачи сброса"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Остановка фоновой задачи с финальным сбросом буфера"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        """Цикл сброса по размеру буфера или по таймеру"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+
+class AuditService:
+    """Сервис для чтения журнала действий администраторов"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_actions_on_user(self, target_user_id: int, limit: int = 50) -> List[AdminLog]:
+        """Все действия над пользователем (новые первыми)"""
+        result = await self.session.execute(
+            select(AdminLog)
+            .where(AdminLog.target_user_id == target_user_id)
+            .order_by(AdminLog.timestamp.desc())
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def get_actions_by_admin(
+            self,
+            admin_id: int,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            limit: int = 100
+    ) -> List[AdminLog]:
+        """Все действия администратора за период (новые первыми)"""
+        query = select(AdminLog).where(AdminLog.admin_id == admin_id)
+
+        if start is not None:
+            query = query.where(AdminLog.timestamp >= start)
+        if end is not None:
+            query = query.where(AdminLog.timestamp < end)
+
+        result = await self.session.execute(
+            query.order_by(AdminLog.timestamp.desc()).limit(limit)
+        )
+        return list(result.scalars().all())
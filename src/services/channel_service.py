@@ -0,0 +1,52 @@
+"""
+Сервис для работы с закрытым каналом
+"""
+import logging
+from typing import Optional
+from aiogram import Bot
+
+from src.core.send_queue import get_send_queue
+
+logger = logging.getLogger(__name__)
+
+
+class ChannelManager:
+    """Управление доступом пользователей к каналу"""
+
+    # Информация о канале меняется редко, поэтому запрашивается один раз на процесс
+    _channel_info_cache: dict = {}
+
+    def __init__(self, bot: Bot, channel_id: int):
+        self.bot = bot
+        self.channel_id = channel_id
+
+    async def add_user(self, telegram_id: int) -> bool:
+        """Отправка пользователю персональной одноразовой ссылки-приглашения"""
+        try:
+            invite_link = await self.bot.create_chat_invite_link(
+                chat_id=self.channel_id,
+                member_limit=1
+            )
+            await get_send_queue(self.bot).send_message(
+                telegram_id,
+                f"🔗 Ваша ссылка для вступления в канал:\n{invite_link.invite_link}"
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to invite user {telegram_id}: {e}")
+            return False
+
+    async def get_channel_info(self) -> Optional[dict]:
+        """Получение информации о канале"""
+        if self.channel_id in self._channel_info_cache:
+            return self._channel_info_cache[self.channel_id]
+
+        try:
+            chat = await self.bot.get_chat(self.channel_id)
+        except Exception as e:
+            logger.error(f"Failed to get channel info: {e}")
+            return None
+
+        info = {"title": chat.title, "username": chat.username}
+        self._channel_info_cache[self.channel_id] = info
+        return info
@@ -0,0 +1,260 @@
+"""
+Сервис документов пользователей: фоновая загрузка, хранение и миниатюры
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, List, Iterable
+
+from aiogram import Bot
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database.models import Document
+from src.config import get_settings
+from src.core.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+def make_thumbnail(source: str, target: str, size: int):
+    """Создание JPEG-миниатюры (выполняется в отдельном процессе)"""
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image.thumbnail((size, size))
+        image.convert("RGB").save(target, "JPEG", quality=85)
+
+
+@dataclass(frozen=True)
+class StoredDocument:
+    """Документ в локальном хранилище"""
+    file_id: str
+    sha256: str
+    path: Path
+    thumbnail_path: Path
+    admin_file_id: Optional[str] = None
+
+
+class DocumentStore:
+    """Хранилище файлов по хешу содержимого с вытеснением давно не использованных.
+
+    Время последнего обращения хранится в mtime файла; при превышении
+    max_bytes удаляются самые старые файлы до 90% лимита.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._total_bytes: Optional[int] = None
+
+    def path_for(self, sha256: str) -> Path:
+        return self.root / "files" / sha256[:2] / sha256
+
+    def thumbnail_for(self, sha256: str) -> Path:
+        return self.root / "thumbs" / sha256[:2] / f"{sha256}.jpg"
+
+    def has(self, sha256: str) -> bool:
+        return self.path_for(sha256).exists() and self.thumbnail_for(sha256).exists()
+
+    def touch(self, sha256: str):
+        """Отметка об использовании (для LRU)"""
+        for path in (self.path_for(sha256), self.thumbnail_for(sha256)):
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+
+    def write(self, sha256: str, data: bytes) -> Path:
+        """Запись содержимого (идемпотентна для одинакового хеша)"""
+        path = self.path_for(sha256)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(data)
+            tmp_path.replace(path)
+            self.account(len(data))
+        return path
+
+    def account(self, size: int):
+        """Учет добавленных байт"""
+        if self._total_bytes is not None:
+            self._total_bytes += size
+
+    def _files(self) -> List[Path]:
+        return [path for path in self.root.rglob("*") if path.is_file()]
+
+    def evict(self) -> int:
+        """Вытеснение давно не использованных файлов; возвращает число удаленных"""
+        if self._total_bytes is None:
+            self._total_bytes = sum(path.stat().st_size for path in self._files())
+
+        if self._total_bytes <= self.max_bytes:
+            return 0
+
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for path in sorted(self._files(), key=lambda p: p.stat().st_mtime):
+            if self._total_bytes <= target:
+                break
+            size = path.stat().st_size
+            path.unlink(missing_ok=True)
+            self._total_bytes -= size
+            removed += 1
+        return removed
+
+
+class DocumentPipeline:
+    """Фоновая загрузка документов с ограничением параллелизма.
+
+    Файлы скачиваются через пользовательского бота (file_id привязан к
+    нему), миниатюры строятся в пуле процессов, чтобы не блокировать цикл
+    событий. Повторные запросы одного file_id объединяются.
+    """
+
+    def __init__(
+            self,
+            bot: Bot,
+            store: DocumentStore,
+            session_maker: async_sessionmaker,
+            concurrency: int = 4,
+            thumbnail_size: int = 1024,
+            thumbnail_workers: int = 2
+    ):
+        self.bot = bot
+        self.store = store
+        self.session_maker = session_maker
+        self.thumbnail_size = thumbnail_size
+        self._download_slots = asyncio.Semaphore(concurrency)
+        self._thumbnail_workers = thumbnail_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._background: set = set()
+
+    async def start(self):
+        """Запуск пула процессов для миниатюр"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._thumbnail_workers)
+
+    async def stop(self):
+        """Ожидание фоновых загрузок и остановка пула"""
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    @property
+    def backlog(self) -> int:
+        """Загрузки в работе и в ожидании"""
+        return len(self._background) + len(self._inflight)
+
+    def enqueue(self, file_id: str):
+        """Фоновая предзагрузка документа"""
+        task = asyncio.create_task(self.fetch(file_id))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def fetch(self, file_id: str) -> Optional[StoredDocument]:
+        """Документ из хранилища; при отсутствии — загрузка"""
+        document = await self._get_stored(file_id)
+        if document is not None:
+            CACHE_REQUESTS.inc(cache="documents", result="hit")
+            return document
+        CACHE_REQUESTS.inc(cache="documents", result="miss")
+
+        task = self._inflight.get(file_id)
+        if task is None:
+            task = asyncio.create_task(self._download(file_id))
+            self._inflight[file_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(file_id, None))
+
+        try:
+            return await asyncio.shield(task)
+        except Exception as e:
+            logger.error(f"Failed to fetch document {file_id}: {e}")
+            return None
+
+    async def fetch_many(self, file_ids: Iterable[str]) -> Dict[str, StoredDocument]:
+        """Параллельная загрузка нескольких документов (в пределах лимита)"""
+        file_ids = list(file_ids)
+        documents = await asyncio.gather(*(self.fetch(file_id) for file_id in file_ids))
+        return {file_id: doc for file_id, doc in zip(file_ids, documents) if doc is not None}
+
+    async def remember_admin_file_id(self, file_id: str, admin_file_id: str):
+        """Сохранение file_id миниатюры в админ-боте"""
+        async with self.session_maker() as session:
+            await session.execute(
+                update(Document)
+                .where(Document.file_id == file_id)
+                .values(admin_file_id=admin_file_id)
+            )
+            await session.commit()
+
+    async def _get_stored(self, file_id: str) -> Optional[StoredDocument]:
+        async with self.session_maker() as session:
+            result = await session.execute(select(Document).where(Document.file_id == file_id))
+            row = result.scalar_one_or_none()
+
+        if row is None:
+            return None
+
+        # Миниатюра, уже загруженная в админ-бот, доступна и после вытеснения файла
+        if not self.store.has(row.sha256) and not row.admin_file_id:
+            return None
+
+        self.store.touch(row.sha256)
+        return self._to_stored(row)
+
+    def _to_stored(self, row: Document) -> StoredDocument:
+        return StoredDocument(
+            file_id=row.file_id,
+            sha256=row.sha256,
+            path=self.store.path_for(row.sha256),
+            thumbnail_path=self.store.thumbnail_for(row.sha256),
+            admin_file_id=row.admin_file_id
+        )
+
+    async def _download(self, file_id: str) -> StoredDocument:
+        async with self._download_slots:
+            buffer = io.BytesIO()
+            await self.bot.download(file_id, destination=buffer)
+        data = buffer.getvalue()
+
+        sha256 = await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+        path = await asyncio.to_thread(self.store.write, sha256, data)
+
+        thumbnail_path = self.store.thumbnail_for(sha256)
+        if not thumbnail_path.exists():
+            thumbnail_path.parent.mkdir(parents=True, exist_ok=True)
+            await self.start()
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, make_thumbnail, str(path), str(thumbnail_path), self.thumbnail_size
+            )
+            self.store.account(thumbnail_path.stat().st_size)
+
+        async with self.session_maker() as session:
+            row = await session.merge(Document(file_id=file_id, sha256=sha256, size=len(data)))
+            await session.commit()
+            stored = self._to_stored(row)
+
+        await asyncio.to_thread(self.store.evict)
+        return stored
+
+
+def create_document_pipeline(bot: Bot, session_maker: async_sessionmaker) -> DocumentPipeline:
+    """Конвейер документов с параметрами из настроек (bot — пользовательский бот)"""
+    settings = get_settings()
+    return DocumentPipeline(
+        bot,
+        DocumentStore(settings.DOCUMENTS_DIR, settings.DOCUMENTS_MAX_BYTES),
+        session_maker,
+        concurrency=settings.DOCUMENT_DOWNLOAD_CONCURRENCY,
+        thumbnail_size=settings.THUMBNAIL_SIZE,
+        thumbnail_workers=settings.THUMBNAIL_WORKERS
+    )
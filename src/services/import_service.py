@@ -0,0 +1,322 @@
+"""
+Массовый импорт пользователей и очереди из CSV/XLSX
+
+Перенос существующего списка ожидания без регистрации каждого
+пользователя через бота. Файл читается построчно (CSV — csv.reader,
+XLSX — openpyxl в режиме read_only), строки проверяются по мере чтения и
+загружаются пакетами: файл целиком в памяти не держится.
+Позиции назначаются за один проход по строкам, отсортированным по
+(приоритет, дата постановки), от текущего конца каждой группы; записи
+сверх вместимости очереди попадают в лист ожидания. В PostgreSQL пользователи
+и записи очереди загружаются через COPY (asyncpg), в остальных базах —
+пакетным INSERT.
+"""
+import asyncio
+import csv
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import Table, insert, select, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import User, Queue, QueueStatus, DEFAULT_QUEUE_ID
+from src.services.priority_registry import priority_registry
+from src.services.queue_service import QueueService
+
+logger = logging.getLogger(__name__)
+
+# Заголовок колонки -> поле (подходят и заголовки выгрузки админ-бота в Excel)
+_COLUMNS = {
+    "telegram_id": "telegram_id",
+    "telegram id": "telegram_id",
+    "full_name": "full_name",
+    "фио": "full_name",
+    "reason": "reason",
+    "причина": "reason",
+    "join_date": "join_date",
+    "дата регистрации": "join_date",
+}
+_REQUIRED = ("telegram_id", "full_name", "reason")
+_DATE_FORMATS = ("%d.%m.%Y %H:%M", "%d.%m.%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+_USER_COLUMNS = ("telegram_id", "full_name", "reason", "priority", "join_date", "is_active")
+_QUEUE_COLUMNS = ("queue_id", "user_id", "priority", "position", "status", "created_at")
+
+# Размер пакета для выборок по списку telegram_id (лимит параметров запроса)
+_LOOKUP_CHUNK = 10_000
+
+# Строк файла в одном пакете загрузки
+IMPORT_BATCH_SIZE = 5_000
+
+_SELECT_USER_IDS = (
+    select(User.telegram_id, User.id)
+    .where(User.telegram_id.in_(bindparam("telegram_ids", expanding=True)))
+)
+
+MAX_REPORTED_ERRORS = 20
+
+
+@dataclass
+class ImportRow:
+    """Проверенная строка файла"""
+    line: int
+    telegram_id: int
+    full_name: str
+    reason: str
+    priority: int
+    join_date: datetime
+
+
+@dataclass
+class ImportReport:
+    """Итоги импорта"""
+    rows: int = 0
+    imported: int = 0
+    queued: int = 0
+    waitlisted: int = 0
+    existing: int = 0  # Уже зарегистрированы в боте
+    duplicates: int = 0  # Повтор telegram_id в файле
+    invalid: int = 0
+    errors: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def error(self, line: int, message: str):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"строка {line}: {message}")
+
+    def summary(self) -> str:
+        text = (
+            f"📥 Импорт: строк {self.rows}, за {self.seconds:.1f} с\n\n"
+            f"✅ Добавлено: {self.imported}\n"
+            f"   в очередь: {self.queued}\n"
+            f"   в лист ожидания: {self.waitlisted}\n"
+            f"↩️ Уже зарегистрированы: {self.existing}\n"
+            f"🔁 Повторы в файле: {self.duplicates}\n"
+            f"⚠️ Ошибки: {self.invalid}\n"
+        )
+        if self.errors:
+            text += "\n" + "\n".join(self.errors)
+            if self.invalid > len(self.errors):
+                text += f"\n... и еще {self.invalid - len(self.errors)}"
+        return text
+
+
+def read_table(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Строки файла: (номер строки, поле -> значение), без загрузки файла целиком"""
+    rows = _xlsx_rows(path) if path.lower().endswith(".xlsx") else _csv_rows(path)
+
+    header = next(rows, None)
+    if header is None:
+        return
+    fields = [_COLUMNS.get(str(name).strip().lower()) if name is not None else None for name in header]
+    missing = [name for name in _REQUIRED if name not in fields]
+    if missing:
+        raise ValueError(f"В файле нет колонок: {', '.join(missing)}")
+
+    for line, values in enumerate(rows, start=2):
+        record = {name: value for name, value in zip(fields, values) if name is not None}
+        # Пустые строки (в том числе хвост листа Excel) пропускаются
+        if any(value not in (None, "") for value in record.values()):
+            yield line, record
+
+
+def _csv_rows(path: str) -> Iterator[Sequence[Any]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        try:
+            dialect = csv.Sniffer().sniff(f.read(4096), delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        f.seek(0)
+        yield from csv.reader(f, dialect)
+
+
+def _xlsx_rows(path: str) -> Iterator[Sequence[Any]]:
+    # openpyxl нужен только для импорта
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _parse_date(value: Any, default: datetime) -> datetime:
+    if value in (None, ""):
+        return default
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = str(value).strip()
+        for date_format in _DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(text, date_format)
+                break
+            except ValueError:
+                continue
+        else:
+            parsed = datetime.fromisoformat(text)
+    # Дата без часового пояса считается UTC
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def validate_rows(
+        records: Iterable[Tuple[int, Dict[str, Any]]],
+        report: ImportReport,
+        queue_id: int = DEFAULT_QUEUE_ID
+) -> Iterator[ImportRow]:
+    """Проверка строк по мере чтения; ошибки и повторы учитываются в отчете"""
+    now = datetime.now(timezone.utc)
+    reasons_by_name = {reason.name.lower(): reason for reason in priority_registry.all(queue_id)}
+    seen = set()
+
+    for line, record in records:
+        report.rows += 1
+
+        try:
+            telegram_id = int(float(str(record.get("telegram_id")).strip()))
+        except (ValueError, OverflowError):
+            report.error(line, f"некорректный telegram_id {record.get('telegram_id')!r}")
+            continue
+
+        full_name = str(record.get("full_name") or "").strip()
+        if not full_name or len(full_name) > 255:
+            report.error(line, "ФИО пустое или длиннее 255 символов")
+            continue
+
+        raw_reason = str(record.get("reason") or "").strip()
+        reason = priority_registry.get(raw_reason) or reasons_by_name.get(raw_reason.lower())
+        if reason is None or not reason.available_in(queue_id):
+            report.error(line, f"неизвестная причина {raw_reason!r}")
+            continue
+
+        try:
+            join_date = _parse_date(record.get("join_date"), now)
+        except ValueError:
+            report.error(line, f"некорректная дата {record.get('join_date')!r}")
+            continue
+
+        if telegram_id in seen:
+            report.duplicates += 1
+            continue
+        seen.add(telegram_id)
+
+        yield ImportRow(line, telegram_id, full_name, reason.key, reason.priority, join_date)
+
+
+def _chunks(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _take(items: Iterator[Any], size: int) -> List[Any]:
+    return list(islice(items, size))
+
+
+class ImportService:
+    """Загрузка проверенных строк в users и queue одной транзакцией"""
+
+    def __init__(self, session: AsyncSession, queue_id: int = DEFAULT_QUEUE_ID):
+        self.session = session
+        self.queue_id = queue_id
+
+    async def import_rows(
+            self,
+            rows: Iterable[ImportRow],
+            report: ImportReport,
+            batch_size: int = IMPORT_BATCH_SIZE
+    ) -> ImportReport:
+        """Импорт в конец очереди; уже зарегистрированные пользователи пропускаются.
+
+        rows — обычно генератор validate_rows: пакеты по batch_size строк
+        читаются в потоке (чтение и проверка файла не останавливают цикл
+        событий), пользователи загружаются по пакетам, а до расстановки в
+        очереди хранятся только (приоритет, дата, строка, users.id).
+        """
+        started = time.perf_counter()
+        queue_service = QueueService(self.session, self.queue_id)
+        rows = iter(rows)
+        placements: List[Tuple[int, datetime, int, int]] = []
+
+        try:
+            # Мутации очереди ждут фиксации импорта: концы групп не сдвинутся
+            tails, waitlist_tail, free = await queue_service.begin_bulk_append()
+
+            while batch := await asyncio.to_thread(_take, rows, batch_size):
+                existing = await self._user_ids([row.telegram_id for row in batch])
+                new_rows = [row for row in batch if row.telegram_id not in existing]
+                report.existing += len(batch) - len(new_rows)
+                if not new_rows:
+                    continue
+
+                await self._copy(User.__table__, _USER_COLUMNS, [
+                    (row.telegram_id, row.full_name, row.reason, row.priority, row.join_date, True)
+                    for row in new_rows
+                ])
+                user_ids = await self._user_ids([row.telegram_id for row in new_rows])
+                placements.extend(
+                    (row.priority, row.join_date, row.line, user_ids[row.telegram_id]) for row in new_rows
+                )
+
+            if not placements:
+                await self.session.rollback()
+                report.seconds = time.perf_counter() - started
+                return report
+
+            # Один проход: порядок ожидания внутри приоритета — по дате постановки, затем по файлу
+            placements.sort()
+            queue_records = []
+            queued = 0
+            for priority, join_date, _, user_id in placements:
+                if free is None or queued < free:
+                    tails[priority] = position = tails.get(priority, 0) + 1
+                    status = QueueStatus.IN_QUEUE.value
+                    queued += 1
+                else:
+                    waitlist_tail = position = waitlist_tail + 1
+                    status = QueueStatus.WAITLISTED.value
+                queue_records.append((self.queue_id, user_id, priority, position, status, join_date))
+                if len(queue_records) == batch_size:
+                    await self._copy(Queue.__table__, _QUEUE_COLUMNS, queue_records)
+                    queue_records = []
+
+            if queue_records:
+                await self._copy(Queue.__table__, _QUEUE_COLUMNS, queue_records)
+            await queue_service.finish_bulk_append(queued)
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        report.imported += len(placements)
+        report.queued += queued
+        report.waitlisted += len(placements) - queued
+        report.seconds = time.perf_counter() - started
+        logger.info(f"Imported {len(placements)} users ({queued} queued) in {report.seconds:.2f} s")
+        return report
+
+    async def _user_ids(self, telegram_ids: List[int]) -> Dict[int, int]:
+        """telegram_id -> users.id для существующих пользователей"""
+        user_ids: Dict[int, int] = {}
+        for chunk in _chunks(telegram_ids, _LOOKUP_CHUNK):
+            result = await self.session.execute(_SELECT_USER_IDS, {"telegram_ids": chunk})
+            user_ids.update(result.all())
+        return user_ids
+
+    async def _copy(self, table: Table, columns: Tuple[str, ...], records: List[tuple]):
+        """COPY в PostgreSQL (asyncpg), пакетный INSERT в остальных базах; в транзакции сессии"""
+        connection = await self.session.connection()
+        if connection.dialect.driver == "asyncpg":
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                table.name,
+                records=records,
+                columns=columns,
+                schema_name=table.schema
+            )
+        else:
+            await self.session.execute(insert(table), [dict(zip(columns, record)) for record in records])
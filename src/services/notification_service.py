@@ -1,55 +1,77 @@
 """
 Сервис для отправки уведомлений
 """
+import asyncio
+import logging
 from aiogram import Bot
 from typing import List
 from src.config import MESSAGES
+from src.core.send_queue import Lane, get_send_queue
+
+logger = logging.getLogger(__name__)
 
 
 class NotificationService:
-    """Сервис для отправки уведомлений пользователям"""
+    """Сервис для отправки уведомлений пользователям (через очередь отправки бота)"""
 
     def __init__(self, bot: Bot):
         self.bot = bot
+        self.send_queue = get_send_queue(bot)
 
     async def send_registration_complete(
             self,
             telegram_id: int,
             channel_username: str,
-            position: int
+            position: int,
+            estimate: str = ""
     ):
-        """Уведомление об успешной регистрации"""
+        """Уведомление об успешной регистрации (estimate — строка с ориентировочным временем)"""
         message = MESSAGES["registration_complete"].format(
             channel=channel_username,
             position=position
         )
-        await self.bot.send_message(telegram_id, message)
+        await self.send_queue.send_message(telegram_id, message + estimate)
 
-    async def send_queue_updated(self, telegram_id: int, position: int):
-        """Уведомление об изменении позиции в очереди"""
+    async def send_queue_updated(self, telegram_id: int, position: int, estimate: str = ""):
+        """Уведомление об изменении позиции в очереди (неотправленное прежнее заменяется)"""
         message = MESSAGES["queue_updated"].format(position=position)
-        await self.bot.send_message(telegram_id, message)
+        await self.send_queue.send_message(telegram_id, message + estimate, dedup_key="queue_updated")
+
+    async def send_slot_reminder(self, telegram_id: int, position: int, window: str):
+        """Напоминание о приближении времени обслуживания"""
+        message = MESSAGES["slot_reminder"].format(position=position, window=window)
+        await self.send_queue.send_message(telegram_id, message)
+
+    async def send_waitlisted(self, telegram_id: int, position: int):
+        """Уведомление о попадании в лист ожидания"""
+        message = MESSAGES["waitlisted"].format(position=position)
+        await self.send_queue.send_message(telegram_id, message)
+
+    async def send_promoted_from_waitlist(self, telegram_id: int, position: int):
+        """Уведомление о переводе из листа ожидания в очередь"""
+        message = MESSAGES["promoted_from_waitlist"].format(position=position)
+        await self.send_queue.send_message(telegram_id, message)
 
     async def send_service_completed(self, telegram_id: int):
         """Уведомление о завершении обслуживания"""
         message = MESSAGES["service_completed"]
-        await self.bot.send_message(telegram_id, message)
+        await self.send_queue.send_message(telegram_id, message)
 
     async def broadcast_message(self, telegram_ids: List[int], message: str):
-        """Массовая рассылка сообщений"""
-        success_count = 0
-        fail_count = 0
+        """Массовая рассылка сообщений (полоса рассылок, после транзакционных уведомлений)"""
+        results = await asyncio.gather(*(
+            self.send_queue.send_message(telegram_id, message, lane=Lane.BROADCAST)
+            for telegram_id in telegram_ids
+        ), return_exceptions=True)
 
-        for telegram_id in telegram_ids:
-            try:
-                await self.bot.send_message(telegram_id, message)
-                success_count += 1
-            except Exception as e:
+        fail_count = 0
+        for telegram_id, result in zip(telegram_ids, results):
+            if isinstance(result, Exception):
                 fail_count += 1
-                print(f"Failed to send to {telegram_id}: {e}")
+                logger.warning(f"Failed to send to {telegram_id}: {result}")
 
         return {
-            "success": success_count,
+            "success": len(telegram_ids) - fail_count,
             "failed": fail_count,
             "total": len(telegram_ids)
         }
@@ -0,0 +1,226 @@
+"""
+Реестр категорий (причин вступления) и их приоритетов
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple
+
+from sqlalchemy import select, update, func, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database.models import Reason
+from src.services.queue_service import QueueService
+from src.services.queue_registry import queue_registry
+from src.config import REASONS
+
+logger = logging.getLogger(__name__)
+
+# Приоритет для неизвестной категории
+DEFAULT_PRIORITY = 999
+
+
+@dataclass(frozen=True)
+class ReasonInfo:
+    """Снимок категории из реестра"""
+    key: str
+    name: str
+    priority: int
+    requires_document: bool
+    aging_interval_minutes: Optional[int] = None
+    min_priority: int = 1
+    # None — категория доступна во всех очередях
+    queue_id: Optional[int] = None
+
+    def available_in(self, queue_id: int) -> bool:
+        """Доступна ли категория в очереди"""
+        return self.queue_id is None or self.queue_id == queue_id
+
+
+def _defaults() -> Dict[str, ReasonInfo]:
+    """Категории из конфигурации (используются до загрузки и для начального заполнения БД)"""
+    return {
+        key: ReasonInfo(
+            key=key,
+            name=data["name"],
+            priority=data["priority"],
+            requires_document=data["requires_document"],
+            aging_interval_minutes=data.get("aging_interval_minutes"),
+            min_priority=data.get("min_priority", 1)
+        )
+        for key, data in REASONS.items()
+    }
+
+
+class PriorityRegistry:
+    """Индекс категорий в памяти с горячей перезагрузкой из БД.
+
+    Чтение (get, priority_for, name_for) не обращается к БД. Изменения в
+    таблице reasons подхватываются фоновой задачей по отпечатку
+    (количество строк, max(updated_at)).
+    """
+
+    def __init__(self):
+        self._reasons: Dict[str, ReasonInfo] = {}
+        self._ordered: List[ReasonInfo] = []
+        self._priorities: List[int] = []
+        # Срезы по очередям: (категории, приоритеты), строятся при первом обращении
+        self._by_queue: Dict[int, Tuple[List[ReasonInfo], List[int]]] = {}
+        self._fingerprint: Optional[Tuple[int, Optional[datetime]]] = None
+        self._tasks: List[asyncio.Task] = []
+        self._index(_defaults())
+
+    def _index(self, reasons: Dict[str, ReasonInfo]):
+        """Перестроение индексов (атомарная замена ссылок)"""
+        ordered = sorted(reasons.values(), key=lambda r: (r.priority, r.key))
+        self._reasons = reasons
+        self._ordered = ordered
+        self._priorities = sorted({r.priority for r in ordered})
+        self._by_queue = {}
+
+    def get(self, key: str) -> Optional[ReasonInfo]:
+        """Категория по ключу"""
+        return self._reasons.get(key)
+
+    def priority_for(self, key: str) -> int:
+        """Базовый приоритет категории"""
+        reason = self._reasons.get(key)
+        return reason.priority if reason else DEFAULT_PRIORITY
+
+    def name_for(self, key: str) -> str:
+        """Название категории (ключ, если категория неизвестна)"""
+        reason = self._reasons.get(key)
+        return reason.name if reason else key
+
+    def all(self, queue_id: Optional[int] = None) -> List[ReasonInfo]:
+        """Активные категории в порядке приоритета (все или доступные в очереди)"""
+        if queue_id is None:
+            return self._ordered
+        return self._for_queue(queue_id)[0]
+
+    def priorities(self, queue_id: Optional[int] = None) -> List[int]:
+        """Используемые значения приоритета по возрастанию (все или в очереди)"""
+        if queue_id is None:
+            return self._priorities
+        return self._for_queue(queue_id)[1]
+
+    def _for_queue(self, queue_id: int) -> Tuple[List[ReasonInfo], List[int]]:
+        by_queue = self._by_queue
+        cached = by_queue.get(queue_id)
+        if cached is None:
+            ordered = [r for r in self._ordered if r.available_in(queue_id)]
+            cached = by_queue[queue_id] = (ordered, sorted({r.priority for r in ordered}))
+        return cached
+
+    async def load(self, session_maker: async_sessionmaker):
+        """Загрузка категорий из БД; пустая таблица заполняется из конфигурации"""
+        async with session_maker() as session:
+            fingerprint = await self._get_fingerprint(session)
+
+            if fingerprint[0] == 0:
+                await session.execute(insert(Reason), [
+                    {
+                        "key": r.key,
+                        "name": r.name,
+                        "priority": r.priority,
+                        "requires_document": r.requires_document,
+                        "aging_interval_minutes": r.aging_interval_minutes,
+                        "min_priority": r.min_priority,
+                    }
+                    for r in _defaults().values()
+                ])
+                await session.commit()
+                fingerprint = await self._get_fingerprint(session)
+
+            result = await session.execute(select(Reason).where(Reason.is_active == True))
+            reasons = {
+                row.key: ReasonInfo(
+                    key=row.key,
+                    name=row.name,
+                    priority=row.priority,
+                    requires_document=row.requires_document,
+                    aging_interval_minutes=row.aging_interval_minutes,
+                    min_priority=row.min_priority,
+                    queue_id=row.queue_id
+                )
+                for row in result.scalars().all()
+            }
+
+        self._index(reasons)
+        self._fingerprint = fingerprint
+        logger.info(f"Priority registry loaded: {len(reasons)} reasons")
+
+    async def reload_if_changed(self, session_maker: async_sessionmaker) -> bool:
+        """Перезагрузка, если таблица категорий изменилась"""
+        async with session_maker() as session:
+            fingerprint = await self._get_fingerprint(session)
+
+        if fingerprint == self._fingerprint:
+            return False
+
+        await self.load(session_maker)
+        return True
+
+    @staticmethod
+    async def _get_fingerprint(session: AsyncSession) -> Tuple[int, Optional[datetime]]:
+        result = await session.execute(select(func.count(Reason.key), func.max(Reason.updated_at)))
+        count, last_update = result.one()
+        return count, last_update
+
+    async def start(
+            self,
+            session_maker: async_sessionmaker,
+            reload_interval: float,
+            aging_interval: Optional[float] = None
+    ):
+        """Загрузка и запуск фоновых задач: перезагрузки и (опционально) старения"""
+        await self.load(session_maker)
+        if not self._tasks:
+            self._tasks.append(asyncio.create_task(self._reload_loop(session_maker, reload_interval)))
+            if aging_interval:
+                self._tasks.append(asyncio.create_task(self._aging_loop(session_maker, aging_interval)))
+
+    async def stop(self):
+        """Остановка фоновых задач"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _reload_loop(self, session_maker: async_sessionmaker, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await self.reload_if_changed(session_maker):
+                    logger.info("Priority registry reloaded")
+            except Exception as e:
+                logger.error(f"Failed to reload priority registry: {e}")
+
+    async def _aging_loop(self, session_maker: async_sessionmaker, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            # Очереди по одной, каждая в своей транзакции: блокируется только ее queue_state
+            for queue in queue_registry.all():
+                try:
+                    async with session_maker() as session:
+                        aged = await QueueService(session, queue.id).apply_aging(self.all(queue.id))
+                    if aged:
+                        logger.info(f"Aging job improved priority of {aged} entries in queue {queue.key}")
+                except Exception as e:
+                    logger.error(f"Aging job failed for queue {queue.key}: {e}")
+
+
+async def update_reason(session: AsyncSession, key: str, **values) -> bool:
+    """Изменение категории в БД (остальные процессы подхватят его при перезагрузке)"""
+    result = await session.execute(
+        update(Reason)
+        .where(Reason.key == key)
+        .values(updated_at=func.now(), **values)
+    )
+    await session.commit()
+    return result.rowcount > 0
+
+
+# Реестр процесса
+priority_registry = PriorityRegistry()
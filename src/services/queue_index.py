@@ -0,0 +1,95 @@
+"""
+Индекс активной очереди в памяти
+
+Хранит отсортированный по (priority, position) список активных записей и
+отвечает на запросы ранга и срезов за O(log n) без обращения к таблице
+queue. Источником истины остается БД: каждая мутация очереди в одной
+транзакции увеличивает queue_state.version, а индекс помнит версию, из
+которой построен. Перед чтением сверяется версия (чтение одной строки по
+первичному ключу); при расхождении — например, после изменений из другого
+процесса — индекс перестраивается. У каждой очереди свой индекс (и своя
+версия в queue_state); индекс создается при первом обращении к очереди.
+"""
+from bisect import bisect_left
+from typing import Optional, List, Dict, Tuple, Iterable
+
+from src.database.models import DEFAULT_QUEUE_ID
+
+# (priority, position, entry_id, user_id)
+IndexEntry = Tuple[int, int, int, int]
+
+
+class QueueIndex:
+    """Отсортированный индекс активных записей очереди"""
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self._entries: List[IndexEntry] = []
+        self._by_user: Dict[int, IndexEntry] = {}
+
+    def rebuild(self, rows: Iterable[Tuple[int, int, int, int]], version: int):
+        """Перестроение из строк (entry_id, user_id, priority, position)"""
+        if self.version is not None and version < self.version:
+            # Более свежий снимок уже загружен конкурирующей задачей
+            return
+
+        entries = sorted((priority, position, entry_id, user_id) for entry_id, user_id, priority, position in rows)
+        self._entries = entries
+        self._by_user = {entry[3]: entry for entry in entries}
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """Позиция пользователя в очереди (с 1)"""
+        entry = self._by_user.get(user_id)
+        if entry is None:
+            return None
+        return bisect_left(self._entries, entry) + 1
+
+    def head(self, limit: Optional[int] = None) -> List[IndexEntry]:
+        """Начало очереди"""
+        return self._entries[:limit] if limit else list(self._entries)
+
+    def by_priority(self, priority: int) -> List[IndexEntry]:
+        """Записи одного приоритета в порядке позиций"""
+        start = bisect_left(self._entries, (priority,))
+        end = bisect_left(self._entries, (priority + 1,))
+        return self._entries[start:end]
+
+    def page(self, priority: Optional[int], offset: int, limit: int) -> List[IndexEntry]:
+        """Срез всей очереди (priority=None) или одного приоритета"""
+        if priority is None:
+            return self._entries[offset:offset + limit]
+        start = bisect_left(self._entries, (priority,)) + offset
+        end = min(start + limit, bisect_left(self._entries, (priority + 1,)))
+        return self._entries[start:end]
+
+    def count_by_priority(self) -> Dict[int, int]:
+        """Количество записей по приоритетам"""
+        counts: Dict[int, int] = {}
+        for entry in self._entries:
+            counts[entry[0]] = counts.get(entry[0], 0) + 1
+        return counts
+
+
+# Индексы процесса по очередям; None — режим выключен (QUEUE_INDEX_ENABLED)
+_queue_indexes: Optional[Dict[int, QueueIndex]] = None
+
+
+def enable_queue_index():
+    """Включение индексов в текущем процессе"""
+    global _queue_indexes
+    if _queue_indexes is None:
+        _queue_indexes = {}
+
+
+def get_queue_index(queue_id: int = DEFAULT_QUEUE_ID) -> Optional[QueueIndex]:
+    """Индекс очереди, если режим включен (создается при первом обращении)"""
+    if _queue_indexes is None:
+        return None
+    index = _queue_indexes.get(queue_id)
+    if index is None:
+        index = _queue_indexes[queue_id] = QueueIndex()
+    return index
@@ -0,0 +1,174 @@
+"""
+Реестр очередей (пунктов обслуживания)
+
+Один процесс ботов обслуживает все очереди из таблицы queues: у каждой
+свой канал, вместимость, категории, строка queue_state и кэши в памяти.
+Очередь по умолчанию (id = 1) создается при запуске и берет канал и
+вместимость из окружения (CHANNEL_ID, CHANNEL_USERNAME, MAX_QUEUE_SIZE).
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple
+
+from sqlalchemy import select, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database.models import ServiceQueue, QueueState, DEFAULT_QUEUE_ID
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QueueInfo:
+    """Снимок очереди из реестра (пустые поля заменены значениями из окружения)"""
+    id: int
+    key: str
+    name: str
+    channel_id: int
+    channel_username: str
+    max_size: int
+
+
+class QueueRegistry:
+    """Очереди в памяти с горячей перезагрузкой из БД.
+
+    Чтение не обращается к БД. Изменения в таблице queues подхватываются
+    фоновой задачей по отпечатку (количество строк, max(updated_at)).
+    """
+
+    def __init__(self):
+        self._queues: Dict[int, QueueInfo] = {}
+        self._by_key: Dict[str, QueueInfo] = {}
+        self._ordered: List[QueueInfo] = []
+        self._fingerprint: Optional[Tuple[int, Optional[datetime]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _index(self, queues: Dict[int, QueueInfo]):
+        """Перестроение индексов (атомарная замена ссылок)"""
+        self._queues = queues
+        self._by_key = {queue.key: queue for queue in queues.values()}
+        self._ordered = sorted(queues.values(), key=lambda q: q.id)
+
+    def get(self, queue_id: int) -> Optional[QueueInfo]:
+        """Очередь по id"""
+        return self._queues.get(queue_id)
+
+    def by_key(self, key: str) -> Optional[QueueInfo]:
+        """Очередь по ключу из ссылки /start <key>"""
+        return self._by_key.get(key)
+
+    def all(self) -> List[QueueInfo]:
+        """Все активные очереди по id"""
+        return self._ordered
+
+    def max_size_for(self, queue_id: int) -> int:
+        """Вместимость очереди (0 — без ограничения)"""
+        queue = self._queues.get(queue_id)
+        return queue.max_size if queue else get_settings().MAX_QUEUE_SIZE
+
+    def channel_for(self, queue_id: int) -> Tuple[int, str]:
+        """Канал очереди: (id, username)"""
+        queue = self._queues.get(queue_id)
+        if queue is None:
+            settings = get_settings()
+            return settings.CHANNEL_ID, settings.CHANNEL_USERNAME
+        return queue.channel_id, queue.channel_username
+
+    async def load(self, session_maker: async_sessionmaker):
+        """Загрузка очередей из БД; недостающие строки queue_state создаются"""
+        settings = get_settings()
+        async with session_maker() as session:
+            fingerprint = await self._get_fingerprint(session)
+
+            result = await session.execute(select(ServiceQueue).where(ServiceQueue.is_active == True))
+            queues = {
+                row.id: QueueInfo(
+                    id=row.id,
+                    key=row.key,
+                    name=row.name,
+                    channel_id=row.channel_id if row.channel_id is not None else settings.CHANNEL_ID,
+                    channel_username=row.channel_username or settings.CHANNEL_USERNAME,
+                    max_size=row.max_size if row.max_size is not None else settings.MAX_QUEUE_SIZE
+                )
+                for row in result.scalars().all()
+            }
+
+            result = await session.execute(select(QueueState.id))
+            missing = set(queues) - set(result.scalars().all())
+            if missing:
+                await session.execute(insert(QueueState), [
+                    {"id": queue_id, "version": 0, "in_queue_count": 0} for queue_id in sorted(missing)
+                ])
+                await session.commit()
+
+        if DEFAULT_QUEUE_ID not in queues:
+            logger.warning("Default queue is missing or inactive")
+
+        self._index(queues)
+        self._fingerprint = fingerprint
+        logger.info(f"Queue registry loaded: {len(queues)} queues")
+
+    async def reload_if_changed(self, session_maker: async_sessionmaker) -> bool:
+        """Перезагрузка, если таблица очередей изменилась"""
+        async with session_maker() as session:
+            fingerprint = await self._get_fingerprint(session)
+
+        if fingerprint == self._fingerprint:
+            return False
+
+        await self.load(session_maker)
+        return True
+
+    @staticmethod
+    async def _get_fingerprint(session: AsyncSession) -> Tuple[int, Optional[datetime]]:
+        result = await session.execute(select(func.count(ServiceQueue.id), func.max(ServiceQueue.updated_at)))
+        count, last_update = result.one()
+        return count, last_update
+
+    async def start(self, session_maker: async_sessionmaker, reload_interval: float):
+        """Загрузка и запуск фоновой перезагрузки"""
+        await self.load(session_maker)
+        if self._task is None:
+            self._task = asyncio.create_task(self._reload_loop(session_maker, reload_interval))
+
+    async def stop(self):
+        """Остановка фоновой перезагрузки"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _reload_loop(self, session_maker: async_sessionmaker, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await self.reload_if_changed(session_maker):
+                    logger.info("Queue registry reloaded")
+            except Exception as e:
+                logger.error(f"Failed to reload queue registry: {e}")
+
+
+async def create_queue(
+        session: AsyncSession,
+        key: str,
+        name: str,
+        channel_id: Optional[int] = None,
+        max_size: Optional[int] = None
+) -> int:
+    """Новая очередь в БД (остальные процессы подхватят ее при перезагрузке)"""
+    result = await session.execute(
+        insert(ServiceQueue)
+        .values(key=key, name=name, channel_id=channel_id, max_size=max_size)
+        .returning(ServiceQueue.id)
+    )
+    queue_id = result.scalar_one()
+    await session.execute(insert(QueueState).values(id=queue_id, version=0, in_queue_count=0))
+    await session.commit()
+    return queue_id
+
+
+# Реестр процесса
+queue_registry = QueueRegistry()
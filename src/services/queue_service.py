@@ -2,23 +2,429 @@
 Сервис для работы с очередью
 """
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, and_, func
-from typing import Optional, List, Tuple
-from src.database.models import Queue, User, QueueStatus
+from sqlalchemy import select, update, and_, or_, func, bindparam, Integer
+from sqlalchemy.orm import aliased
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Tuple, Iterable, Dict
+from src.database.models import Queue, User, QueueStatus, QueueState, DEFAULT_QUEUE_ID
+from src.services.queue_index import QueueIndex, get_queue_index
+from src.services.queue_registry import queue_registry
+from src.core.metrics import CACHE_REQUESTS
+
+
+# Часто выполняемые запросы строятся один раз при импорте модуля: SQLAlchemy
+# запоминает ключ кэша у неизменяемого объекта, поэтому на вызов остается
+# только подстановка параметров и поиск в кэше скомпилированных запросов.
+
+_IN_QUEUE = QueueStatus.IN_QUEUE.value
+_WAITLISTED = QueueStatus.WAITLISTED.value
+
+# Каждый запрос ограничен одной очередью: id очереди подставляет QueueService
+# (строка queue_state очереди имеет тот же id).
+# Параметры, имя которых совпадает с колонкой таблицы, SQLAlchemy в UPDATE
+# считает значениями SET, поэтому в условиях используются имена b_<колонка>
+_QUEUE_ID = bindparam("b_queue_id", type_=Integer)
+_THIS_QUEUE = Queue.queue_id == _QUEUE_ID
+
+_SELECT_NEXT_POSITION = (
+    select(func.max(Queue.position))
+    .where(
+        and_(
+            _THIS_QUEUE,
+            Queue.priority == bindparam("priority"),
+            Queue.status == _IN_QUEUE
+        )
+    )
+)
+
+# populate_existing: строки меняются UPDATE-запросами в обход ORM, поэтому
+# объект из identity map сессии перезаписывается свежими значениями
+_SELECT_ENTRY_BY_USER = (
+    select(Queue)
+    .where(
+        and_(
+            _THIS_QUEUE,
+            Queue.user_id == bindparam("user_id"),
+            Queue.status == _IN_QUEUE
+        )
+    )
+    .execution_options(populate_existing=True)
+)
+
+def _position_query(status: str):
+    """Позиция одним запросом: количество записей впереди по (priority, position)"""
+    me = aliased(Queue, name="me")
+    return (
+        select(me.id, func.count(Queue.id))
+        .select_from(me)
+        .outerjoin(
+            Queue,
+            and_(
+                Queue.queue_id == me.queue_id,
+                Queue.status == status,
+                or_(
+                    Queue.priority < me.priority,
+                    and_(
+                        Queue.priority == me.priority,
+                        Queue.position < me.position
+                    )
+                )
+            )
+        )
+        .where(
+            and_(
+                me.queue_id == _QUEUE_ID,
+                me.user_id == bindparam("user_id"),
+                me.status == status
+            )
+        )
+        .group_by(me.id)
+    )
+
+
+_SELECT_USER_POSITION = _position_query(_IN_QUEUE)
+
+_SELECT_WAITLIST_POSITION = _position_query(_WAITLISTED)
+
+_SELECT_FULL_QUEUE = (
+    select(Queue, User)
+    .join(User, Queue.user_id == User.id)
+    .where(_THIS_QUEUE, Queue.status == _IN_QUEUE)
+    .order_by(Queue.priority.asc(), Queue.position.asc())
+)
+
+_SELECT_FULL_QUEUE_LIMITED = _SELECT_FULL_QUEUE.limit(bindparam("limit", type_=Integer))
+
+_SELECT_QUEUE_BY_PRIORITY = (
+    select(Queue, User)
+    .join(User, Queue.user_id == User.id)
+    .where(
+        and_(
+            _THIS_QUEUE,
+            Queue.status == _IN_QUEUE,
+            Queue.priority == bindparam("priority")
+        )
+    )
+    .order_by(Queue.position.asc())
+)
+
+_SELECT_FULL_QUEUE_PAGE = (
+    _SELECT_FULL_QUEUE
+    .offset(bindparam("offset", type_=Integer))
+    .limit(bindparam("limit", type_=Integer))
+)
+
+_SELECT_QUEUE_BY_PRIORITY_PAGE = (
+    _SELECT_QUEUE_BY_PRIORITY
+    .offset(bindparam("offset", type_=Integer))
+    .limit(bindparam("limit", type_=Integer))
+)
+
+def _next_position_for(priority):
+    """Позиция в конце группы приоритета (подзапрос внутри UPDATE)"""
+    other = aliased(Queue, name="other")
+    return (
+        select(func.coalesce(func.max(other.position), 0) + 1)
+        .where(
+            and_(
+                other.queue_id == Queue.queue_id,
+                other.priority == priority,
+                other.status == _IN_QUEUE
+            )
+        )
+        .scalar_subquery()
+    )
+
+
+# Смена приоритета сравнением с обменом: проходит, только если запись не
+# менялась с момента чтения (version), и сразу ставит ее в конец новой группы
+_CAS_PRIORITY = (
+    update(Queue)
+    .where(
+        and_(
+            Queue.id == bindparam("entry_id"),
+            Queue.version == bindparam("expected_version"),
+            Queue.status == _IN_QUEUE
+        )
+    )
+    .values(
+        priority=bindparam("new_priority"),
+        position=_next_position_for(bindparam("new_priority")),
+        version=Queue.version + 1,
+        updated_at=func.now()
+    )
+    .returning(Queue.priority)
+    .execution_options(synchronize_session=False)
+)
+
+# Относительное изменение приоритета одним UPDATE: новое значение считает
+# БД от текущего, поэтому одновременные нажатия не теряются
+_SHIFTED_PRIORITY = Queue.priority + bindparam("delta", type_=Integer)
+
+_SHIFT_PRIORITY = (
+    update(Queue)
+    .where(
+        and_(
+            _THIS_QUEUE,
+            Queue.user_id == bindparam("b_user_id"),
+            Queue.status == _IN_QUEUE,
+            _SHIFTED_PRIORITY >= bindparam("min_priority", type_=Integer)
+        )
+    )
+    .values(
+        priority=_SHIFTED_PRIORITY,
+        position=_next_position_for(_SHIFTED_PRIORITY),
+        version=Queue.version + 1,
+        updated_at=func.now()
+    )
+    .returning(Queue.priority)
+    .execution_options(synchronize_session=False)
+)
+
+_UPDATE_POSITION = (
+    update(Queue)
+    .where(Queue.id == bindparam("entry_id"))
+    .values(position=bindparam("new_position"), updated_at=func.now())
+)
+
+_UPDATE_ACTIVE_STATUS = (
+    update(Queue)
+    .where(
+        and_(
+            _THIS_QUEUE,
+            Queue.user_id == bindparam("b_user_id"),
+            Queue.status == _IN_QUEUE
+        )
+    )
+    .values(status=bindparam("new_status"), version=Queue.version + 1, updated_at=func.now())
+)
+
+_UPDATE_WAITLISTED_STATUS = (
+    update(Queue)
+    .where(
+        and_(
+            _THIS_QUEUE,
+            Queue.user_id == bindparam("b_user_id"),
+            Queue.status == _WAITLISTED
+        )
+    )
+    .values(status=bindparam("new_status"), version=Queue.version + 1, updated_at=func.now())
+)
+
+# Контроль вместимости по счетчику в queue_state вместо COUNT(*):
+# место резервируется условным UPDATE, который не пройдет при заполненной очереди
+_RESERVE_SLOT = (
+    update(QueueState)
+    .where(
+        and_(
+            QueueState.id == _QUEUE_ID,
+            QueueState.in_queue_count < bindparam("max_size")
+        )
+    )
+    .values(in_queue_count=QueueState.in_queue_count + 1)
+    .returning(QueueState.in_queue_count)
+)
+
+_ADJUST_COUNT = (
+    update(QueueState)
+    .where(QueueState.id == _QUEUE_ID)
+    .values(in_queue_count=QueueState.in_queue_count + bindparam("delta"))
+    .returning(QueueState.in_queue_count)
+)
+
+_SYNC_COUNT = (
+    update(QueueState)
+    .where(QueueState.id == _QUEUE_ID)
+    .values(
+        in_queue_count=select(func.count(Queue.id))
+        .where(_THIS_QUEUE, Queue.status == _IN_QUEUE)
+        .scalar_subquery()
+    )
+)
+
+_SELECT_NEXT_WAITLIST_POSITION = select(func.max(Queue.position)).where(_THIS_QUEUE, Queue.status == _WAITLISTED)
+
+_NO_LIMIT = 2 ** 31 - 1
+
+_SELECT_WAITLIST_HEAD = (
+    select(Queue.id)
+    .where(_THIS_QUEUE, Queue.status == _WAITLISTED)
+    .order_by(Queue.priority.asc(), Queue.position.asc(), Queue.id.asc())
+    .limit(bindparam("limit", type_=Integer))
+)
+
+_SELECT_ACTIVE_ORDERED = (
+    select(Queue.id, Queue.user_id, Queue.priority, Queue.position)
+    .where(_THIS_QUEUE, Queue.status == _IN_QUEUE)
+    .order_by(Queue.priority.asc(), Queue.position.asc(), Queue.id.asc())
+)
+
+_SELECT_QUEUE_BY_IDS = (
+    select(Queue, User)
+    .join(User, Queue.user_id == User.id)
+    .where(Queue.id.in_(bindparam("ids", expanding=True)))
+)
+
+_SELECT_VERSION = select(QueueState.version).where(QueueState.id == _QUEUE_ID)
+
+# Блокировка строки queue_state в начале мутации: мутации очереди выполняются
+# по одной, каждый следующий запрос транзакции видит все зафиксированные до
+# нее изменения, а пересчет позиций не пересекается с чужим (и не ловит
+# взаимную блокировку на строках, которые обновляют обе транзакции)
+_LOCK_QUEUE = select(QueueState.id).where(QueueState.id == _QUEUE_ID).with_for_update()
+
+_SELECT_IN_QUEUE_COUNT = select(QueueState.in_queue_count).where(QueueState.id == _QUEUE_ID)
+
+_SELECT_COUNTERS = select(QueueState.in_queue_count, QueueState.served_count).where(QueueState.id == _QUEUE_ID)
+
+# Итоги по завершенным записям: считаются при смене статуса, а не COUNT(*) по
+# таблице — завершенные строки со временем переносятся в queue_archive
+_COUNT_SERVED = (
+    update(QueueState)
+    .where(QueueState.id == _QUEUE_ID)
+    .values(served_count=QueueState.served_count + 1)
+)
+
+_COUNT_REMOVED = (
+    update(QueueState)
+    .where(QueueState.id == _QUEUE_ID)
+    .values(removed_count=QueueState.removed_count + 1)
+)
+
+_BUMP_VERSION = (
+    update(QueueState)
+    .where(QueueState.id == _QUEUE_ID)
+    .values(version=QueueState.version + 1)
+    .returning(QueueState.version)
+)
+
+# Записи, переходящие в группу приоритета (старение, перевод из листа ожидания),
+# встают в ее конец в прежнем относительном порядке; пересчет затем уплотняет позиции
+_APPEND_POSITION_OFFSET = 1_000_000
+
+_AGE_ENTRIES = (
+    update(Queue)
+    .where(
+        and_(
+            _THIS_QUEUE,
+            Queue.status == _IN_QUEUE,
+            Queue.created_at <= bindparam("cutoff"),
+            Queue.priority > bindparam("target"),
+            Queue.user_id.in_(select(User.id).where(User.reason == bindparam("reason")))
+        )
+    )
+    .values(
+        priority=bindparam("target"),
+        position=Queue.position + _APPEND_POSITION_OFFSET,
+        version=Queue.version + 1,
+        updated_at=func.now()
+    )
+    .execution_options(synchronize_session=False)
+)
+
+# Перевод начала листа ожидания в очередь одним UPDATE ... RETURNING: записи встают
+# в конец своей группы приоритета в порядке листа ожидания
+_PROMOTE_WAITLIST_HEAD = (
+    update(Queue)
+    .where(Queue.id.in_(_SELECT_WAITLIST_HEAD.scalar_subquery()))
+    .values(
+        status=_IN_QUEUE,
+        position=Queue.position + _APPEND_POSITION_OFFSET,
+        version=Queue.version + 1,
+        updated_at=func.now()
+    )
+    .returning(Queue.user_id)
+    .execution_options(synchronize_session=False)
+)
+
+_SELECT_GROUP_TAILS = (
+    select(Queue.priority, func.max(Queue.position))
+    .where(_THIS_QUEUE, Queue.status == _IN_QUEUE)
+    .group_by(Queue.priority)
+)
+
+_COUNT_BY_STATUS = select(func.count(Queue.id)).where(_THIS_QUEUE, Queue.status == bindparam("status"))
+
+_COUNT_BY_PRIORITY = (
+    select(Queue.priority, func.count(Queue.id))
+    .where(_THIS_QUEUE, Queue.status == _IN_QUEUE)
+    .group_by(Queue.priority)
+)
+
+# Очередь, в которой стоит пользователь (активная запись или лист ожидания)
+_SELECT_USER_QUEUE = (
+    select(Queue.queue_id)
+    .where(
+        and_(
+            Queue.user_id == bindparam("user_id"),
+            Queue.status.in_((_IN_QUEUE, _WAITLISTED))
+        )
+    )
+    .limit(1)
+)
+
+# Глубина и версии всех очередей одним запросом (метрики, планировщик слотов)
+_SELECT_DEPTHS = select(QueueState.id, QueueState.in_queue_count)
+
+_SELECT_VERSIONS = select(QueueState.id, QueueState.version)
+
+# Моменты обслуживания за период (индекс по (status, updated_at)); за часы,
+# а не дни, поэтому записи еще не перенесены в queue_archive
+_SELECT_SERVED_TIMES = (
+    select(Queue.updated_at)
+    .where(
+        and_(
+            _THIS_QUEUE,
+            Queue.status == QueueStatus.SERVED.value,
+            Queue.updated_at >= bindparam("since")
+        )
+    )
+    .order_by(Queue.updated_at.asc())
+)
+
+
+class StaleQueueEntryError(Exception):
+    """Запись очереди изменилась после чтения (не совпала версия)"""
 
 
 class QueueService:
     """Сервис для управления очередью"""
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, queue_id: int = DEFAULT_QUEUE_ID):
         self.session = session
+        self.queue_id = queue_id
+        # ID пользователей (users.id), переведенных из листа ожидания последней операцией
+        self.promoted_user_ids: List[int] = []
+
+    @classmethod
+    async def for_user(cls, session: AsyncSession, user_id: int) -> "QueueService":
+        """Сервис очереди, в которой стоит пользователь (очередь по умолчанию, если ни в какой)"""
+        result = await session.execute(_SELECT_USER_QUEUE, {"user_id": user_id})
+        return cls(session, result.scalar() or DEFAULT_QUEUE_ID)
+
+    @property
+    def max_size(self) -> int:
+        """Вместимость очереди (0 — без ограничения)"""
+        return queue_registry.max_size_for(self.queue_id)
+
+    async def _execute(self, statement, params: Optional[dict] = None):
+        """Выполнение запроса в рамках очереди сервиса"""
+        return await self.session.execute(statement, {"b_queue_id": self.queue_id, **(params or {})})
 
     async def add_to_queue(self, user_id: int, priority: int) -> Queue:
-        """Добавление пользователя в очередь"""
+        """Добавление пользователя в очередь.
+
+        Если очередь заполнена (max_size очереди, по умолчанию MAX_QUEUE_SIZE),
+        запись попадает в лист ожидания со статусом waitlisted.
+        """
+        if not await self._reserve_slot():
+            return await self._add_to_waitlist(user_id, priority)
+
         # Получаем последнюю позицию для данного приоритета
         position = await self._get_next_position(priority)
 
         queue_entry = Queue(
+            queue_id=self.queue_id,
             user_id=user_id,
             priority=priority,
             position=position,
@@ -26,131 +432,277 @@ class QueueService:
         )
 
         self.session.add(queue_entry)
-        await self.session.commit()
-        await self.session.refresh(queue_entry)
+        await self.session.flush()
 
-        # Пересчитываем все позиции
+        # Пересчитываем все позиции (фиксирует транзакцию)
         await self._recalculate_positions()
 
         return queue_entry
 
+    async def _reserve_slot(self) -> bool:
+        """Резервирование места в очереди по счетчику"""
+        max_size = self.max_size
+        if max_size <= 0:
+            await self._execute(_ADJUST_COUNT, {"delta": 1})
+            return True
+
+        result = await self._execute(_RESERVE_SLOT, {"max_size": max_size})
+        return result.first() is not None
+
+    async def _add_to_waitlist(self, user_id: int, priority: int) -> Queue:
+        """Добавление в лист ожидания"""
+        result = await self._execute(_SELECT_NEXT_WAITLIST_POSITION)
+        position = (result.scalar() or 0) + 1
+
+        queue_entry = Queue(
+            queue_id=self.queue_id,
+            user_id=user_id,
+            priority=priority,
+            position=position,
+            status=QueueStatus.WAITLISTED.value
+        )
+
+        self.session.add(queue_entry)
+        await self.session.commit()
+        return queue_entry
+
+    async def _release_slot(self):
+        """Освобождение места и пакетный перевод из листа ожидания (без фиксации)"""
+        count = (await self._execute(_ADJUST_COUNT, {"delta": -1})).scalar_one()
+
+        max_size = self.max_size
+        free = max_size - count if max_size > 0 else None
+        if free is not None and free <= 0:
+            return
+
+        result = await self._execute(_PROMOTE_WAITLIST_HEAD, {"limit": free or _NO_LIMIT})
+        promoted = list(result.scalars().all())
+        if not promoted:
+            return
+
+        await self._execute(_ADJUST_COUNT, {"delta": len(promoted)})
+        self.promoted_user_ids = promoted
+
+    async def begin_bulk_append(self) -> Tuple[Dict[int, int], int, Optional[int]]:
+        """Начало массовой загрузки в конец очереди (блокирует мутации до фиксации).
+
+        Возвращает последние позиции по приоритетам, последнюю позицию листа
+        ожидания и число свободных мест (None — без ограничения).
+        """
+        await self._lock()
+        tails = dict((await self._execute(_SELECT_GROUP_TAILS)).all())
+        waitlist_tail = (await self._execute(_SELECT_NEXT_WAITLIST_POSITION)).scalar() or 0
+
+        free = None
+        if self.max_size > 0:
+            free = max(self.max_size - await self.get_in_queue_count(), 0)
+        return tails, waitlist_tail, free
+
+    async def finish_bulk_append(self, in_queue_added: int):
+        """Фиксация массовой загрузки: счетчик и версия очереди (индексы перестроятся по версии)"""
+        if in_queue_added:
+            await self._execute(_ADJUST_COUNT, {"delta": in_queue_added})
+        await self._execute(_BUMP_VERSION)
+        await self.session.commit()
+
+    async def sync_counters(self):
+        """Сверка счетчика очереди с таблицей (при запуске процесса)"""
+        await self._execute(_SYNC_COUNT)
+        await self.session.commit()
+
+    async def get_in_queue_count(self) -> int:
+        """Количество записей в активной очереди (по счетчику)"""
+        return (await self._execute(_SELECT_IN_QUEUE_COUNT)).scalar_one()
+
+    async def get_waitlist_position(self, user_id: int) -> Optional[int]:
+        """Позиция пользователя в листе ожидания"""
+        result = await self._execute(_SELECT_WAITLIST_POSITION, {"user_id": user_id})
+        row = result.first()
+        if row is None:
+            return None
+        return row[1] + 1
+
     async def _get_next_position(self, priority: int) -> int:
         """Получение следующей позиции в очереди для приоритета"""
-        result = await self.session.execute(
-            select(func.max(Queue.position))
-            .where(
-                and_(
-                    Queue.priority == priority,
-                    Queue.status == QueueStatus.IN_QUEUE.value
-                )
-            )
-        )
+        result = await self._execute(_SELECT_NEXT_POSITION, {"priority": priority})
         max_position = result.scalar()
         return (max_position or 0) + 1
 
     async def get_queue_entry_by_user_id(self, user_id: int) -> Optional[Queue]:
         """Получение записи очереди по ID пользователя"""
-        result = await self.session.execute(
-            select(Queue)
-            .where(
-                and_(
-                    Queue.user_id == user_id,
-                    Queue.status == QueueStatus.IN_QUEUE.value
-                )
-            )
-        )
+        result = await self._execute(_SELECT_ENTRY_BY_USER, {"user_id": user_id})
         return result.scalar_one_or_none()
 
+    async def _get_fresh_index(self) -> Optional[QueueIndex]:
+        """Индекс очереди, актуальный на текущую версию БД (или None, если режим выключен)"""
+        index = get_queue_index(self.queue_id)
+        if index is None:
+            return None
+
+        # Сначала версия, затем строки: индекс может оказаться новее своей версии, но не старее
+        version = (await self._execute(_SELECT_VERSION)).scalar_one()
+        if version != index.version:
+            CACHE_REQUESTS.inc(cache="queue_index", result="miss")
+            result = await self._execute(_SELECT_ACTIVE_ORDERED)
+            index.rebuild(result.all(), version)
+        else:
+            CACHE_REQUESTS.inc(cache="queue_index", result="hit")
+        return index
+
+    async def load_index(self):
+        """Построение индекса очереди из БД (при запуске процесса)"""
+        await self._get_fresh_index()
+
+    async def _load_by_index(self, entries) -> List[Tuple[Queue, User]]:
+        """Загрузка записей и пользователей по ID из индекса с сохранением порядка"""
+        if not entries:
+            return []
+        result = await self._execute(_SELECT_QUEUE_BY_IDS, {"ids": [entry[2] for entry in entries]})
+        rows = {queue_entry.id: (queue_entry, user) for queue_entry, user in result.all()}
+        return [rows[entry[2]] for entry in entries if entry[2] in rows]
+
     async def get_user_position(self, user_id: int) -> Optional[int]:
         """Получение позиции пользователя в общей очереди"""
-        queue_entry = await self.get_queue_entry_by_user_id(user_id)
-        if not queue_entry:
-            return None
+        index = await self._get_fresh_index()
+        if index is not None:
+            return index.rank(user_id)
 
         # Подсчитываем количество пользователей впереди
-        result = await self.session.execute(
-            select(func.count(Queue.id))
-            .where(
-                and_(
-                    Queue.status == QueueStatus.IN_QUEUE.value,
-                    (
-                            (Queue.priority < queue_entry.priority) |
-                            (
-                                and_(
-                                    Queue.priority == queue_entry.priority,
-                                    Queue.position < queue_entry.position
-                                )
-                            )
-                    )
-                )
-            )
-        )
-        count = result.scalar()
-        return count + 1
+        result = await self._execute(_SELECT_USER_POSITION, {"user_id": user_id})
+        row = result.first()
+        if row is None:
+            return None
+        return row[1] + 1
 
     async def get_full_queue(self, limit: Optional[int] = None) -> List[Tuple[Queue, User]]:
         """Получение полной очереди с данными пользователей"""
-        query = (
-            select(Queue, User)
-            .join(User, Queue.user_id == User.id)
-            .where(Queue.status == QueueStatus.IN_QUEUE.value)
-            .order_by(Queue.priority.asc(), Queue.position.asc())
-        )
+        index = await self._get_fresh_index()
+        if index is not None:
+            return await self._load_by_index(index.head(limit))
 
         if limit:
-            query = query.limit(limit)
-
-        result = await self.session.execute(query)
+            result = await self._execute(_SELECT_FULL_QUEUE_LIMITED, {"limit": limit})
+        else:
+            result = await self._execute(_SELECT_FULL_QUEUE)
         return list(result.all())
 
     async def get_queue_by_priority(self, priority: int) -> List[Tuple[Queue, User]]:
         """Получение очереди по приоритету"""
-        result = await self.session.execute(
-            select(Queue, User)
-            .join(User, Queue.user_id == User.id)
-            .where(
-                and_(
-                    Queue.status == QueueStatus.IN_QUEUE.value,
-                    Queue.priority == priority
-                )
-            )
-            .order_by(Queue.position.asc())
-        )
+        index = await self._get_fresh_index()
+        if index is not None:
+            return await self._load_by_index(index.by_priority(priority))
+
+        result = await self._execute(_SELECT_QUEUE_BY_PRIORITY, {"priority": priority})
         return list(result.all())
 
-    async def change_user_priority(self, user_id: int, new_priority: int) -> Optional[Queue]:
-        """Изменение приоритета пользователя"""
+    async def get_queue_page(
+            self,
+            priority: Optional[int],
+            offset: int,
+            limit: int
+    ) -> Tuple[List[Tuple[Queue, User]], bool]:
+        """Страница очереди (priority=None — вся очередь) и признак следующей страницы"""
+        index = await self._get_fresh_index()
+        if index is not None:
+            rows = await self._load_by_index(index.page(priority, offset, limit + 1))
+        elif priority is None:
+            result = await self._execute(_SELECT_FULL_QUEUE_PAGE, {"offset": offset, "limit": limit + 1})
+            rows = list(result.all())
+        else:
+            result = await self._execute(
+                _SELECT_QUEUE_BY_PRIORITY_PAGE,
+                {"priority": priority, "offset": offset, "limit": limit + 1}
+            )
+            rows = list(result.all())
+        return rows[:limit], len(rows) > limit
+
+    async def get_active_entries(self) -> List[Tuple[int, int, int, int]]:
+        """Активные записи по порядку обслуживания: (entry_id, user_id, priority, position)"""
+        index = await self._get_fresh_index()
+        if index is not None:
+            return [(entry_id, user_id, priority, position) for priority, position, entry_id, user_id in index.head()]
+
+        result = await self._execute(_SELECT_ACTIVE_ORDERED)
+        return [tuple(row) for row in result.all()]
+
+    async def get_served_times(self, since: datetime) -> List[datetime]:
+        """Моменты обслуживания начиная с since, по возрастанию"""
+        result = await self._execute(_SELECT_SERVED_TIMES, {"since": since})
+        return list(result.scalars().all())
+
+    async def get_version(self) -> int:
+        """Версия очереди: увеличивается каждой мутацией активной очереди"""
+        return (await self._execute(_SELECT_VERSION)).scalar_one()
+
+    async def _lock(self):
+        """Начало мутации: блокировка queue_state до конца транзакции"""
+        await self._execute(_LOCK_QUEUE)
+
+    async def change_user_priority(
+            self,
+            user_id: int,
+            new_priority: int,
+            expected_version: Optional[int] = None
+    ) -> Optional[Queue]:
+        """Изменение приоритета пользователя.
+
+        expected_version — версия записи, по которой принималось решение;
+        если запись с тех пор изменилась, выбрасывается StaleQueueEntryError.
+        """
+        await self._lock()
         queue_entry = await self.get_queue_entry_by_user_id(user_id)
         if not queue_entry:
+            await self.session.commit()
             return None
 
-        # Получаем новую позицию для нового приоритета
-        new_position = await self._get_next_position(new_priority)
-
-        await self.session.execute(
-            update(Queue)
-            .where(Queue.id == queue_entry.id)
-            .values(priority=new_priority, position=new_position)
+        result = await self._execute(
+            _CAS_PRIORITY,
+            {
+                "entry_id": queue_entry.id,
+                "expected_version": queue_entry.version if expected_version is None else expected_version,
+                "new_priority": new_priority,
+            }
         )
-        await self.session.commit()
+        if result.first() is None:
+            await self.session.rollback()
+            raise StaleQueueEntryError(user_id)
 
         # Пересчитываем позиции
         await self._recalculate_positions()
 
         return await self.get_queue_entry_by_user_id(user_id)
 
+    async def shift_priority(self, user_id: int, delta: int, min_priority: int = 1) -> Optional[Tuple[int, int]]:
+        """Относительное изменение приоритета (отрицательное delta — повышение).
+
+        Возвращает (старый, новый) приоритет или None, если пользователя нет
+        в очереди или новый приоритет был бы меньше min_priority.
+        """
+        await self._lock()
+        result = await self._execute(
+            _SHIFT_PRIORITY,
+            {"b_user_id": user_id, "delta": delta, "min_priority": min_priority}
+        )
+        new_priority = result.scalar_one_or_none()
+        if new_priority is None:
+            await self.session.commit()
+            return None
+
+        await self._recalculate_positions()
+        return new_priority - delta, new_priority
+
     async def move_user_position(self, user_id: int, new_position: int) -> Optional[Queue]:
         """Перемещение пользователя на конкретную позицию в рамках его приоритета"""
+        await self._lock()
         queue_entry = await self.get_queue_entry_by_user_id(user_id)
         if not queue_entry:
+            await self.session.commit()
             return None
 
-        await self.session.execute(
-            update(Queue)
-            .where(Queue.id == queue_entry.id)
-            .values(position=new_position)
+        await self._execute(
+            _UPDATE_POSITION,
+            {"entry_id": queue_entry.id, "new_position": new_position}
         )
-        await self.session.commit()
 
         # Пересчитываем позиции
         await self._recalculate_positions()
@@ -159,97 +711,144 @@ class QueueService:
 
     async def mark_as_served(self, user_id: int) -> bool:
         """Отметка пользователя как обслуженного"""
-        result = await self.session.execute(
-            update(Queue)
-            .where(
-                and_(
-                    Queue.user_id == user_id,
-                    Queue.status == QueueStatus.IN_QUEUE.value
-                )
-            )
-            .values(status=QueueStatus.SERVED.value)
+        await self._lock()
+        result = await self._execute(
+            _UPDATE_ACTIVE_STATUS,
+            {"b_user_id": user_id, "new_status": QueueStatus.SERVED.value}
         )
-        await self.session.commit()
 
         if result.rowcount > 0:
+            await self._execute(_COUNT_SERVED)
+            await self._release_slot()
             await self._recalculate_positions()
             return True
+
+        await self.session.commit()
         return False
 
     async def remove_from_queue(self, user_id: int) -> bool:
         """Удаление пользователя из очереди"""
-        result = await self.session.execute(
-            update(Queue)
-            .where(
-                and_(
-                    Queue.user_id == user_id,
-                    Queue.status == QueueStatus.IN_QUEUE.value
-                )
-            )
-            .values(status=QueueStatus.REMOVED.value)
+        await self._lock()
+        result = await self._execute(
+            _UPDATE_ACTIVE_STATUS,
+            {"b_user_id": user_id, "new_status": QueueStatus.REMOVED.value}
         )
-        await self.session.commit()
 
         if result.rowcount > 0:
+            await self._execute(_COUNT_REMOVED)
+            await self._release_slot()
             await self._recalculate_positions()
             return True
-        return False
 
-    async def _recalculate_positions(self):
-        """Пересчет позиций в очереди"""
-        # Получаем все активные записи очереди
-        result = await self.session.execute(
-            select(Queue)
-            .where(Queue.status == QueueStatus.IN_QUEUE.value)
-            .order_by(Queue.priority.asc(), Queue.position.asc())
-        )
-        queue_entries = list(result.scalars().all())
-
-        # Группируем по приоритетам и переназначаем позиции
-        priority_groups = {}
-        for entry in queue_entries:
-            if entry.priority not in priority_groups:
-                priority_groups[entry.priority] = []
-            priority_groups[entry.priority].append(entry)
-
-        # Обновляем позиции
-        for priority, entries in priority_groups.items():
-            for idx, entry in enumerate(entries, start=1):
-                if entry.position != idx:
-                    await self.session.execute(
-                        update(Queue)
-                        .where(Queue.id == entry.id)
-                        .values(position=idx)
-                    )
+        # Пользователь мог находиться в листе ожидания
+        result = await self._execute(
+            _UPDATE_WAITLISTED_STATUS,
+            {"b_user_id": user_id, "new_status": QueueStatus.REMOVED.value}
+        )
+        if result.rowcount > 0:
+            await self._execute(_COUNT_REMOVED)
+        await self.session.commit()
+        return result.rowcount > 0
 
+    async def _recalculate_positions(self):
+        """Пересчет позиций в очереди и фиксация мутации.
+
+        Вызывается в конце каждой мутации: в той же транзакции увеличивает
+        версию очереди и обновляет индекс процесса уже прочитанными строками.
+        """
+        # Получаем все активные записи очереди (только нужные колонки)
+        result = await self._execute(_SELECT_ACTIVE_ORDERED)
+
+        # Переназначаем позиции внутри каждого приоритета
+        changes = []
+        entries = []
+        current_priority = None
+        idx = 0
+        for entry_id, user_id, priority, position in result.all():
+            if priority != current_priority:
+                current_priority = priority
+                idx = 0
+            idx += 1
+            if position != idx:
+                changes.append({"id": entry_id, "position": idx})
+            entries.append((entry_id, user_id, priority, idx))
+
+        # Одно пакетное обновление по первичному ключу вместо запроса на каждую строку
+        if changes:
+            await self.session.execute(update(Queue), changes)
+
+        version = (await self._execute(_BUMP_VERSION)).scalar_one()
         await self.session.commit()
 
+        index = get_queue_index(self.queue_id)
+        if index is not None:
+            index.rebuild(entries, version)
+
+    async def apply_aging(self, reasons: Iterable) -> int:
+        """Пакетное старение: улучшение приоритета по времени ожидания.
+
+        Для каждой категории с политикой старения выполняется по одному
+        UPDATE на ступень приоритета, без обхода записей в Python.
+        """
+        await self._lock()
+        now = datetime.now(timezone.utc)
+        aged = 0
+
+        for reason in reasons:
+            if not reason.aging_interval_minutes:
+                continue
+
+            # От самой большой ступени к меньшей, чтобы каждая запись обновилась один раз
+            for step in range(reason.priority - reason.min_priority, 0, -1):
+                result = await self._execute(
+                    _AGE_ENTRIES,
+                    {
+                        "cutoff": now - timedelta(minutes=step * reason.aging_interval_minutes),
+                        "target": reason.priority - step,
+                        "reason": reason.key,
+                    }
+                )
+                aged += result.rowcount
+
+        if aged:
+            await self._recalculate_positions()
+        else:
+            await self.session.commit()
+        return aged
+
     async def get_queue_stats(self) -> dict:
         """Получение статистики очереди"""
-        # Общее количество в очереди
-        result = await self.session.execute(
-            select(func.count(Queue.id))
-            .where(Queue.status == QueueStatus.IN_QUEUE.value)
-        )
-        total_in_queue = result.scalar()
+        index = await self._get_fresh_index()
 
-        # Количество обслуженных
-        result = await self.session.execute(
-            select(func.count(Queue.id))
-            .where(Queue.status == QueueStatus.SERVED.value)
-        )
-        total_served = result.scalar()
+        # В очереди и обслужено за все время — по счетчикам queue_state (одна строка)
+        total_in_queue, total_served = (await self._execute(_SELECT_COUNTERS)).one()
 
         # По приоритетам
-        result = await self.session.execute(
-            select(Queue.priority, func.count(Queue.id))
-            .where(Queue.status == QueueStatus.IN_QUEUE.value)
-            .group_by(Queue.priority)
-        )
-        by_priority = dict(result.all())
+        if index is not None:
+            by_priority = index.count_by_priority()
+        else:
+            result = await self._execute(_COUNT_BY_PRIORITY)
+            by_priority = dict(result.all())
+
+        # В листе ожидания
+        result = await self._execute(_COUNT_BY_STATUS, {"status": _WAITLISTED})
+        total_waitlisted = result.scalar()
 
         return {
             "total_in_queue": total_in_queue,
+            "total_waitlisted": total_waitlisted,
             "total_served": total_served,
             "by_priority": by_priority
         }
+
+
+async def get_queue_depths(session: AsyncSession) -> Dict[int, int]:
+    """Количество записей в активной очереди по id очереди (по счетчикам, одним запросом)"""
+    result = await session.execute(_SELECT_DEPTHS)
+    return dict(result.all())
+
+
+async def get_queue_versions(session: AsyncSession) -> Dict[int, int]:
+    """Версии всех очередей по id (одним запросом)"""
+    result = await session.execute(_SELECT_VERSIONS)
+    return dict(result.all())
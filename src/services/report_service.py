@@ -0,0 +1,144 @@
+"""
+Сервис отчетов: инкрементальные снимки статистики по периодам
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any
+
+from sqlalchemy import select, func, and_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import User, Queue, QueueArchive, QueueStatus, ReportSnapshot
+
+HOURLY = "hourly"
+DAILY = "daily"
+
+
+def floor_hour(moment: datetime) -> datetime:
+    """Начало часа"""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def empty_metrics() -> Dict[str, Any]:
+    return {
+        "registrations": 0,
+        "served": 0,
+        "removed": 0,
+        "wait_seconds_total": 0.0,
+        "by_reason": {},
+    }
+
+
+def merge_metrics(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Сложение метрик нескольких периодов"""
+    merged = empty_metrics()
+    by_reason = Counter()
+    for metrics in snapshots:
+        for key in ("registrations", "served", "removed", "wait_seconds_total"):
+            merged[key] += metrics.get(key, 0)
+        by_reason.update(metrics.get("by_reason", {}))
+    merged["by_reason"] = dict(by_reason)
+    return merged
+
+
+def average_wait_minutes(metrics: Dict[str, Any]) -> Optional[float]:
+    """Среднее время ожидания обслуженных, мин"""
+    if not metrics["served"]:
+        return None
+    return metrics["wait_seconds_total"] / metrics["served"] / 60
+
+
+class ReportService:
+    """Сервис для расчета и хранения снимков отчетов.
+
+    Часовые снимки считаются только по изменениям за час (индексы по
+    join_date и (status, updated_at)); суточные сводки складываются из
+    часовых снимков без повторного обхода таблиц.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_watermark(self, period: str) -> Optional[datetime]:
+        """Конец последнего сохраненного периода"""
+        result = await self.session.execute(
+            select(func.max(ReportSnapshot.period_end)).where(ReportSnapshot.period == period)
+        )
+        return result.scalar()
+
+    async def compute_metrics(self, start: datetime, end: datetime) -> Dict[str, Any]:
+        """Метрики за [start, end) по изменившимся строкам"""
+        metrics = empty_metrics()
+
+        result = await self.session.execute(
+            select(User.reason, func.count(User.id))
+            .where(and_(User.join_date >= start, User.join_date < end))
+            .group_by(User.reason)
+        )
+        by_reason = dict(result.all())
+        metrics["by_reason"] = by_reason
+        metrics["registrations"] = sum(by_reason.values())
+
+        # Завершенные записи: еще в queue или уже перенесенные в queue_archive
+        finished = [
+            select(table.status, table.created_at, table.updated_at)
+            .where(
+                and_(
+                    table.status.in_([QueueStatus.SERVED.value, QueueStatus.REMOVED.value]),
+                    table.updated_at >= start,
+                    table.updated_at < end
+                )
+            )
+            for table in (Queue, QueueArchive)
+        ]
+        result = await self.session.execute(union_all(*finished))
+        for status, created_at, updated_at in result.all():
+            if status == QueueStatus.SERVED.value:
+                metrics["served"] += 1
+                metrics["wait_seconds_total"] += (updated_at - created_at).total_seconds()
+            else:
+                metrics["removed"] += 1
+
+        return metrics
+
+    async def save_snapshot(self, period: str, start: datetime, end: datetime, metrics: Dict[str, Any]):
+        """Сохранение снимка"""
+        self.session.add(ReportSnapshot(period=period, period_start=start, period_end=end, metrics=metrics))
+        await self.session.commit()
+
+    async def catch_up_hourly(self, now: datetime, max_hours: int = 24 * 7) -> int:
+        """Расчет всех завершенных часов после последнего снимка"""
+        current_hour = floor_hour(now)
+        watermark = await self.get_watermark(HOURLY) or current_hour - timedelta(hours=1)
+        watermark = max(watermark, current_hour - timedelta(hours=max_hours))
+
+        computed = 0
+        while watermark < current_hour:
+            end = watermark + timedelta(hours=1)
+            await self.save_snapshot(HOURLY, watermark, end, await self.compute_metrics(watermark, end))
+            watermark = end
+            computed += 1
+        return computed
+
+    async def get_summary(self, start: datetime, end: datetime) -> Dict[str, Any]:
+        """Сводка за период из часовых снимков"""
+        result = await self.session.execute(
+            select(ReportSnapshot.metrics)
+            .where(
+                and_(
+                    ReportSnapshot.period == HOURLY,
+                    ReportSnapshot.period_start >= start,
+                    ReportSnapshot.period_end <= end
+                )
+            )
+        )
+        return merge_metrics(list(result.scalars().all()))
+
+    async def was_sent(self, period: str, slot: datetime) -> bool:
+        """Отправлялся ли уже отчет за слот"""
+        result = await self.session.execute(
+            select(ReportSnapshot.id).where(
+                and_(ReportSnapshot.period == period, ReportSnapshot.period_start == slot)
+            )
+        )
+        return result.first() is not None
@@ -0,0 +1,261 @@
+"""
+Ориентировочное время обслуживания (слоты) и напоминания
+
+Пользователь видит не только номер в очереди, но и окно времени, когда
+подойдет его очередь: окно считается по рангу (priority, position) и темпу
+обслуживания очереди — средней паузе между отметками «обслужен» за
+SLOT_RATE_WINDOW_HOURS (паузы длиннее SLOT_IDLE_GAP_MINUTES — перерывы и
+ночь — не учитываются). Темп кэшируется в процессе и пересчитывается раз в
+SLOT_RATE_REFRESH_INTERVAL, поэтому оценка в сообщении почти ничего не стоит.
+
+SlotScheduler (админ-бот) держит план каждой очереди — ранги записей на
+версию queue_state. При смене версии план пересчитывается, а в колесе
+таймеров переставляются только напоминания записей, чей ранг изменился.
+Напоминание приходит один раз, за SLOT_REMINDER_MINUTES до начала окна,
+и пользователю не нужно проверять позицию через /start.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from aiogram import Bot
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import MESSAGES, get_settings
+from src.core.metrics import metrics
+from src.core.timer_wheel import TimerWheel
+from src.services.notification_service import NotificationService
+from src.services.queue_registry import queue_registry
+from src.services.queue_service import QueueService, get_queue_versions
+from src.services.user_service import UserService
+
+logger = logging.getLogger(__name__)
+
+REMINDERS_SENT = metrics.counter("bot_slot_reminders_total", "Отправленные напоминания о времени обслуживания")
+
+# Меньшее изменение темпа не переставляет все напоминания очереди
+_RATE_CHANGE_THRESHOLD = 0.05
+
+# Минимум пауз между обслуживаниями для оценки темпа
+_MIN_SAMPLES = 3
+
+
+@dataclass(frozen=True)
+class SlotWindow:
+    """Ориентировочное окно обслуживания"""
+    start: datetime
+    end: datetime
+
+
+def estimate_service_minutes(
+        times: Sequence[datetime],
+        idle_gap_minutes: float,
+        default: float
+) -> float:
+    """Средняя пауза между обслуживаниями, мин (без перерывов длиннее idle_gap_minutes)"""
+    gaps = [(later - earlier).total_seconds() / 60 for earlier, later in zip(times, times[1:])]
+    gaps = [gap for gap in gaps if gap <= idle_gap_minutes]
+    if len(gaps) < _MIN_SAMPLES:
+        return default
+    return sum(gaps) / len(gaps)
+
+
+def window_for_rank(rank: int, service_minutes: float, now: datetime, round_minutes: int) -> SlotWindow:
+    """Окно для ранга: начало после обслуживания rank - 1 человек впереди, границы округлены"""
+    start = now + timedelta(minutes=(rank - 1) * service_minutes)
+    end = start + timedelta(minutes=service_minutes)
+
+    step = max(round_minutes, 1) * 60
+    start_ts = start.timestamp() // step * step
+    end_ts = -(-end.timestamp() // step) * step
+    return SlotWindow(
+        start=datetime.fromtimestamp(start_ts, timezone.utc),
+        end=datetime.fromtimestamp(max(end_ts, start_ts + step), timezone.utc)
+    )
+
+
+@lru_cache(maxsize=None)
+def _timezone(name: str) -> tzinfo:
+    return ZoneInfo(name)
+
+
+def format_window(window: SlotWindow, now: datetime) -> str:
+    """Окно в часовом поясе SLOT_TIMEZONE; дата — если не сегодня"""
+    tz = _timezone(get_settings().SLOT_TIMEZONE)
+    start = window.start.astimezone(tz)
+    end = window.end.astimezone(tz)
+    text = f"{start:%H:%M}–{end:%H:%M}"
+    if start.date() != now.astimezone(tz).date():
+        text = f"{start:%d.%m} {text}"
+    return text
+
+
+class SlotEstimator:
+    """Темп обслуживания очередей с кэшем в процессе"""
+
+    def __init__(self):
+        # queue_id -> (минут на человека, time.monotonic() расчета)
+        self._rates: Dict[int, Tuple[float, float]] = {}
+
+    async def service_minutes(self, session: AsyncSession, queue_id: int) -> float:
+        """Минут на одного человека в очереди"""
+        settings = get_settings()
+        cached = self._rates.get(queue_id)
+        checked_at = time.monotonic()
+        if cached is not None and checked_at - cached[1] < settings.SLOT_RATE_REFRESH_INTERVAL:
+            return cached[0]
+
+        since = datetime.now(timezone.utc) - timedelta(hours=settings.SLOT_RATE_WINDOW_HOURS)
+        times = await QueueService(session, queue_id).get_served_times(since)
+        minutes = estimate_service_minutes(times, settings.SLOT_IDLE_GAP_MINUTES, settings.SLOT_DEFAULT_SERVICE_MINUTES)
+        self._rates[queue_id] = (minutes, checked_at)
+        return minutes
+
+    async def describe(self, session: AsyncSession, queue_id: int, rank: Optional[int]) -> str:
+        """Строка с окном для сообщения пользователю (пусто, если ранга нет)"""
+        if not rank:
+            return ""
+        now = datetime.now(timezone.utc)
+        minutes = await self.service_minutes(session, queue_id)
+        window = window_for_rank(rank, minutes, now, get_settings().SLOT_ROUND_MINUTES)
+        return MESSAGES["slot_estimate"].format(window=format_window(window, now))
+
+
+@dataclass
+class _QueuePlan:
+    """Ранги записей очереди на версию queue_state"""
+    version: Optional[int] = None
+    service_minutes: Optional[float] = None
+    ranks: Dict[int, int] = field(default_factory=dict)  # entry_id -> ранг
+    users: Dict[int, int] = field(default_factory=dict)  # entry_id -> users.id
+
+
+class SlotScheduler:
+    """Напоминания о приближении окна обслуживания по колесу таймеров"""
+
+    def __init__(
+            self,
+            bot: Bot,
+            session_maker: async_sessionmaker,
+            reminder_minutes: int,
+            tick_interval: float = 10.0
+    ):
+        self.bot = bot
+        self.session_maker = session_maker
+        self.lead = reminder_minutes * 60
+        self.round_minutes = get_settings().SLOT_ROUND_MINUTES
+        self.tick_interval = tick_interval
+        self.wheel = TimerWheel(tick_interval)
+        self._plans: Dict[int, _QueuePlan] = {}
+        # Записи, которым напоминание уже отправлено (или не нужно)
+        self._reminded: Set[int] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def backlog(self) -> int:
+        """Запланированные напоминания"""
+        return len(self.wheel)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once(time.time())
+            except Exception as e:
+                logger.error(f"Slot scheduler tick failed: {e}")
+            await asyncio.sleep(self.tick_interval)
+
+    async def run_once(self, now: float):
+        """Один шаг: сверка версий очередей (один запрос), пересчет изменившихся, напоминания"""
+        async with self.session_maker() as session:
+            versions = await get_queue_versions(session)
+            for queue in queue_registry.all():
+                await self._refresh(session, queue.id, versions.get(queue.id), now)
+
+        due = self.wheel.advance(now)
+        if due:
+            await self._remind(due, now)
+
+    async def _refresh(self, session: AsyncSession, queue_id: int, version: Optional[int], now: float):
+        plan = self._plans.setdefault(queue_id, _QueuePlan())
+        minutes = await slot_estimator.service_minutes(session, queue_id)
+        rate_changed = (
+            plan.service_minutes is None
+            or abs(minutes - plan.service_minutes) > _RATE_CHANGE_THRESHOLD * plan.service_minutes
+        )
+        if version == plan.version and not rate_changed:
+            return
+        if rate_changed:
+            plan.service_minutes = minutes
+
+        entries = await QueueService(session, queue_id).get_active_entries()
+        ranks = {entry[0]: rank for rank, entry in enumerate(entries, start=1)}
+
+        for entry_id in plan.ranks.keys() - ranks.keys():
+            self.wheel.cancel(entry_id)
+            self._reminded.discard(entry_id)
+
+        rescheduled = 0
+        for entry_id, rank in ranks.items():
+            if entry_id in self._reminded:
+                continue
+            if not rate_changed and plan.ranks.get(entry_id) == rank:
+                continue
+
+            deadline = now + (rank - 1) * plan.service_minutes * 60 - self.lead
+            if deadline <= now and entry_id not in plan.ranks:
+                # Новая запись уже у начала очереди: окно ей показано при регистрации
+                self._reminded.add(entry_id)
+                continue
+            self.wheel.schedule(entry_id, deadline, queue_id)
+            rescheduled += 1
+
+        plan.version = version
+        plan.ranks = ranks
+        plan.users = {entry[0]: entry[1] for entry in entries}
+        if rescheduled:
+            logger.debug(f"Queue {queue_id}: {rescheduled} reminders rescheduled")
+
+    async def _remind(self, due: List[Tuple[int, int]], now: float):
+        now_dt = datetime.fromtimestamp(now, timezone.utc)
+        notification_service = NotificationService(self.bot)
+
+        async with self.session_maker() as session:
+            user_service = UserService(session)
+            for entry_id, queue_id in due:
+                plan = self._plans.get(queue_id)
+                if plan is None or entry_id not in plan.ranks:
+                    continue
+                self._reminded.add(entry_id)
+
+                user = await user_service.get_user_by_id(plan.users[entry_id])
+                if user is None:
+                    continue
+
+                rank = plan.ranks[entry_id]
+                window = window_for_rank(rank, plan.service_minutes, now_dt, self.round_minutes)
+                try:
+                    await notification_service.send_slot_reminder(
+                        user.telegram_id, rank, format_window(window, now_dt)
+                    )
+                    REMINDERS_SENT.inc()
+                except Exception as e:
+                    logger.error(f"Failed to send slot reminder to {user.telegram_id}: {e}")
+
+
+# Темп обслуживания в процессе (используют оба бота)
+slot_estimator = SlotEstimator()
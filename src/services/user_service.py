@@ -2,10 +2,44 @@
 Сервис для работы с пользователями
 """
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, bindparam, Integer, func, text
+from typing import Tuple
 from typing import Optional, List
 from src.database.models import User
-from src.config import REASONS
+from src.services.priority_registry import priority_registry
+
+
+# Часто выполняемые запросы строятся один раз (см. queue_service)
+_SELECT_BY_TELEGRAM_ID = select(User).where(User.telegram_id == bindparam("telegram_id"))
+
+_SELECT_BY_ID = select(User).where(User.id == bindparam("user_id"))
+
+_SELECT_EXISTS_BY_TELEGRAM_ID = select(User.id).where(User.telegram_id == bindparam("telegram_id"))
+
+_SELECT_ALL = select(User)
+
+_SELECT_ACTIVE = select(User).where(User.is_active == True)
+
+_COUNT_ALL = select(func.count(User.id))
+
+_COUNT_ACTIVE = select(func.count(User.id)).where(User.is_active == True)
+
+_SELECT_WITH_DOCUMENTS = (
+    select(User)
+    .where(User.document_photo.is_not(None))
+    .order_by(User.join_date.asc(), User.id.asc())
+    .offset(bindparam("offset", type_=Integer))
+    .limit(bindparam("limit", type_=Integer))
+)
+
+_DEACTIVATE = update(User).where(User.id == bindparam("user_id")).values(is_active=False)
+
+_DELETE = delete(User).where(User.id == bindparam("user_id"))
+
+_SELECT_TRIGRAM_INSTALLED = text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+
+# Установлено ли в PostgreSQL расширение pg_trgm (проверяется один раз на процесс)
+_trigram_installed: Optional[bool] = None
 
 
 class UserService:
@@ -22,7 +56,7 @@ class UserService:
             document_photo: Optional[str] = None
     ) -> User:
         """Создание нового пользователя"""
-        priority = REASONS.get(reason, {}).get("priority", 999)
+        priority = priority_registry.priority_for(reason)
 
         user = User(
             telegram_id=telegram_id,
@@ -33,38 +67,88 @@ class UserService:
             is_active=True
         )
 
+        # id и join_date приходят из RETURNING того же INSERT (eager_defaults)
         self.session.add(user)
         await self.session.commit()
-        await self.session.refresh(user)
 
         return user
 
     async def get_user_by_telegram_id(self, telegram_id: int) -> Optional[User]:
         """Получение пользователя по Telegram ID"""
-        result = await self.session.execute(
-            select(User).where(User.telegram_id == telegram_id)
-        )
+        result = await self.session.execute(_SELECT_BY_TELEGRAM_ID, {"telegram_id": telegram_id})
         return result.scalar_one_or_none()
 
     async def get_user_by_id(self, user_id: int) -> Optional[User]:
         """Получение пользователя по ID"""
-        result = await self.session.execute(
-            select(User).where(User.id == user_id)
-        )
+        result = await self.session.execute(_SELECT_BY_ID, {"user_id": user_id})
         return result.scalar_one_or_none()
 
     async def get_all_users(self) -> List[User]:
         """Получение всех пользователей"""
-        result = await self.session.execute(select(User))
+        result = await self.session.execute(_SELECT_ALL)
         return list(result.scalars().all())
 
     async def get_active_users(self) -> List[User]:
         """Получение активных пользователей"""
-        result = await self.session.execute(
-            select(User).where(User.is_active == True)
-        )
+        result = await self.session.execute(_SELECT_ACTIVE)
+        return list(result.scalars().all())
+
+    async def count_users(self) -> int:
+        """Количество пользователей"""
+        return (await self.session.execute(_COUNT_ALL)).scalar()
+
+    async def count_active_users(self) -> int:
+        """Количество активных пользователей"""
+        return (await self.session.execute(_COUNT_ACTIVE)).scalar()
+
+    async def get_users_with_documents(self, offset: int = 0, limit: int = 10) -> List[User]:
+        """Пользователи с загруженными документами (страница)"""
+        result = await self.session.execute(_SELECT_WITH_DOCUMENTS, {"offset": offset, "limit": limit})
         return list(result.scalars().all())
 
+    async def search_users(self, query: str, offset: int = 0, limit: int = 10) -> Tuple[List[User], bool]:
+        """Поиск по Telegram ID (точное совпадение) или подстроке ФИО.
+
+        В PostgreSQL с расширением pg_trgm запрос обслуживается триграммным
+        индексом и сортируется по похожести; без расширения — ILIKE по id,
+        в SQLite (тесты) — простой LIKE.
+        Возвращает страницу пользователей и признак наличия следующей.
+        """
+        query = query.strip()
+        if not query:
+            return [], False
+
+        if query.isdigit():
+            user = await self.get_user_by_telegram_id(int(query))
+            return ([user] if user else []), False
+
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        statement = select(User)
+
+        if self.session.get_bind().dialect.name == "postgresql":
+            statement = statement.where(User.full_name.ilike(pattern, escape="\\"))
+            if await self._has_pg_trgm():
+                statement = statement.order_by(func.similarity(User.full_name, query).desc(), User.id.asc())
+            else:
+                statement = statement.order_by(User.id.asc())
+        else:
+            statement = (
+                statement
+                .where(User.full_name.like(pattern, escape="\\"))
+                .order_by(User.id.asc())
+            )
+
+        result = await self.session.execute(statement.offset(offset).limit(limit + 1))
+        users = list(result.scalars().all())
+        return users[:limit], len(users) > limit
+
+    async def _has_pg_trgm(self) -> bool:
+        global _trigram_installed
+        if _trigram_installed is None:
+            result = await self.session.execute(_SELECT_TRIGRAM_INSTALLED)
+            _trigram_installed = result.first() is not None
+        return _trigram_installed
+
     async def update_user(
             self,
             user_id: int,
@@ -80,7 +164,7 @@ class UserService:
 
         if reason is not None:
             update_data["reason"] = reason
-            update_data["priority"] = REASONS.get(reason, {}).get("priority", 999)
+            update_data["priority"] = priority_registry.priority_for(reason)
 
         if is_active is not None:
             update_data["is_active"] = is_active
@@ -95,21 +179,17 @@ class UserService:
 
     async def deactivate_user(self, user_id: int) -> bool:
         """Деактивация пользователя"""
-        result = await self.session.execute(
-            update(User).where(User.id == user_id).values(is_active=False)
-        )
+        result = await self.session.execute(_DEACTIVATE, {"user_id": user_id})
         await self.session.commit()
         return result.rowcount > 0
 
     async def delete_user(self, user_id: int) -> bool:
         """Удаление пользователя"""
-        result = await self.session.execute(
-            delete(User).where(User.id == user_id)
-        )
+        result = await self.session.execute(_DELETE, {"user_id": user_id})
         await self.session.commit()
         return result.rowcount > 0
 
     async def user_exists(self, telegram_id: int) -> bool:
         """Проверка существования пользователя"""
-        user = await self.get_user_by_telegram_id(telegram_id)
-        return user is not None
+        result = await self.session.execute(_SELECT_EXISTS_BY_TELEGRAM_ID, {"telegram_id": telegram_id})
+        return result.first() is not None
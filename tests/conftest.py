@@ -0,0 +1,37 @@
+"""
+Общие фикстуры тестов: настройки из окружения и чистая БД SQLite на тест
+
+Окружение задается до импорта src: настройки и движок создаются при
+первом обращении к src.config.settings / src.database.database.
+"""
+import os
+import tempfile
+
+import pytest
+
+_DB_DIR = tempfile.mkdtemp(prefix="queue-bot-tests-")
+
+os.environ.setdefault("BOT_TOKEN", "1000000001:test-user-bot")
+os.environ.setdefault("ADMIN_BOT_TOKEN", "1000000002:test-admin-bot")
+os.environ.setdefault("CHANNEL_ID", "-1001000000000")
+os.environ.setdefault("ADMIN_IDS", "1")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_DB_DIR}/test.db")
+os.environ.setdefault("JOURNAL_DIR", "")
+
+from src.database.database import async_session_maker, create_tables, drop_tables  # noqa: E402
+from src.services.queue_registry import queue_registry  # noqa: E402
+
+
+@pytest.fixture
+async def session_maker():
+    """Пустая схема (с очередью по умолчанию) и загруженный реестр очередей"""
+    await drop_tables()
+    await create_tables()
+    await queue_registry.load(async_session_maker)
+    yield async_session_maker
+
+
+@pytest.fixture
+async def session(session_maker):
+    async with session_maker() as session:
+        yield session
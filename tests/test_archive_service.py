@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+
+from src.database.models import Queue, QueueArchive, QueueStatus
+from src.services.archive_service import QueueArchiver
+from src.services.queue_service import QueueService
+from tests.test_queue_service import enqueue
+
+
+async def _age(session_maker, model, ids, days: int):
+    async with session_maker() as session:
+        await session.execute(
+            update(model).where(model.id.in_(ids))
+            .values(updated_at=datetime.now(timezone.utc) - timedelta(days=days))
+        )
+        await session.commit()
+
+
+async def test_archiver_moves_finished_entries_and_purges_old_archive(session_maker):
+    served, removed, recent, waiting = await enqueue(session_maker, 4)
+    async with session_maker() as session:
+        service = QueueService(session)
+        assert await service.mark_as_served(served)
+        assert await service.remove_from_queue(removed)
+        assert await service.mark_as_served(recent)
+
+    async with session_maker() as session:
+        old_ids = list((await session.execute(
+            select(Queue.id).where(Queue.user_id.in_((served, removed)))
+        )).scalars())
+    await _age(session_maker, Queue, old_ids, days=10)
+
+    # Пакет в одну запись: перенос идет несколькими транзакциями
+    archiver = QueueArchiver(session_maker, archive_after_days=7, retention_days=30, batch_size=1)
+    assert await archiver.run_once(datetime.now(timezone.utc)) == (2, 0)
+
+    async with session_maker() as session:
+        remaining = dict((await session.execute(select(Queue.user_id, Queue.status))).all())
+        assert remaining == {recent: QueueStatus.SERVED.value, waiting: QueueStatus.IN_QUEUE.value}
+        archived = (await session.execute(select(QueueArchive).order_by(QueueArchive.id))).scalars().all()
+        assert [(row.id, row.user_id, row.status) for row in archived] == [
+            (old_ids[0], served, QueueStatus.SERVED.value),
+            (old_ids[1], removed, QueueStatus.REMOVED.value),
+        ]
+        # Итоги за все время — по счетчикам, перенос их не меняет
+        assert (await QueueService(session).get_queue_stats())["total_served"] == 2
+
+    await _age(session_maker, QueueArchive, old_ids[:1], days=40)
+    assert await archiver.run_once(datetime.now(timezone.utc)) == (0, 1)
+    async with session_maker() as session:
+        assert list((await session.execute(select(QueueArchive.id))).scalars()) == [old_ids[1]]
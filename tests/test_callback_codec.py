@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import pytest
+from aiogram import F
+from aiogram.filters.callback_data import CallbackData
+
+from src.admin_bot.callbacks import (
+    admin_callbacks, QueueFilter, RemoveFromQueue, MarkServed, Export, BackToMenu
+)
+from src.bot.callbacks import user_callbacks, CaptchaAnswer, ReasonChoice
+from src.core.callback_codec import CallbackCodec, IsCallback
+
+
+@pytest.mark.parametrize("codec, value", [
+    (admin_callbacks, QueueFilter()),
+    (admin_callbacks, QueueFilter(priority=2, page=3, queue_id=7)),
+    (admin_callbacks, RemoveFromQueue(user_id=123456789, confirmed=True)),
+    (admin_callbacks, Export(fmt="csv")),
+    (admin_callbacks, BackToMenu()),
+    (user_callbacks, CaptchaAnswer(answer=-4)),
+    (user_callbacks, ReasonChoice(key="consultation")),
+])
+def test_round_trip(codec, value):
+    data = value.pack()
+    # Лимит Telegram на callback_data — 64 байта
+    assert len(data.encode()) <= 64
+    assert codec.decode(data) == value
+
+
+@pytest.mark.parametrize("data", [
+    None,
+    "",
+    "increase_priority_123",   # кнопки старого формата
+    "zz:1",                    # неизвестный префикс
+    "ms:abc",                  # неверный тип поля
+    "ms:1:2",                  # лишнее поле
+    "c:1",                     # префикс другого бота
+])
+def test_unknown_or_malformed_data(data):
+    assert admin_callbacks.decode(data) is None
+
+
+def test_duplicate_prefix_rejected():
+    codec = CallbackCodec()
+    codec.register(MarkServed)
+
+    class Other(CallbackData, prefix="ms"):
+        user_id: int
+
+    with pytest.raises(ValueError):
+        codec.register(Other)
+
+
+async def test_middleware_and_filter():
+    seen = {}
+
+    async def handler(event, data):
+        seen.update(data)
+        return "handled"
+
+    event = SimpleNamespace(data=RemoveFromQueue(user_id=42).pack())
+    assert await admin_callbacks.middleware(handler, event, {}) == "handled"
+    callback_data = seen["callback_data"]
+    assert callback_data == RemoveFromQueue(user_id=42)
+
+    assert await IsCallback(RemoveFromQueue)(event, callback_data)
+    assert await IsCallback(RemoveFromQueue, ~F.confirmed)(event, callback_data)
+    assert not await IsCallback(RemoveFromQueue, F.confirmed)(event, callback_data)
+    assert not await IsCallback(MarkServed)(event, callback_data)
+    # Неизвестные данные не проходят ни один фильтр
+    assert not await IsCallback(MarkServed)(event, None)
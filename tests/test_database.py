@@ -0,0 +1,21 @@
+from sqlalchemy import select
+
+from src.database.database import engine, ensure_schema, _engine_options
+from src.database.models import QueueState, ServiceQueue, DEFAULT_QUEUE_ID
+
+
+def test_sqlite_engine_has_no_queue_pool_options():
+    options = _engine_options()
+    assert "pool_size" not in options
+    assert "max_overflow" not in options
+    assert engine.dialect.name == "sqlite"
+
+
+async def test_ensure_schema_is_idempotent(session_maker):
+    assert await ensure_schema() == []
+
+    async with session_maker() as session:
+        queues = (await session.execute(select(ServiceQueue.id))).scalars().all()
+        states = (await session.execute(select(QueueState.id))).scalars().all()
+    assert queues == [DEFAULT_QUEUE_ID]
+    assert states == [DEFAULT_QUEUE_ID]
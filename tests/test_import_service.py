@@ -0,0 +1,65 @@
+import pytest
+
+from src.services.import_service import ImportService, ImportReport, read_table, validate_rows
+from src.services.queue_registry import queue_registry, create_queue
+from src.services.queue_service import QueueService
+from src.services.user_service import UserService
+
+CSV = """telegram_id;full_name;reason;join_date
+800001;Иванов Иван;consultation;03.01.2026 10:00
+800002;Петров Петр;Получение услуги категории А;02.01.2026 10:00
+800003;Сидоров Олег;consultation;01.01.2026 10:00
+800001;Иванов Иван;consultation;03.01.2026 10:00
+oops;Без номера;consultation;
+800004;Кузнецов Илья;unknown;
+800005;Уже Зарегистрирован;consultation;
+800006;Смирнов Антон;other;01.01.2026 09:00
+"""
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "waiting_list.csv"
+    path.write_text(CSV, encoding="utf-8")
+    return str(path)
+
+
+async def test_import_streams_rows_in_batches(session_maker, csv_file):
+    async with session_maker() as session:
+        small = await create_queue(session, "small", "Малая очередь", max_size=3)
+        await UserService(session).create_user(800005, "Уже Зарегистрирован", "consultation")
+    await queue_registry.load(session_maker)
+
+    report = ImportReport()
+    rows = validate_rows(read_table(csv_file), report, small)
+    async with session_maker() as session:
+        await ImportService(session, small).import_rows(rows, report, batch_size=2)
+
+    assert (report.rows, report.imported, report.existing, report.duplicates, report.invalid) == (8, 4, 1, 1, 2)
+    assert (report.queued, report.waitlisted) == (3, 1)
+
+    async with session_maker() as session:
+        service = QueueService(session, small)
+        user_service = UserService(session)
+
+        async def user_id(telegram_id: int) -> int:
+            return (await user_service.get_user_by_telegram_id(telegram_id)).id
+
+        # Внутри приоритета — по дате постановки, сверх вместимости — в лист ожидания
+        assert await service.get_user_position(await user_id(800002)) == 1
+        assert await service.get_user_position(await user_id(800003)) == 2
+        assert await service.get_user_position(await user_id(800001)) == 3
+        assert await service.get_waitlist_position(await user_id(800006)) == 1
+        assert (await service.get_queue_stats())["total_in_queue"] == 3
+
+
+async def test_import_reports_missing_columns(session_maker, tmp_path):
+    path = tmp_path / "broken.csv"
+    path.write_text("telegram_id,full_name\n1,Иванов Иван\n", encoding="utf-8")
+
+    report = ImportReport()
+    async with session_maker() as session:
+        with pytest.raises(ValueError, match="reason"):
+            await ImportService(session).import_rows(validate_rows(read_table(str(path)), report), report)
+        # Неудачный импорт не держит блокировку очереди
+        assert await QueueService(session).mark_as_served(1) is False
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from tools.import_profile import run_once
+
+ROOT = Path(__file__).parent.parent
+
+# Бюджет импорта точки входа сверх aiogram (см. tools/import_profile.py --preload)
+BUDGET_MS = 1500
+# Загружаются только при экспорте, импорте и обработке документов
+FORBIDDEN = ("openpyxl", "PIL")
+
+# Модули, которые читают настройки при создании объектов, а не при импорте
+LAZY_SETTINGS_MODULES = (
+    "src.core.send_queue",
+    "src.core.bot_factory",
+    "src.services.slot_service",
+    "src.services.queue_registry",
+    "src.services.document_service",
+)
+
+
+@pytest.mark.parametrize("entry_point", ["src.admin_bot.main", "src.bot.main"])
+def test_entry_point_import_budget(entry_point):
+    profile = min((run_once(entry_point, preload=("aiogram.types",)) for _ in range(2)), key=lambda p: p.wall_ms)
+
+    assert [module for module in FORBIDDEN if module in profile.loaded] == []
+    assert profile.wall_ms < BUDGET_MS
+
+
+def test_modules_import_without_settings(tmp_path):
+    # Без обязательных переменных окружения (и без .env) Settings() не создается
+    env = {key: value for key, value in os.environ.items() if key in ("PATH", "HOME", "LANG")}
+    env["PYTHONPATH"] = str(ROOT)
+    code = (
+        f"import {', '.join(LAZY_SETTINGS_MODULES)}\n"
+        "from src.config import get_settings\n"
+        "assert get_settings.cache_info().currsize == 0\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
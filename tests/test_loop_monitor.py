@@ -0,0 +1,32 @@
+import asyncio
+import time
+from asyncio import events
+
+from src.core import loop_monitor as loop_monitor_module
+from src.core.loop_monitor import LoopMonitor
+
+
+async def test_slow_callback_is_reported_and_patch_removed():
+    original_run = events.Handle._run
+    monitor = LoopMonitor()
+    await monitor.start(sample_interval=0.05, slow_callback=0.05)
+    try:
+        assert events.Handle._run is not original_run
+        asyncio.get_running_loop().call_soon(time.sleep, 0.1)
+        await asyncio.sleep(0.2)
+        assert monitor.last_stall is not None
+    finally:
+        await monitor.stop()
+    assert events.Handle._run is original_run
+
+
+async def test_unverified_python_leaves_asyncio_untouched(monkeypatch):
+    monkeypatch.setattr(loop_monitor_module, "_HANDLE_PATCH_VERSIONS", ((2, 0), (2, 7)))
+    original_run = events.Handle._run
+    monitor = LoopMonitor()
+    await monitor.start(sample_interval=0.05, slow_callback=0.05)
+    try:
+        assert events.Handle._run is original_run
+        assert monitor.running
+    finally:
+        await monitor.stop()
@@ -0,0 +1,188 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from src.database.models import Queue, QueueStatus, DEFAULT_QUEUE_ID
+from src.services.priority_registry import ReasonInfo
+from src.services.queue_registry import queue_registry, create_queue
+from src.services.queue_service import QueueService, StaleQueueEntryError
+from src.services.user_service import UserService
+from tools.stress_queue import verify
+
+_telegram_ids = iter(range(500_000, 10_000_000))
+
+
+async def make_user(session, reason: str = "consultation") -> int:
+    user = await UserService(session).create_user(next(_telegram_ids), "Иванов Иван", reason)
+    return user.id
+
+
+async def enqueue(session_maker, count: int, priority: int = 3, queue_id: int = DEFAULT_QUEUE_ID, reason: str = "consultation"):
+    user_ids = []
+    async with session_maker() as session:
+        for _ in range(count):
+            user_id = await make_user(session, reason)
+            await QueueService(session, queue_id).add_to_queue(user_id, priority)
+            user_ids.append(user_id)
+    return user_ids
+
+
+async def test_queues_are_isolated(session_maker):
+    async with session_maker() as session:
+        second = await create_queue(session, "branch2", "Филиал 2")
+    await queue_registry.load(session_maker)
+
+    first_users = await enqueue(session_maker, 3)
+    second_users = await enqueue(session_maker, 2, queue_id=second)
+
+    async with session_maker() as session:
+        assert [await QueueService(session).get_user_position(u) for u in first_users] == [1, 2, 3]
+        assert [await QueueService(session, second).get_user_position(u) for u in second_users] == [1, 2]
+        assert await QueueService(session, second).get_user_position(first_users[0]) is None
+        assert (await QueueService.for_user(session, second_users[0])).queue_id == second
+
+
+async def test_apply_aging_moves_old_entries_up(session_maker):
+    old, fresh = await enqueue(session_maker, 2, priority=3)
+    async with session_maker() as session:
+        await session.execute(
+            update(Queue).where(Queue.user_id == old)
+            .values(created_at=datetime.now(timezone.utc) - timedelta(hours=2))
+        )
+        await session.commit()
+
+    reason = ReasonInfo("consultation", "Консультация", 3, False, aging_interval_minutes=60, min_priority=1)
+    async with session_maker() as session:
+        aged = await QueueService(session).apply_aging([reason])
+    assert aged == 1
+
+    async with session_maker() as session:
+        service = QueueService(session)
+        entry = await service.get_queue_entry_by_user_id(old)
+        assert entry.priority == 1
+        assert entry.status == QueueStatus.IN_QUEUE.value
+        assert (await service.get_queue_entry_by_user_id(fresh)).priority == 3
+
+
+async def test_mark_as_served_updates_counters_and_positions(session_maker):
+    first, second, third = await enqueue(session_maker, 3)
+
+    async with session_maker() as session:
+        assert await QueueService(session).mark_as_served(first)
+        assert not await QueueService(session).mark_as_served(first)
+
+    async with session_maker() as session:
+        service = QueueService(session)
+        assert (await service.get_queue_entry_by_user_id(first)) is None
+        assert [await service.get_user_position(u) for u in (second, third)] == [1, 2]
+        stats = await service.get_queue_stats()
+        assert stats["total_in_queue"] == 2
+        assert stats["total_served"] == 1
+
+
+async def test_remove_from_queue_promotes_waitlist(session_maker):
+    async with session_maker() as session:
+        small = await create_queue(session, "small", "Малая очередь", max_size=2)
+    await queue_registry.load(session_maker)
+
+    first, second, waiting, last = await enqueue(session_maker, 4, queue_id=small)
+
+    async with session_maker() as session:
+        service = QueueService(session, small)
+        assert await service.get_waitlist_position(waiting) == 1
+        assert await service.get_waitlist_position(last) == 2
+
+        # Удаление из листа ожидания не освобождает место в очереди
+        assert await service.remove_from_queue(last)
+        assert await service.get_waitlist_position(last) is None
+
+        assert await service.remove_from_queue(first)
+        assert service.promoted_user_ids == [waiting]
+        assert not await service.remove_from_queue(first)
+
+    async with session_maker() as session:
+        service = QueueService(session, small)
+        assert [await service.get_user_position(u) for u in (second, waiting)] == [1, 2]
+        stats = await service.get_queue_stats()
+        assert stats["total_in_queue"] == 2
+        assert stats["total_waitlisted"] == 0
+
+
+async def test_concurrent_mutations_succeed(session_maker):
+    users = await enqueue(session_maker, 8, priority=2)
+
+    async def mutate(action: str, user_id: int):
+        async with session_maker() as session:
+            service = QueueService(session)
+            if action == "increase":
+                return await service.shift_priority(user_id, -1)
+            if action == "decrease":
+                return await service.shift_priority(user_id, 1)
+            if action == "serve":
+                return await service.mark_as_served(user_id)
+            return await service.remove_from_queue(user_id)
+
+    actions = ("increase", "decrease", "serve", "remove") * 2
+    # Все мутации доходят до конца, даже если какая-то упала
+    results = await asyncio.gather(
+        *(mutate(action, user_id) for action, user_id in zip(actions, users)), return_exceptions=True
+    )
+    assert [result for result in results if isinstance(result, Exception) or not result] == []
+
+    async with session_maker() as session:
+        assert await verify(session) == []
+        stats = await QueueService(session).get_queue_stats()
+    assert stats["total_in_queue"] == 4
+    assert stats["total_served"] == 2
+    assert stats["by_priority"] == {1: 2, 3: 2}
+
+
+async def test_change_user_priority_rejects_stale_version(session_maker):
+    first, second = await enqueue(session_maker, 2, priority=3)
+
+    async with session_maker() as session:
+        service = QueueService(session)
+        entry = await service.get_queue_entry_by_user_id(second)
+        version = entry.version
+        await session.commit()
+
+        changed = await service.change_user_priority(second, 1, expected_version=version)
+        assert (changed.priority, changed.position, changed.version) == (1, 1, version + 1)
+
+        # Решение принималось по прочитанной ранее версии
+        with pytest.raises(StaleQueueEntryError):
+            await service.change_user_priority(second, 2, expected_version=version)
+        assert await service.change_user_priority(10 ** 9, 1) is None
+
+    async with session_maker() as session:
+        service = QueueService(session)
+        assert [await service.get_user_position(u) for u in (second, first)] == [1, 2]
+        assert (await service.get_queue_entry_by_user_id(second)).priority == 1
+
+
+async def test_shift_priority_respects_min_priority(session_maker):
+    (user,) = await enqueue(session_maker, 1, priority=2)
+
+    async with session_maker() as session:
+        service = QueueService(session)
+        assert await service.shift_priority(user, -1) == (2, 1)
+        assert await service.shift_priority(user, -1) is None
+        assert await service.shift_priority(user, 2) == (1, 3)
+        assert await service.shift_priority(10 ** 9, 1) is None
+
+
+async def test_move_user_position_keeps_positions_dense(session_maker):
+    first, second, third = await enqueue(session_maker, 3)
+
+    async with session_maker() as session:
+        service = QueueService(session)
+        moved = await service.move_user_position(first, 10)
+        assert moved.position == 3
+        assert await service.move_user_position(10 ** 9, 1) is None
+
+    async with session_maker() as session:
+        service = QueueService(session)
+        assert [await service.get_user_position(u) for u in (second, third, first)] == [1, 2, 3]
+        assert await verify(session) == []
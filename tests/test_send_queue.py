@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.send_queue import Lane, SendQueue
+
+
+def make_queue(**kwargs) -> SendQueue:
+    # Темп без пауз: проверяется порядок, а не скорость
+    return SendQueue(SimpleNamespace(id=1), rate=1e6, **kwargs)
+
+
+def recorder(sent, label, gate=None):
+    async def call():
+        if gate is not None:
+            await gate.wait()
+        sent.append(label)
+        return label
+    return call
+
+
+async def submit(send_queue, *args, **kwargs) -> asyncio.Task:
+    task = asyncio.create_task(send_queue.submit(*args, **kwargs))
+    # Постановка в очередь происходит до первого ожидания в submit
+    await asyncio.sleep(0)
+    return task
+
+
+async def test_lanes_and_chat_order():
+    send_queue = make_queue(workers=1)
+    sent = []
+    gate = asyncio.Event()
+
+    first = await submit(send_queue, 1, recorder(sent, "chat1-first", gate))
+    broadcast = await submit(send_queue, 2, recorder(sent, "chat2-broadcast"), lane=Lane.BROADCAST)
+    transactional = await submit(send_queue, 3, recorder(sent, "chat3-transactional"))
+    second = await submit(send_queue, 1, recorder(sent, "chat1-second"))
+    assert send_queue.depth(Lane.TRANSACTIONAL) == 2
+    assert send_queue.depth(Lane.BROADCAST) == 1
+
+    gate.set()
+    await asyncio.gather(first, broadcast, transactional, second)
+    # Рассылка ждет транзакционные отправки, сообщения чата 1 — друг друга
+    assert sent == ["chat1-first", "chat3-transactional", "chat1-second", "chat2-broadcast"]
+    assert send_queue.backlog == 0
+    await send_queue.stop()
+
+
+async def test_dedup_replaces_pending_call():
+    send_queue = make_queue()
+    sent = []
+    gate = asyncio.Event()
+
+    in_flight = await submit(send_queue, 1, recorder(sent, "position 5", gate), dedup_key="position")
+    stale = await submit(send_queue, 1, recorder(sent, "position 4"), dedup_key="position")
+    fresh = await submit(send_queue, 1, recorder(sent, "position 3"), dedup_key="position")
+    other_chat = await submit(send_queue, 2, recorder(sent, "chat2 position 3"), dedup_key="position")
+
+    gate.set()
+    results = await asyncio.gather(in_flight, stale, fresh, other_chat)
+    # Отправка в работе не заменяется; ожидающая получает последнее содержимое
+    assert results == ["position 5", "position 3", "position 3", "chat2 position 3"]
+    assert sorted(sent) == ["chat2 position 3", "position 3", "position 5"]
+    await send_queue.stop()
+
+
+async def test_errors_reach_submitter_and_stop_rejects_new_sends():
+    send_queue = make_queue()
+
+    async def failing():
+        raise ValueError("chat not found")
+
+    with pytest.raises(ValueError):
+        await send_queue.submit(1, failing)
+    # Ошибка одной отправки не останавливает чат
+    assert await send_queue.submit(1, recorder([], "next")) == "next"
+
+    await send_queue.stop()
+    with pytest.raises(RuntimeError):
+        await send_queue.submit(1, recorder([], "late"))
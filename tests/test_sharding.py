@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+from src.bot.sharding import ShardPool, get_shard, poll_into_pool
+
+
+def make_update(update_id: int, user_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "User"},
+            "text": "text",
+        },
+    }
+
+
+class _Update:
+    """Обновление, как его возвращает bot.get_updates"""
+
+    def __init__(self, payload: dict):
+        self.payload = payload
+        self.update_id = payload["update_id"]
+
+    def model_dump(self, **kwargs) -> dict:
+        return self.payload
+
+
+class _PollingBot:
+    """Отдает одну пачку обновлений, дальше long polling без новых"""
+
+    def __init__(self, updates):
+        self.batches = [[_Update(update) for update in updates]]
+
+    async def get_updates(self, offset=None, timeout=None):
+        if self.batches:
+            return self.batches.pop()
+        await asyncio.sleep(3600)
+
+
+def test_updates_of_one_user_go_to_one_shard():
+    assert get_shard(make_update(1, 42), 4) == get_shard(make_update(2, 42), 4) == 42 % 4
+    callback = {"update_id": 3, "callback_query": {"id": "1", "from": {"id": 43}}}
+    assert get_shard(callback, 4) == 43 % 4
+
+
+def test_try_dispatch_does_not_block_on_full_shard():
+    pool = ShardPool(1, "unused:factory", queue_size=1)
+    assert pool.try_dispatch(make_update(1, 42))
+    assert not pool.try_dispatch(make_update(2, 42))
+
+
+async def test_poll_into_pool_waits_for_full_shard_off_the_event_loop():
+    pool = ShardPool(1, "unused:factory", queue_size=1)
+    shard = pool._updates[0]
+    received = []
+    # Место в очереди шарда освобождает другой поток через 0.3 с
+    drainer = threading.Timer(0.3, lambda: received.append(shard.get(timeout=5)))
+    drainer.start()
+    polling = asyncio.create_task(poll_into_pool(_PollingBot([make_update(1, 42), make_update(2, 42)]), pool))
+    try:
+        # Пока второе обновление ждет места, цикл событий не останавливается
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 5
+        longest = 0.0
+        last = loop.time()
+        while not received and loop.time() < deadline:
+            await asyncio.sleep(0.01)
+            longest = max(longest, loop.time() - last)
+            last = loop.time()
+        assert longest < 0.2
+
+        second = await loop.run_in_executor(None, shard.get, True, 5)
+        assert [update["update_id"] for update in received + [second]] == [1, 2]
+    finally:
+        polling.cancel()
+        await asyncio.gather(polling, return_exceptions=True)
+        drainer.join()
@@ -0,0 +1,26 @@
+import importlib
+from pathlib import Path
+
+import pytest
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.dml import Update
+
+SERVICE_MODULES = sorted(
+    f"src.services.{path.stem}" for path in Path(__file__).parent.parent.joinpath("src", "services").glob("*.py")
+)
+
+
+def _prebuilt_updates():
+    for module_name in SERVICE_MODULES:
+        module = importlib.import_module(module_name)
+        for name, value in vars(module).items():
+            if isinstance(value, Update) and value.whereclause is not None:
+                yield pytest.param(value, id=f"{module_name}.{name}")
+
+
+@pytest.mark.parametrize("statement", list(_prebuilt_updates()))
+def test_update_where_binds_are_not_column_names(statement):
+    # Параметр с именем колонки SQLAlchemy считает значением SET
+    columns = {column.key for column in statement.table.columns}
+    binds = {node.key for node in visitors.iterate(statement.whereclause) if node.__visit_name__ == "bindparam"}
+    assert not binds & columns
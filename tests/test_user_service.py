@@ -0,0 +1,36 @@
+from src.services.user_service import UserService
+
+
+async def test_search_users_by_name_substring(session):
+    service = UserService(session)
+    for telegram_id, full_name in enumerate(
+            ("Иванов Иван", "Петров Петр", "Иванова Мария", "Сидоров 100%", "Сидоров_Олег"), start=700_000
+    ):
+        await service.create_user(telegram_id, full_name, "consultation")
+
+    users, has_more = await service.search_users(" Иванов ")
+    assert [user.full_name for user in users] == ["Иванов Иван", "Иванова Мария"]
+    assert not has_more
+
+    # Страницы по limit с признаком следующей
+    users, has_more = await service.search_users("ов", offset=0, limit=2)
+    assert [user.full_name for user in users] == ["Иванов Иван", "Петров Петр"]
+    assert has_more
+    users, has_more = await service.search_users("ов", offset=4, limit=2)
+    assert [user.full_name for user in users] == ["Сидоров_Олег"]
+    assert not has_more
+
+    # % и _ в запросе — обычные символы, а не шаблоны LIKE
+    users, _ = await service.search_users("%")
+    assert [user.full_name for user in users] == ["Сидоров 100%"]
+    users, _ = await service.search_users("в_")
+    assert [user.full_name for user in users] == ["Сидоров_Олег"]
+
+
+async def test_search_users_by_telegram_id(session):
+    service = UserService(session)
+    user = await service.create_user(700_100, "Иванов Иван", "consultation")
+
+    assert await service.search_users("700100") == ([user], False)
+    assert await service.search_users("700101") == ([], False)
+    assert await service.search_users("   ") == ([], False)
@@ -0,0 +1,115 @@
+"""
+Бенчмарк многопроцессного режима пользовательского бота
+
+Сравнивает пропускную способность 1 и N рабочих процессов на
+синтетическом потоке обновлений. Обработчик имитирует работу хендлера:
+CPU-нагрузку (рендеринг/валидация) и ответ через Telegram API — либо
+настоящий вызов sendMessage к поддельному серверу (--api-url), либо
+искусственную задержку.
+
+Запуск из корня репозитория:
+    python -m tools.fake_bot_api --port 8081 --latency 0.02 --no-record
+    python -m tools.bench_sharding --workers 1 4 --api-url http://127.0.0.1:8081
+"""
+import argparse
+import hashlib
+import os
+import asyncio
+import time
+from typing import Tuple
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message
+
+from src.bot.sharding import ShardPool
+
+BENCH_TOKEN = "42:BENCHMARK-TOKEN"
+
+
+def create_bench_worker() -> Tuple[Bot, Dispatcher]:
+    """Фабрика бота и диспетчера с имитацией нагрузки хендлера"""
+    cpu_iterations = int(os.environ.get("BENCH_CPU_ITERATIONS", "200"))
+    api_latency = float(os.environ.get("BENCH_API_LATENCY", "0.005"))
+    api_url = os.environ.get("BENCH_API_URL")
+
+    router = Router()
+
+    @router.message()
+    async def handle(message: Message):
+        digest = message.text.encode()
+        for _ in range(cpu_iterations):
+            digest = hashlib.sha256(digest).digest()
+        if api_url:
+            await message.answer(digest.hex()[:16])
+        else:
+            await asyncio.sleep(api_latency)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+
+    if api_url:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(api_url))
+        return Bot(token=BENCH_TOKEN, session=session), dp
+    return Bot(token=BENCH_TOKEN), dp
+
+
+def make_update(update_id: int, user_id: int) -> dict:
+    """Синтетическое текстовое сообщение от пользователя"""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Bench"},
+            "text": f"message {update_id}",
+        },
+    }
+
+
+def run(workers: int, updates: int, users: int) -> float:
+    """Прогон бенчмарка, возвращает обновлений в секунду"""
+    pool = ShardPool(workers, "tools.bench_sharding:create_bench_worker")
+    pool.start()
+
+    # Разогрев: дожидаемся запуска процессов
+    time.sleep(2.0)
+
+    started = time.perf_counter()
+    for update_id in range(updates):
+        pool.dispatch(make_update(update_id, 1000 + update_id % users))
+    processed = pool.stop(timeout=600)
+    elapsed = time.perf_counter() - started
+
+    total = sum(processed.values())
+    if total != updates:
+        print(f"  warning: processed {total} of {updates} updates")
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 2])
+    parser.add_argument("--updates", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--cpu-iterations", type=int, default=200)
+    parser.add_argument("--api-latency", type=float, default=0.005)
+    parser.add_argument("--api-url", help="адрес поддельного Bot API (tools.fake_bot_api)")
+    args = parser.parse_args()
+
+    os.environ["BENCH_CPU_ITERATIONS"] = str(args.cpu_iterations)
+    os.environ["BENCH_API_LATENCY"] = str(args.api_latency)
+    if args.api_url:
+        os.environ["BENCH_API_URL"] = args.api_url
+
+    baseline = None
+    for workers in args.workers:
+        rate = run(workers, args.updates, args.users)
+        baseline = baseline or rate
+        print(f"workers={workers:<3} {rate:10.1f} updates/s  x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Микробенчмарк накладных расходов Python на построение запросов
+
+Сравнивает запросы QueueService в прежнем виде (конструирование
+select(...) на каждый вызов) с заранее построенными запросами модуля
+queue_service. Выполнение идет на SQLite в памяти, чтобы в замере
+преобладала работа SQLAlchemy, а не базы данных.
+
+Запуск из корня репозитория:
+    python -m tools.bench_statements --calls 20000
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine, select, and_, func, insert
+from sqlalchemy.orm import Session
+
+from src.database.models import Base, Queue, User, QueueStatus, DEFAULT_QUEUE_ID
+from src.services import queue_service
+
+
+def inline_entry(session: Session, user_id: int):
+    return session.execute(
+        select(Queue).where(
+            and_(
+                Queue.queue_id == DEFAULT_QUEUE_ID,
+                Queue.user_id == user_id,
+                Queue.status == QueueStatus.IN_QUEUE.value
+            )
+        )
+    ).scalar_one_or_none()
+
+
+def inline_position(session: Session, user_id: int):
+    entry = inline_entry(session, user_id)
+    if not entry:
+        return None
+    count = session.execute(
+        select(func.count(Queue.id)).where(
+            and_(
+                Queue.queue_id == DEFAULT_QUEUE_ID,
+                Queue.status == QueueStatus.IN_QUEUE.value,
+                (Queue.priority < entry.priority)
+                | and_(Queue.priority == entry.priority, Queue.position < entry.position)
+            )
+        )
+    ).scalar()
+    return count + 1
+
+
+def cached_entry(session: Session, user_id: int):
+    params = {"b_queue_id": DEFAULT_QUEUE_ID, "user_id": user_id}
+    return session.execute(queue_service._SELECT_ENTRY_BY_USER, params).scalar_one_or_none()
+
+
+def cached_position(session: Session, user_id: int):
+    params = {"b_queue_id": DEFAULT_QUEUE_ID, "user_id": user_id}
+    row = session.execute(queue_service._SELECT_USER_POSITION, params).first()
+    return None if row is None else row[1] + 1
+
+
+def build_only_inline():
+    select(Queue).where(
+        and_(Queue.queue_id == DEFAULT_QUEUE_ID, Queue.user_id == 1, Queue.status == QueueStatus.IN_QUEUE.value)
+    )._generate_cache_key()
+
+
+def build_only_cached():
+    queue_service._SELECT_ENTRY_BY_USER._generate_cache_key()
+
+
+def measure(fn, calls: int, *args) -> float:
+    """Среднее время вызова, мкс"""
+    started = time.perf_counter()
+    for i in range(calls):
+        fn(*args, i % 100 + 1) if args else fn()
+    return (time.perf_counter() - started) / calls * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.execute(insert(User), [
+            {"id": i, "telegram_id": 1000 + i, "full_name": f"User {i}", "reason": "other", "priority": i % 4 + 1}
+            for i in range(1, 101)
+        ])
+        session.execute(insert(Queue), [
+            {"user_id": i, "priority": i % 4 + 1, "position": i // 4 + 1, "status": QueueStatus.IN_QUEUE.value}
+            for i in range(1, 101)
+        ])
+        session.commit()
+
+        print(f"{'case':<32}{'inline, us':>12}{'cached, us':>12}{'speedup':>10}")
+        for name, before, after, with_session in (
+                ("build + cache key", build_only_inline, build_only_cached, False),
+                ("get_queue_entry_by_user_id", inline_entry, cached_entry, True),
+                ("get_user_position", inline_position, cached_position, True),
+        ):
+            fn_args = (session,) if with_session else ()
+            # Разогрев кэша скомпилированных запросов
+            measure(before, 100, *fn_args)
+            measure(after, 100, *fn_args)
+            t_before = measure(before, args.calls, *fn_args)
+            t_after = measure(after, args.calls, *fn_args)
+            print(f"{name:<32}{t_before:>12.1f}{t_after:>12.1f}{t_before / t_after:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
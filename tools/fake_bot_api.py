@@ -0,0 +1,263 @@
+"""
+Локальный заменитель Telegram Bot API для нагрузочного тестирования
+
+Реализует методы, которые используют оба бота: getUpdates, sendMessage,
+editMessageText, answerCallbackQuery, sendDocument, createChatInviteLink
+(а также служебные getMe, getChat, deleteWebhook). Поддерживает
+искусственную задержку, инъекцию ответов 429 и запись всех вызовов.
+
+Боты подключаются через TELEGRAM_API_URL, например:
+    python -m tools.fake_bot_api --port 8081 --latency 0.05 --rate-429 0.01
+    TELEGRAM_API_URL=http://127.0.0.1:8081 python -m src.bot.main
+
+Служебные эндпоинты:
+    POST /_fake/updates/{token}  — поставить обновление (JSON) в очередь бота
+    GET  /_fake/calls            — записанные вызовы
+    GET  /_fake/stats            — количество вызовов по методам
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict, Counter
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+
+@dataclass
+class RecordedCall:
+    """Запись о вызове метода Bot API"""
+    timestamp: float
+    token: str
+    method: str
+    params: Dict[str, Any]
+    status: int = 200
+
+
+@dataclass
+class FakeBotAPI:
+    """Состояние поддельного сервера Bot API"""
+    latency: float = 0.0
+    jitter: float = 0.0
+    rate_429: float = 0.0
+    retry_after: int = 1
+    record_calls: bool = True
+    calls: List[RecordedCall] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._updates: Dict[str, asyncio.Queue] = defaultdict(asyncio.Queue)
+        self._outbox: Dict[int, asyncio.Queue] = defaultdict(asyncio.Queue)
+        self._update_id = 0
+        self._message_id = 0
+        self._file_id = 0
+        self._polling: Dict[str, asyncio.Event] = defaultdict(asyncio.Event)
+        self.method_counts: Counter = Counter()
+
+    # --- API для сценариев нагрузки ---
+
+    def push_update(self, token: str, update: Dict[str, Any]) -> int:
+        """Постановка обновления в очередь getUpdates бота"""
+        self._update_id += 1
+        update = {**update, "update_id": self._update_id}
+        self._updates[token].put_nowait(update)
+        return self._update_id
+
+    async def next_message(self, chat_id: int, timeout: float = 30.0) -> Dict[str, Any]:
+        """Следующее сообщение, отправленное ботом в чат"""
+        return await asyncio.wait_for(self._outbox[chat_id].get(), timeout)
+
+    async def wait_for_polling(self, token: str):
+        """Ожидание первого вызова getUpdates ботом"""
+        await self._polling[token].wait()
+
+    # --- Реализация методов ---
+
+    def _bot_user(self, token: str) -> Dict[str, Any]:
+        bot_id = int(token.split(":", 1)[0]) if token.split(":", 1)[0].isdigit() else 1
+        return {"id": bot_id, "is_bot": True, "first_name": "FakeBot", "username": f"fake_{bot_id}_bot"}
+
+    def _message(self, token: str, params: Dict[str, Any], **content) -> Dict[str, Any]:
+        self._message_id += 1
+        chat_id = int(params["chat_id"])
+        message = {
+            "message_id": int(params.get("message_id") or self._message_id),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "channel"},
+            "from": self._bot_user(token),
+            **content,
+        }
+        # В Message возвращается только inline-клавиатура (reply-клавиатуру aiogram не разберет)
+        markup = params.get("reply_markup")
+        if isinstance(markup, dict) and "inline_keyboard" in markup:
+            message["reply_markup"] = markup
+        self._outbox[chat_id].put_nowait(message)
+        return message
+
+    def _next_file(self) -> Dict[str, Any]:
+        self._file_id += 1
+        return {"file_id": f"fake-file-{self._file_id}", "file_unique_id": f"u{self._file_id}"}
+
+    async def _get_updates(self, token: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self._polling[token].set()
+        queue = self._updates[token]
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+
+        updates = []
+        try:
+            if queue.empty() and timeout:
+                updates.append(await asyncio.wait_for(queue.get(), timeout))
+            while not queue.empty() and len(updates) < limit:
+                updates.append(queue.get_nowait())
+        except asyncio.TimeoutError:
+            pass
+        return [update for update in updates if update["update_id"] >= offset]
+
+    async def call(self, token: str, method: str, params: Dict[str, Any]) -> Any:
+        """Выполнение метода Bot API"""
+        name = method.lower()
+
+        if name == "getupdates":
+            return await self._get_updates(token, params)
+        if name == "getme":
+            return self._bot_user(token)
+        if name in ("deletewebhook", "answercallbackquery", "setmycommands"):
+            return True
+        if name == "sendmessage":
+            return self._message(token, params, text=params.get("text", ""))
+        if name == "editmessagetext":
+            return self._message(token, params, text=params.get("text", ""))
+        if name == "editmessagereplymarkup":
+            return self._message(token, params)
+        if name == "senddocument":
+            document = {**self._next_file(), "file_name": "document"}
+            return self._message(token, params, document=document, caption=params.get("caption"))
+        if name == "createchatinvitelink":
+            self._file_id += 1
+            return {
+                "invite_link": f"https://t.me/+fake{self._file_id}",
+                "creator": self._bot_user(token),
+                "creates_join_request": False,
+                "is_primary": False,
+                "is_revoked": False,
+                "member_limit": params.get("member_limit"),
+            }
+        if name == "getchat":
+            return {"id": int(params["chat_id"]), "type": "channel", "title": "Fake channel"}
+        return True
+
+    # --- HTTP ---
+
+    async def _parse_params(self, request: web.Request) -> Dict[str, Any]:
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+            params.update(request.query)
+
+        # aiogram передает сложные поля как JSON-строки
+        for key, value in list(params.items()):
+            if isinstance(value, str) and value[:1] in ("{", "["):
+                try:
+                    params[key] = json.loads(value)
+                except ValueError:
+                    pass
+            elif not isinstance(value, (str, int, float, bool, list, dict, type(None))):
+                params[key] = "<file>"
+        return params
+
+    async def handle(self, request: web.Request) -> web.Response:
+        token = request.match_info["token"]
+        method = request.match_info["method"]
+        params = await self._parse_params(request)
+        self.method_counts[method] += 1
+
+        if method.lower() != "getupdates":
+            delay = self.latency + random.uniform(0, self.jitter)
+            if delay:
+                await asyncio.sleep(delay)
+
+            if self.rate_429 and random.random() < self.rate_429:
+                self._record(token, method, params, 429)
+                return web.json_response({
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                })
+
+        result = await self.call(token, method, params)
+        self._record(token, method, params, 200)
+        return web.json_response({"ok": True, "result": result})
+
+    def _record(self, token: str, method: str, params: Dict[str, Any], status: int):
+        if self.record_calls and method.lower() != "getupdates":
+            self.calls.append(RecordedCall(time.time(), token, method, params, status))
+
+    async def handle_push(self, request: web.Request) -> web.Response:
+        update_id = self.push_update(request.match_info["token"], await request.json())
+        return web.json_response({"update_id": update_id})
+
+    async def handle_calls(self, request: web.Request) -> web.Response:
+        return web.json_response([asdict(call) for call in self.calls])
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.method_counts))
+
+    def create_app(self) -> web.Application:
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_post("/_fake/updates/{token}", self.handle_push)
+        app.router.add_get("/_fake/calls", self.handle_calls)
+        app.router.add_get("/_fake/stats", self.handle_stats)
+        app.router.add_route("*", "/bot{token}/{method}", self.handle)
+        return app
+
+
+async def start_server(api: FakeBotAPI, host: str, port: int) -> web.AppRunner:
+    """Запуск сервера в текущем цикле событий"""
+    runner = web.AppRunner(api.create_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def build_parser(description: Optional[str] = None) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа, с")
+    parser.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке, с")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--no-record", action="store_true", help="не записывать вызовы")
+    return parser
+
+
+def api_from_args(args: argparse.Namespace) -> FakeBotAPI:
+    return FakeBotAPI(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        record_calls=not args.no_record
+    )
+
+
+async def _serve_forever(args: argparse.Namespace):
+    runner = await start_server(api_from_args(args), args.host, args.port)
+    print(f"Fake Bot API listening on http://{args.host}:{args.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(_serve_forever(build_parser(__doc__).parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,59 @@
+"""
+Импорт списка ожидания из CSV/XLSX (то же, что /import в админ-боте)
+
+Колонки: telegram_id, full_name, reason (ключ или название причины),
+join_date (необязательно). Подходит и файл экспорта админ-бота в Excel.
+Нужны переменные окружения ботов (.env).
+
+    python -m tools.import_queue waiting_list.csv
+    python -m tools.import_queue waiting_list.xlsx --dry-run
+    python -m tools.import_queue branch2.csv --queue branch2
+"""
+import argparse
+import asyncio
+import time
+
+from src.database.database import async_session_maker, engine
+from src.services.import_service import IMPORT_BATCH_SIZE, ImportService, ImportReport, read_table, validate_rows
+from src.services.priority_registry import priority_registry
+from src.services.queue_registry import queue_registry
+
+
+async def run(args):
+    # Очереди, причины и приоритеты — из БД, как в ботах
+    await queue_registry.load(async_session_maker)
+    await priority_registry.load(async_session_maker)
+
+    queue = queue_registry.by_key(args.queue)
+    if queue is None:
+        await engine.dispose()
+        raise SystemExit(f"Unknown queue {args.queue!r}")
+
+    report = ImportReport()
+    started = time.perf_counter()
+    # Строки проверяются по мере чтения: файл целиком в памяти не держится
+    rows = validate_rows(read_table(args.path), report, queue.id)
+    if args.dry_run:
+        for _ in rows:
+            pass
+        print(f"Read and validated {report.rows} rows in {time.perf_counter() - started:.2f} s")
+    else:
+        async with async_session_maker() as session:
+            await ImportService(session, queue.id).import_rows(rows, report, args.batch_size)
+    await engine.dispose()
+
+    print(report.summary())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Файл .csv или .xlsx")
+    parser.add_argument("--dry-run", action="store_true", help="Только проверка файла, без записи в БД")
+    parser.add_argument("--queue", default="default", help="Ключ очереди (таблица queues)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Строк файла в пакете загрузки")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Нагрузочный сценарий регистрации через поддельный Bot API
+
+Поднимает локальный сервер Bot API и прогоняет N виртуальных
+пользователей через все состояния RegistrationStates: /start, CAPTCHA,
+ФИО, выбор причины и (при необходимости) фото документа.
+
+Сначала запускается генератор, затем бот:
+    python -m tools.load_registration --users 5000 --concurrency 500 --token "$BOT_TOKEN"
+    TELEGRAM_API_URL=http://127.0.0.1:8081 python -m src.bot.main
+"""
+import asyncio
+import random
+import re
+import statistics
+import time
+from typing import Any, Callable, Dict, Optional
+
+from tools.fake_bot_api import FakeBotAPI, build_parser, api_from_args, start_server
+
+CAPTCHA_RE = re.compile(r"(\d+)\s*\+\s*(\d+)")
+
+
+class VirtualUser:
+    """Пользователь, проходящий регистрацию"""
+
+    def __init__(self, api: FakeBotAPI, token: str, user_id: int, timeout: float):
+        self.api = api
+        self.token = token
+        self.user = {"id": user_id, "is_bot": False, "first_name": f"Load{user_id}"}
+        self.chat = {"id": user_id, "type": "private"}
+        self.timeout = timeout
+        self._message_id = 0
+
+    def _base_message(self) -> Dict[str, Any]:
+        self._message_id += 1
+        return {"message_id": self._message_id, "date": int(time.time()), "chat": self.chat, "from": self.user}
+
+    def send_text(self, text: str):
+        self.api.push_update(self.token, {"message": {**self._base_message(), "text": text}})
+
+    def send_photo(self):
+        photo = [{"file_id": f"photo-{self.user['id']}", "file_unique_id": f"p{self.user['id']}",
+                  "width": 1280, "height": 960}]
+        self.api.push_update(self.token, {"message": {**self._base_message(), "photo": photo}})
+
+    def press(self, message: Dict[str, Any], data: str):
+        self.api.push_update(self.token, {"callback_query": {
+            "id": f"{self.user['id']}-{time.monotonic_ns()}",
+            "from": self.user,
+            "chat_instance": str(self.user["id"]),
+            "message": message,
+            "data": data,
+        }})
+
+    async def expect(self, predicate: Callable[[Dict[str, Any]], bool]) -> Dict[str, Any]:
+        """Ожидание сообщения бота, удовлетворяющего условию"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            message = await self.api.next_message(self.user["id"], max(0.0, deadline - time.monotonic()))
+            if predicate(message):
+                return message
+
+    async def register(self):
+        """Полный сценарий регистрации"""
+        self.send_text("/start")
+        await self.expect(lambda m: True)
+
+        self.send_text("🚀 Начать регистрацию")
+        captcha = await self.expect(lambda m: bool(_buttons(m)) and CAPTCHA_RE.search(m.get("text", "")))
+        a, b = CAPTCHA_RE.search(captcha["text"]).groups()
+        answer = next(data for text, data in _buttons(captcha) if text == str(int(a) + int(b)))
+        self.press(captcha, answer)
+
+        await self.expect(lambda m: "ФИО" in m.get("text", ""))
+        self.send_text(f"Нагрузочный Тест {self.user['id']}")
+
+        reasons = await self.expect(lambda m: bool(_buttons(m)))
+        self.press(reasons, random.choice(_buttons(reasons))[1])
+
+        next_message = await self.expect(lambda m: "документ" in m.get("text", "") or _is_done(m))
+        if not _is_done(next_message):
+            self.send_photo()
+            await self.expect(_is_done)
+
+
+def _buttons(message: Dict[str, Any]):
+    """Кнопки inline-клавиатуры: [(text, callback_data)]"""
+    markup = message.get("reply_markup") or {}
+    return [
+        (button["text"], button["callback_data"])
+        for row in markup.get("inline_keyboard", [])
+        for button in row
+        if "callback_data" in button
+    ]
+
+
+def _is_done(message: Dict[str, Any]) -> bool:
+    return "Регистрация завершена" in message.get("text", "")
+
+
+async def run(args):
+    api = api_from_args(args)
+    runner = await start_server(api, args.host, args.port)
+    print(f"Fake Bot API on http://{args.host}:{args.port}, waiting for the bot to start polling...")
+
+    try:
+        await api.wait_for_polling(args.token)
+        print(f"Bot connected, starting {args.users} registrations (concurrency {args.concurrency})")
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies = []
+        failures = 0
+
+        async def one(user_id: int):
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    await VirtualUser(api, args.token, user_id, args.timeout).register()
+                    latencies.append(time.perf_counter() - started)
+                except Exception as e:
+                    failures += 1
+                    if failures <= 10:
+                        print(f"  user {user_id} failed: {type(e).__name__} {e}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(args.first_user_id + i) for i in range(args.users)))
+        elapsed = time.perf_counter() - started
+
+        print(f"\nCompleted: {len(latencies)}, failed: {failures}, elapsed: {elapsed:.1f}s")
+        print(f"Throughput: {len(latencies) / elapsed:.1f} registrations/s")
+        if latencies:
+            latencies.sort()
+            print(f"Latency p50={statistics.median(latencies) * 1000:.0f}ms "
+                  f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f}ms "
+                  f"max={latencies[-1] * 1000:.0f}ms")
+        print(f"API calls: {dict(api.method_counts)}")
+        print(f"Injected 429: {sum(1 for call in api.calls if call.status == 429)}")
+    finally:
+        await runner.cleanup()
+
+
+def main(argv: Optional[list] = None):
+    parser = build_parser(__doc__)
+    parser.add_argument("--token", required=True, help="BOT_TOKEN тестируемого бота")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--first-user-id", type=int, default=10_000_000)
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()